@@ -1,44 +1,220 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any
-from app.services.export.manager import ExportManager
-from app.database.mongodb import get_database
-from bson import ObjectId
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse, Response
+from typing import Optional, Tuple, BinaryIO
+from app.core.config import settings
+from app.services.export.artifact_cache import ArtifactEntry
+from app.services.export.result_exporter import ResultExporter
+from app.services.export.bulk_exporter import BulkExporter
+from app.services.scraping.manager import task_filters
 from datetime import datetime
 
 router = APIRouter()
-export_manager = ExportManager()
+
+
+async def get_result_exporter(request: Request) -> ResultExporter:
+    """Dépendance : ResultExporter de l'application (et son cache d'exports), créé au démarrage"""
+    exporter = getattr(request.app.state, "result_exporter", None)
+    if exporter is None:
+        raise HTTPException(status_code=503, detail="Application en cours de démarrage")
+    return exporter
+
+
+async def get_bulk_exporter(request: Request) -> BulkExporter:
+    """Dépendance : BulkExporter de l'application, créé au démarrage"""
+    exporter = getattr(request.app.state, "bulk_exporter", None)
+    if exporter is None:
+        raise HTTPException(status_code=503, detail="Application en cours de démarrage")
+    return exporter
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match : comparaison faible, liste de validateurs ou *"""
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Plage demandée (début, fin incluse) ; None pour servir le fichier entier
+
+    Seule une plage unique est prise en charge, une demande de plusieurs
+    plages reçoit le fichier entier (autorisé par la RFC 9110). Lève
+    ValueError si la plage ne peut pas être satisfaite.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # bytes=-N : les N derniers octets
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise ValueError("Plage vide")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError("Plage invalide")
+    if start >= size or end < start:
+        raise ValueError("Plage hors du fichier")
+    return start, min(end, size - 1)
+
+
+async def _read_file(file: BinaryIO, start: int, length: int):
+    try:
+        await asyncio.to_thread(file.seek, start)
+        while length > 0:
+            chunk = await asyncio.to_thread(file.read, min(settings.STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _artifact_response(request: Request, entry: ArtifactEntry, filename: str) -> Response:
+    """Sert un fichier d'export en cache : 304 si le client l'a déjà, 206 pour une plage
+
+    Lève OSError si le fichier a été évincé entre-temps.
+    """
+    headers = {
+        "ETag": entry.etag,
+        "Accept-Ranges": "bytes",
+        # Le client revalide à chaque fois, la réponse 304 ne coûte rien
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    start, end = 0, entry.size - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range : la plage ne vaut que pour la version du fichier que le client possède
+    if range_header and (not if_range or if_range.strip() == entry.etag):
+        try:
+            requested = _parse_range(range_header, entry.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{entry.size}"})
+        if requested is not None:
+            start, end = requested
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+
+    # Ouvert avant de répondre : une éviction ultérieure n'interrompt pas la lecture
+    file = open(entry.path, "rb")
+    headers["Content-Length"] = str(max(0, end - start + 1))
+    return StreamingResponse(
+        _read_file(file, start, end - start + 1),
+        status_code=status_code,
+        media_type=entry.content_type,
+        headers=headers
+    )
+
+
+@router.get("/export/bulk")
+async def export_bulk(
+    format: str = "json",
+    archive: str = Query("zip", pattern="^(zip|tar)$"),
+    layout: str = Query("per_task", pattern="^(per_task|merged)$"),
+    status: Optional[str] = None,
+    host: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    bulk_exporter: BulkExporter = Depends(get_bulk_exporter)
+):
+    """Exporte les résultats de toutes les tâches filtrées dans une seule archive
+
+    per_task : un fichier par tâche ; merged : un seul fichier avec une
+    colonne task_id. L'archive est transmise au fil de sa construction,
+    manifest.json y liste les fichiers et les tâches en erreur.
+    """
+    filters = task_filters(status, host, created_after, created_before)
+
+    tasks = await bulk_exporter.find_task_ids(filters, settings.BULK_EXPORT_MAX_TASKS + 1)
+    if not tasks:
+        raise HTTPException(status_code=404, detail="Aucune tâche ne correspond aux filtres")
+    if len(tasks) > settings.BULK_EXPORT_MAX_TASKS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Plus de {settings.BULK_EXPORT_MAX_TASKS} tâches correspondent aux filtres, restreignez la période"
+        )
+
+    try:
+        output, content_type, extension = await bulk_exporter.export(tasks, format, archive, layout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return StreamingResponse(
+        output,
+        media_type=content_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Task-Count": str(len(tasks))
+        }
+    )
+
 
 @router.get("/export/{task_id}")
-async def export_results(task_id: str, format: str = "json"):
-    """Exporte les résultats d'une tâche dans le format spécifié"""
-    db = get_database()
-    
-    # Récupère les résultats
-    result = await db.scraping_results.find_one({"task_id": task_id})
+async def export_results(
+    task_id: str,
+    request: Request,
+    format: str = "json",
+    exporter: ResultExporter = Depends(get_result_exporter)
+):
+    """Exporte les résultats d'une tâche dans le format spécifié
+
+    Le fichier est produit au fil de la lecture des éléments et transmis par
+    blocs (transfert chunked) : la mémoire utilisée ne dépend pas du volume.
+    Pour un résultat terminé, le fichier produit est conservé dans le cache
+    d'exports et les téléchargements suivants sont servis depuis le disque,
+    avec ETag (304 Not Modified) et requêtes partielles (Range).
+    """
+    # Récupère le résumé des résultats, les éléments sont lus à la demande
+    result = await exporter.find_summary(task_id)
     if not result:
         raise HTTPException(status_code=404, detail="Résultats non trouvés")
-    
+
     try:
-        # Exporte les données
-        output, content_type, extension = await export_manager.export_data(
-            result["data"],
-            format
-        )
-        
         # Génère le nom du fichier
-        filename = f"export_{task_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
-        
+        def filename(extension: str) -> str:
+            return f"export_{task_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+        if exporter.cacheable(result):
+            entry = await exporter.lookup(task_id, result, format)
+            if entry is None and ("range" in request.headers or "if-none-match" in request.headers):
+                # Une plage ou une revalidation porte sur le fichier complet : il est produit d'abord
+                entry = await exporter.build(task_id, result, format)
+            if entry is not None:
+                try:
+                    return _artifact_response(request, entry, filename(entry.extension))
+                except OSError:
+                    pass
+            # Premier téléchargement : transmis au fil de l'eau et enregistré en même temps
+            output, content_type, extension = await exporter.stream_and_cache(task_id, result, format)
+        else:
+            # Exporte les données
+            output, content_type, extension = await exporter.stream(task_id, result, format)
+
         # Retourne le fichier
         return StreamingResponse(
             output,
             media_type=content_type,
             headers={
-                "Content-Disposition": f'attachment; filename="{filename}"'
+                "Content-Disposition": f'attachment; filename="{filename(extension)}"'
             }
         )
-        
+
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,19 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import Dict, Any, List
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Any, List, Optional, Union
+from app.core.config import settings
 from app.services.scraping.manager import ScrapingManager
-from app.models.scraping_task import ScrapingTask, ScrapingTaskCreate
+from app.models.scraping_task import ScrapingTask, ScrapingTaskCreate, ScrapingTaskSummary
 from app.models.scraping_result import ScrapingResult
-from app.database.mongodb import MongoDB
+from app.services.export.ndjson_exporter import NDJSONExporter
 
 router = APIRouter()
 
-async def get_scraping_manager():
-    """Dépendance pour obtenir une instance de ScrapingManager"""
-    # Obtient la connexion à la base de données
-    client = MongoDB.get_client()
-    # Sélectionne la base de données scraping_db
-    db = client.scraping_db
-    return await ScrapingManager.create(db)
+async def get_scraping_manager(request: Request) -> ScrapingManager:
+    """Dépendance : ScrapingManager de l'application, créé au démarrage"""
+    manager = getattr(request.app.state, "scraping_manager", None)
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Application en cours de démarrage")
+    return manager
 
 @router.post("/tasks")
 async def create_scraping_task(
@@ -38,12 +41,14 @@ async def create_scraping_task(
 @router.post("/tasks/{task_id}/execute")
 async def execute_scraping_task(
     task_id: str,
-    background_tasks: BackgroundTasks,
     manager: ScrapingManager = Depends(get_scraping_manager)
 ):
-    """Lance l'exécution d'une tâche de scraping"""
-    background_tasks.add_task(manager.execute_task, task_id)
-    return {"message": "Tâche lancée avec succès"}
+    """Place la tâche dans la file d'exécution (traitée par app.worker)"""
+    try:
+        job_id = await manager.enqueue_task(task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": "Tâche lancée avec succès", "job_id": job_id}
 
 @router.get("/tasks/{task_id}", response_model=ScrapingTask)
 async def get_task_status(
@@ -56,23 +61,99 @@ async def get_task_status(
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
     return task
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
 @router.get("/tasks/{task_id}/results", response_model=ScrapingResult)
 async def get_task_results(
     task_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.RESULTS_PAGE_MAX),
+    after: Optional[int] = Query(None, ge=-1, description="Curseur : next_cursor de la page précédente"),
+    fields: Optional[str] = Query(None, description="Champs à retourner, séparés par des virgules"),
     manager: ScrapingManager = Depends(get_scraping_manager)
 ):
-    """Récupère les résultats d'une tâche"""
+    """Récupère les résultats d'une tâche
+
+    Sans paramètre, retourne le document complet (format historique).
+    Avec limit, after ou fields, retourne une page {items, next_cursor}.
+    Avec Accept: application/x-ndjson, les éléments sont transmis au fil de
+    la lecture, un par ligne, sans validation ni chargement en mémoire.
+    """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    after_seq = after if after is not None else -1
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        try:
+            summary = await manager.get_results_summary(task_id)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        items = manager.result_store.iter_items(task_id, summary, after_seq, limit or 0, field_list)
+        return StreamingResponse(
+            NDJSONExporter().export(items, []),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"X-Result-Status": summary.get("status", "")}
+        )
+
+    if limit is not None or after is not None or field_list:
+        try:
+            page = await manager.get_results_page(task_id, limit or settings.RESULTS_PAGE_SIZE, after_seq, field_list)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        # Éléments sérialisés tels que lus, sans passer par le modèle
+        return Response(content=_dumps(page), media_type="application/json")
+
     results = await manager.get_results(task_id)
     if not results:
         raise HTTPException(status_code=404, detail="Résultats non trouvés")
     return results 
 
-@router.get("/tasks", response_model=List[ScrapingTask])
+@router.get("/tasks", response_model=Union[List[ScrapingTaskSummary], List[ScrapingTask]])
 async def list_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.TASKS_PAGE_MAX),
+    cursor: Optional[str] = Query(None, description="Valeur de l'en-tête X-Next-Cursor de la page précédente"),
+    status: Optional[str] = None,
+    host: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    view: str = Query("full", pattern="^(full|summary)$"),
     manager: ScrapingManager = Depends(get_scraping_manager)
 ):
-    """Liste toutes les tâches de scraping"""
-    return await manager.get_all_tasks() 
+    """Liste les tâches de scraping, des plus récentes aux plus anciennes
+
+    Sans limit ni cursor, toutes les tâches sont retournées. Avec l'un des
+    deux, la liste est paginée (TASKS_PAGE_SIZE tâches par défaut) :
+    X-Next-Cursor donne le curseur de la page suivante (absent sur la
+    dernière) et X-Total-Count le nombre de tâches correspondant aux filtres.
+    view=summary omet config et metadata, hors message d'erreur.
+    """
+    if cursor and not limit:
+        limit = settings.TASKS_PAGE_SIZE
+    try:
+        tasks, next_cursor, total = await manager.list_tasks(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            host=host,
+            created_after=created_after,
+            created_before=created_before,
+            summary=view == "summary"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+    response.headers.update(headers)
+    return tasks
 
 @router.post("/tasks/{task_id}/retry")
 async def retry_task(
@@ -98,4 +179,13 @@ async def get_task_logs(
     manager: ScrapingManager = Depends(get_scraping_manager)
 ):
     """Récupère les logs d'une tâche"""
-    return await manager.get_task_logs(task_id) 
\ No newline at end of file
+    return await manager.get_task_logs(task_id) 
+
+@router.delete("/config-cache")
+async def invalidate_config_cache(
+    host: Optional[str] = None,
+    manager: ScrapingManager = Depends(get_scraping_manager)
+):
+    """Invalide les configurations générées par le LLM (toutes, ou celles d'un hôte)"""
+    deleted = await manager.invalidate_config_cache(host)
+    return {"message": "Cache de configurations invalidé", "deleted": deleted}
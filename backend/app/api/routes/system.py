@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, Any
+from app.database.mongodb import MongoDB
+from app.services.http.fetch_service import FetchService
+from app.services.queue.job_queue import JobQueue
+from app.services.proxy.manager import ProxyManager
+from app.services.export.artifact_cache import create_artifact_cache
+from app.services.template.index import TemplateIndex
+
+router = APIRouter()
+
+@router.get("/system/ping")
+async def ping() -> Dict[str, Any]:
+    """Réponse minimale, utilisable comme cible des sondes de proxies (PROXY_PROBE_URL)"""
+    return {"status": "ok"}
+
+@router.get("/system/startup")
+async def get_startup_report(request: Request):
+    """Sonde de démarrage : 200 une fois l'initialisation terminée, avec la durée de chaque étape"""
+    report = getattr(request.app.state, "startup", None) or {"ready": False}
+    return JSONResponse(jsonable_encoder(report), status_code=200 if report["ready"] else 503)
+
+@router.get("/system/http-pool")
+async def get_http_pool_stats() -> Dict[str, Any]:
+    """Statistiques du pool de connexions HTTP partagé"""
+    return FetchService.get_instance().get_stats()
+
+@router.get("/system/queue")
+async def get_queue_stats() -> Dict[str, Any]:
+    """Nombre de jobs par statut dans la file d'exécution"""
+    return await JobQueue(MongoDB.get_db()).get_stats()
+
+@router.get("/system/proxies")
+async def get_proxy_stats() -> Dict[str, Any]:
+    """État du pool de proxies en mémoire de ce processus"""
+    return ProxyManager.get_instance().get_stats()
+
+@router.get("/system/templates")
+async def get_template_index_stats() -> Dict[str, Any]:
+    """État de l'index des templates en mémoire de ce processus"""
+    return TemplateIndex.get_instance().get_stats()
+
+@router.get("/system/export-cache")
+async def get_export_cache_stats() -> Dict[str, Any]:
+    """Taille du cache des fichiers d'export (répertoire partagé par les processus de l'hôte)"""
+    cache = create_artifact_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **await cache.get_stats()}
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Dict, Any, List
 from app.services.template.manager import TemplateManager
 
 router = APIRouter()
-template_manager = TemplateManager()
+
+async def get_template_manager(request: Request) -> TemplateManager:
+    """Dépendance : TemplateManager de l'application, créé au démarrage"""
+    manager = getattr(request.app.state, "template_manager", None)
+    if manager is None:
+        raise HTTPException(status_code=503, detail="Application en cours de démarrage")
+    return manager
 
 @router.post("/templates", response_model=Dict[str, str])
-async def create_template(template_data: Dict[str, Any]):
+async def create_template(
+    template_data: Dict[str, Any],
+    template_manager: TemplateManager = Depends(get_template_manager)
+):
     """Crée un nouveau template de scraping"""
     try:
         template_id = await template_manager.create_template(template_data)
@@ -15,13 +24,20 @@ async def create_template(template_data: Dict[str, Any]):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/templates", response_model=List[Dict[str, Any]])
-async def list_templates(skip: int = 0, limit: int = 10):
+async def list_templates(
+    skip: int = 0,
+    limit: int = 10,
+    template_manager: TemplateManager = Depends(get_template_manager)
+):
     """Liste les templates disponibles"""
     templates = await template_manager.get_templates(skip, limit)
     return templates
 
 @router.get("/templates/match")
-async def find_matching_template(url: str):
+async def find_matching_template(
+    url: str,
+    template_manager: TemplateManager = Depends(get_template_manager)
+):
     """Trouve un template compatible avec l'URL donnée"""
     template = await template_manager.find_matching_template(url)
     if not template:
@@ -32,7 +48,11 @@ async def find_matching_template(url: str):
     return template
 
 @router.put("/templates/{template_id}")
-async def update_template(template_id: str, updates: Dict[str, Any]):
+async def update_template(
+    template_id: str,
+    updates: Dict[str, Any],
+    template_manager: TemplateManager = Depends(get_template_manager)
+):
     """Met à jour un template existant"""
     success = await template_manager.update_template(template_id, updates)
     if not success:
@@ -16,21 +16,119 @@ class Settings(BaseModel):
     # Ollama
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "mistral")
+    OLLAMA_TIMEOUT: int = int(os.getenv("OLLAMA_TIMEOUT", "30"))
+    OLLAMA_STREAM: bool = os.getenv("OLLAMA_STREAM", "true").lower() == "true"
+    LLM_CONFIG_CACHE_TTL: int = int(os.getenv("LLM_CONFIG_CACHE_TTL", str(7 * 24 * 3600)))  # 0 = désactivé
+    LLM_CONFIG_CACHE_SIZE: int = int(os.getenv("LLM_CONFIG_CACHE_SIZE", "512"))
+    LLM_CONFIG_CACHE_SYNC_INTERVAL: float = float(os.getenv("LLM_CONFIG_CACHE_SYNC_INTERVAL", "5"))  # invalidations des autres processus
     
     # Scraping
-    MAX_RETRIES: int = 3
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
     REQUEST_TIMEOUT: int = 30
     DEFAULT_HEADERS: Dict[str, str] = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
     
+    # Client HTTP partagé
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+    HTTP_KEEPALIVE_TIMEOUT: int = int(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    MAX_RESPONSE_BYTES: int = int(os.getenv("MAX_RESPONSE_BYTES", str(100 * 1024 * 1024)))
+    STREAM_CHUNK_SIZE: int = int(os.getenv("STREAM_CHUNK_SIZE", str(64 * 1024)))
+    
+    # Nouvelles tentatives et disjoncteur par hôte
+    RETRY_BASE_DELAY: float = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+    RETRY_MAX_DELAY: float = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    RETRY_AFTER_MAX: float = float(os.getenv("RETRY_AFTER_MAX", "120"))  # au-delà, abandon immédiat
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # 0 = désactivé
+    CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    
+    # Cache des réponses HTTP
+    HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+    HTTP_CACHE_DIR: str = os.getenv("HTTP_CACHE_DIR", ".cache/http")
+    HTTP_CACHE_MAX_BYTES: int = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    HTTP_CACHE_HEURISTIC_TTL: int = int(os.getenv("HTTP_CACHE_HEURISTIC_TTL", "300"))  # plafond de l'heuristique Last-Modified, 5 minutes
+    
+    # Analyse HTML
+    DEFAULT_HTML_PARSER: str = os.getenv("DEFAULT_HTML_PARSER", "html.parser")
+    PARSER_PROCESSES: int = int(os.getenv("PARSER_PROCESSES", str(max(1, (os.cpu_count() or 2) // 2))))
+    PARSER_THREADS: int = int(os.getenv("PARSER_THREADS", "4"))
+    PARSE_PROCESS_THRESHOLD: int = int(os.getenv("PARSE_PROCESS_THRESHOLD", str(256 * 1024)))  # octets
+    
+    # Pagination
+    PAGINATION_MAX_PAGES: int = int(os.getenv("PAGINATION_MAX_PAGES", "50"))
+    PAGINATION_CONCURRENCY: int = int(os.getenv("PAGINATION_CONCURRENCY", "4"))
+    
+    # Exploration multi-pages (crawl)
+    CRAWL_MAX_URLS: int = int(os.getenv("CRAWL_MAX_URLS", "500000"))  # plafond par tâche
+    CRAWL_CONCURRENCY: int = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+    CRAWL_DEFAULT_DELAY: float = float(os.getenv("CRAWL_DEFAULT_DELAY", "0"))  # secondes entre deux requêtes sur un hôte
+    CRAWL_BLOOM_ERROR_RATE: float = float(os.getenv("CRAWL_BLOOM_ERROR_RATE", "0.001"))
+    CRAWL_STATE_SAVE_INTERVAL: int = int(os.getenv("CRAWL_STATE_SAVE_INTERVAL", "50"))  # pages
+    ROBOTS_CACHE_TTL: int = int(os.getenv("ROBOTS_CACHE_TTL", "3600"))
+    ROBOTS_CACHE_SIZE: int = int(os.getenv("ROBOTS_CACHE_SIZE", "1024"))
+    CRAWL_ROBOTS_MAX_ATTEMPTS: int = int(os.getenv("CRAWL_ROBOTS_MAX_ATTEMPTS", "5"))  # robots.txt indisponible, puis page en échec
+    
+    # Stockage des résultats (un document par élément) et pagination de l'API
+    RESULTS_BATCH_SIZE: int = int(os.getenv("RESULTS_BATCH_SIZE", "500"))  # éléments par insert_many
+    RESULTS_PAGE_SIZE: int = int(os.getenv("RESULTS_PAGE_SIZE", "100"))  # page par défaut de l'API
+    RESULTS_PAGE_MAX: int = int(os.getenv("RESULTS_PAGE_MAX", "5000"))
+    TASKS_PAGE_SIZE: int = int(os.getenv("TASKS_PAGE_SIZE", "50"))  # liste des tâches, page suivante sans limit
+    TASKS_PAGE_MAX: int = int(os.getenv("TASKS_PAGE_MAX", "500"))
+    
+    # Exports
+    PARQUET_ROW_GROUP_SIZE: int = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "50000"))  # lignes par groupe
+    PARQUET_COMPRESSION: str = os.getenv("PARQUET_COMPRESSION", "zstd")
+    # Fichiers d'export des résultats terminés, resservis avec ETag et Range
+    EXPORT_CACHE_ENABLED: bool = os.getenv("EXPORT_CACHE_ENABLED", "true").lower() == "true"
+    EXPORT_CACHE_DIR: str = os.getenv("EXPORT_CACHE_DIR", ".cache/exports")
+    EXPORT_CACHE_MAX_BYTES: int = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    # Formats produits dès la fin d'une tâche (liste séparée par des virgules, vide = à la demande)
+    EXPORT_PREBUILD_FORMATS: str = os.getenv("EXPORT_PREBUILD_FORMATS", "")
+    # Export groupé de plusieurs tâches dans une archive
+    BULK_EXPORT_MAX_TASKS: int = int(os.getenv("BULK_EXPORT_MAX_TASKS", "1000"))
+    BULK_EXPORT_CONCURRENCY: int = int(os.getenv("BULK_EXPORT_CONCURRENCY", "4"))  # fichiers produits en parallèle
+    
+    # Index des templates en mémoire
+    TEMPLATE_CHANGE_STREAM: bool = os.getenv("TEMPLATE_CHANGE_STREAM", "true").lower() == "true"  # replica set requis
+    TEMPLATE_INDEX_REFRESH_INTERVAL: float = float(os.getenv("TEMPLATE_INDEX_REFRESH_INTERVAL", "30"))  # sans flux de modifications
+    TEMPLATE_USAGE_FLUSH_INTERVAL: float = float(os.getenv("TEMPLATE_USAGE_FLUSH_INTERVAL", "10"))
+    
+    # File d'exécution et workers
+    QUEUE_LEASE_SECONDS: int = int(os.getenv("QUEUE_LEASE_SECONDS", "120"))
+    QUEUE_HEARTBEAT_INTERVAL: int = int(os.getenv("QUEUE_HEARTBEAT_INTERVAL", "30"))
+    QUEUE_MAX_ATTEMPTS: int = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+    QUEUE_RETRY_DELAY: int = int(os.getenv("QUEUE_RETRY_DELAY", "30"))
+    QUEUE_POLL_INTERVAL: float = float(os.getenv("QUEUE_POLL_INTERVAL", "2"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_SHUTDOWN_TIMEOUT: float = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "20"))  # au-delà, les jobs en cours sont rendus à la file
+    # Worker intégré au processus API (développement), 0 = l'API ne fait qu'ajouter à la file
+    EMBEDDED_WORKER_CONCURRENCY: int = int(os.getenv("EMBEDDED_WORKER_CONCURRENCY", "0"))
+    
     # Proxy
-    USE_PROXY: bool = False
-    PROXY_ROTATION_INTERVAL: int = 300  # 5 minutes
+    USE_PROXY: bool = os.getenv("USE_PROXY", "false").lower() == "true"
+    PROXY_ROTATION_INTERVAL: int = int(os.getenv("PROXY_ROTATION_INTERVAL", "300"))  # rechargement du pool, 5 minutes
+    PROXY_STATS_FLUSH_INTERVAL: int = int(os.getenv("PROXY_STATS_FLUSH_INTERVAL", "10"))
+    PROXY_EWMA_ALPHA: float = float(os.getenv("PROXY_EWMA_ALPHA", "0.3"))
+    PROXY_QUARANTINE_FAILURES: int = int(os.getenv("PROXY_QUARANTINE_FAILURES", "3"))  # échecs consécutifs
+    PROXY_QUARANTINE_BASE: float = float(os.getenv("PROXY_QUARANTINE_BASE", "30"))  # doublée à chaque rechute
+    PROXY_QUARANTINE_MAX: float = float(os.getenv("PROXY_QUARANTINE_MAX", "3600"))
+    # Sondes de santé : cible maîtrisée (vide = sondes désactivées)
+    PROXY_PROBE_URL: str = os.getenv("PROXY_PROBE_URL", "")
+    PROXY_PROBE_INTERVAL: float = float(os.getenv("PROXY_PROBE_INTERVAL", "60"))
+    PROXY_PROBE_TIMEOUT: float = float(os.getenv("PROXY_PROBE_TIMEOUT", "10"))
+    PROXY_PROBE_CONCURRENCY: int = int(os.getenv("PROXY_PROBE_CONCURRENCY", "20"))
     
-    # Rate Limiting
-    RATE_LIMIT_REQUESTS: int = 60
-    RATE_LIMIT_PERIOD: int = 60  # 1 minute
+    # Rate Limiting (par hôte, partagé entre processus via MongoDB)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "60"))
+    RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD", "60"))  # 1 minute
+    RATE_LIMIT_STORE: str = os.getenv("RATE_LIMIT_STORE", "mongo")  # mongo ou local
+    RATE_LIMIT_BATCH: int = int(os.getenv("RATE_LIMIT_BATCH", "5"))  # jetons obtenus par accès au magasin
+    RATE_LIMIT_OVERRIDES: str = os.getenv("RATE_LIMIT_OVERRIDES", "")  # JSON {"hote": [requêtes, période]}
 
     class Config:
         case_sensitive = True
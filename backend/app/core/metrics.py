@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional
+
+
+class TaskMetrics:
+    """Compteurs et mesures collectés pendant le traitement d'une tâche
+
+    Les noms sont hiérarchiques ("http_cache.hit") et sont restitués sous forme
+    de dictionnaires imbriqués, compatibles avec les clés MongoDB.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1):
+        self._values[name] = self._values.get(name, 0) + value
+
+    def set(self, name: str, value: float):
+        self._values[name] = value
+
+    def observe(self, name: str, value: float):
+        """Enregistre une mesure (nombre, total et maximum)"""
+        self.incr(f"{name}.count")
+        self.incr(f"{name}.total", value)
+        self._values[f"{name}.max"] = max(self._values.get(f"{name}.max", value), value)
+
+    def get(self, name: str, default: float = 0) -> float:
+        return self._values.get(name, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for name, value in sorted(self._values.items()):
+            node = result
+            *parents, leaf = name.split(".")
+            for part in parents:
+                node = node.setdefault(part, {})
+            node[leaf] = round(value, 6) if isinstance(value, float) else value
+        return result
+
+
+_current_metrics: ContextVar[Optional[TaskMetrics]] = ContextVar("task_metrics", default=None)
+
+
+def current_metrics() -> Optional[TaskMetrics]:
+    """Retourne le collecteur actif pour le contexte asyncio courant"""
+    return _current_metrics.get()
+
+
+@contextmanager
+def collect_metrics() -> Iterator[TaskMetrics]:
+    """Active un collecteur pour le bloc (hérité par les sous-tâches asyncio)"""
+    metrics = TaskMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+def incr(name: str, value: float = 1):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.incr(name, value)
+
+
+def observe(name: str, value: float):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.observe(name, value)
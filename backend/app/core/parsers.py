@@ -0,0 +1,13 @@
+import importlib.util
+from typing import List
+
+PARSER_BACKENDS = ("html.parser", "lxml", "selectolax")
+# Modules requis par chaque parseur, installés via les extras du paquet (pyproject.toml)
+PARSER_MODULES = {"html.parser": (), "lxml": ("lxml",), "selectolax": ("selectolax",)}
+# Analyse incrémentale (streaming: true)
+STREAMING_MODULES = ("lxml", "cssselect")
+
+
+def missing_modules(modules) -> List[str]:
+    """Modules de la liste qui ne sont pas importables dans cet environnement"""
+    return [name for name in modules if importlib.util.find_spec(name) is None]
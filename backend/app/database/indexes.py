@@ -0,0 +1,81 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    options: Dict[str, Any] = field(default_factory=dict)
+    reason: str = ""  # Requête servie par l'index
+
+    @property
+    def name(self) -> str:
+        # Nom par défaut de MongoDB, pour reconnaître les index déjà créés
+        return self.options.get("name") or "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+# Index de toutes les collections utilisées par les services. Toute nouvelle
+# requête doit être servie par l'un d'eux : app/scripts/check_query_plans.py
+# vérifie les plans d'exécution (aucun COLLSCAN).
+INDEXES: List[IndexSpec] = [
+    # Liste des tâches : tri (created_at, _id) décroissant, filtres statut et hôte
+    IndexSpec("scraping_tasks", (("created_at", -1), ("_id", -1)), reason="liste paginée des tâches"),
+    IndexSpec("scraping_tasks", (("status", 1), ("created_at", -1), ("_id", -1)), reason="liste filtrée par statut"),
+    IndexSpec("scraping_tasks", (("host", 1), ("created_at", -1), ("_id", -1)), reason="liste filtrée par hôte"),
+    # Résumés des résultats : export, reprise d'une exploration, suppression
+    IndexSpec("scraping_results", (("task_id", 1), ("created_at", -1)), reason="résultats d'une tâche"),
+    IndexSpec("scraping_items", (("task_id", 1), ("seq", 1)), {"unique": True}, reason="éléments d'une tâche dans l'ordre"),
+    # File d'exécution
+    IndexSpec("scraping_jobs", (("status", 1), ("available_at", 1)), reason="location du prochain job"),
+    IndexSpec("scraping_jobs", (("status", 1), ("lease_expires_at", 1)), reason="reprise des baux expirés"),
+    IndexSpec(
+        "scraping_jobs",
+        (("task_id", 1),),
+        {"unique": True, "partialFilterExpression": {"active": True}, "name": "task_id_active_unique"},
+        reason="un seul job actif par tâche, annulation"
+    ),
+    # Exploration
+    IndexSpec("crawl_frontier", (("task_id", 1), ("url_key", 1)), {"unique": True}, reason="déduplication des URLs"),
+    IndexSpec(
+        "crawl_frontier",
+        (("task_id", 1), ("status", 1), ("priority", -1), ("depth", 1), ("_id", 1)),
+        reason="prochaine URL à visiter"
+    ),
+    # Cache des configurations LLM (expiration par TTL)
+    IndexSpec("llm_config_cache", (("expires_at", 1),), {"expireAfterSeconds": 0}, reason="expiration des entrées"),
+    IndexSpec("llm_config_cache", (("host", 1),), reason="invalidation par hôte"),
+    # Proxies
+    IndexSpec("proxy_pool", (("status", 1),), reason="chargement des proxies actifs"),
+    IndexSpec("proxy_pool", (("ip", 1), ("port", 1)), reason="import et déduplication des proxies"),
+]
+
+
+def indexes_for(collection: str) -> List[IndexSpec]:
+    return [spec for spec in INDEXES if spec.collection == collection]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase, collections: Optional[List[str]] = None) -> Dict[str, int]:
+    """Crée les index manquants du registre, sans jamais en supprimer
+
+    create_index est sans effet pour un index identique déjà présent. Un
+    index existant avec d'autres options (conflit) est signalé et laissé en
+    place : le corriger relève d'une opération manuelle. Retourne le nombre
+    d'index vérifiés et en conflit.
+    """
+    checked = conflicts = 0
+    for spec in INDEXES:
+        if collections is not None and spec.collection not in collections:
+            continue
+        try:
+            await db[spec.collection].create_index(list(spec.keys), **spec.options)
+            checked += 1
+        except OperationFailure as e:
+            conflicts += 1
+            logger.warning(f"Index {spec.collection}.{spec.name} non créé (index existant différent): {str(e)}")
+    return {"checked": checked, "conflicts": conflicts}
@@ -25,4 +25,9 @@ class MongoDB:
         if cls._client:
             cls._client.close()
             cls._client = None
-            logger.info("Connexion à MongoDB fermée") 
\ No newline at end of file
+            logger.info("Connexion à MongoDB fermée")
+
+
+def get_database():
+    """Base de données de l'application (client partagé)"""
+    return MongoDB.get_db()
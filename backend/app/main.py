@@ -1,8 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import scraping
+from app.api.routes import scraping, system, export, templates
 from app.database.mongodb import MongoDB
+from app.services.http.fetch_service import FetchService
+from app.services.proxy.manager import ProxyManager
+from app.services.proxy.prober import ProxyProber
+from app.services.scraping.parsing import ParsingPool
+from app.services.export.bulk_exporter import BulkExporter
+from app.services.queue.job_queue import JobQueue
+from app.services.scraping.manager import ScrapingManager
+from app.services.template.index import TemplateIndex
+from app.services.template.manager import TemplateManager
+from app.core.config import settings
+from app.worker import Worker
+import asyncio
 import logging
+import time
+from datetime import datetime
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -21,14 +35,47 @@ app.add_middleware(
 
 # Inclusion des routes
 app.include_router(scraping.router, prefix="/api/v1", tags=["scraping"])
+app.include_router(system.router, prefix="/api/v1", tags=["system"])
+app.include_router(export.router, prefix="/api/v1", tags=["export"])
+app.include_router(templates.router, prefix="/api/v1", tags=["templates"])
 
 @app.on_event("startup")
 async def startup_event():
     """Événement de démarrage de l'application"""
+    # Durée de chaque étape, exposée par GET /system/startup
+    app.state.startup = {"ready": False, "started_at": datetime.utcnow(), "steps": {}}
+    started = time.perf_counter()
+
+    def step(name: str, since: float) -> float:
+        now = time.perf_counter()
+        app.state.startup["steps"][name] = round(now - since, 3)
+        return now
+
     try:
         # Initialise la connexion MongoDB
-        MongoDB.get_client()
-        logger.info("Application démarrée avec succès")
+        db = MongoDB.get_db()
+        checkpoint = step("mongodb", started)
+        # Ouvre le pool HTTP partagé par le LLM et les stratégies de scraping
+        await FetchService.get_instance().start()
+        checkpoint = step("http_pool", checkpoint)
+        # Gestionnaire partagé par toutes les requêtes : collections et index
+        # sont créés ici, une seule fois
+        app.state.scraping_manager = await ScrapingManager.create(db)
+        app.state.template_manager = TemplateManager(db)
+        # Exports : même cache de fichiers que le gestionnaire, qui l'invalide et le préremplit
+        app.state.result_exporter = app.state.scraping_manager.result_exporter
+        app.state.bulk_exporter = BulkExporter(db, app.state.result_exporter)
+        checkpoint = step("scraping_manager", checkpoint)
+        # Sondes de santé des proxies (si USE_PROXY et PROXY_PROBE_URL)
+        ProxyProber.start_instance()
+        # Worker intégré optionnel, en production les workers tournent via python -m app.worker
+        if settings.EMBEDDED_WORKER_CONCURRENCY > 0:
+            app.state.worker = Worker(app.state.scraping_manager, JobQueue(db), settings.EMBEDDED_WORKER_CONCURRENCY)
+            app.state.worker_task = asyncio.create_task(app.state.worker.run())
+        step("workers", checkpoint)
+        app.state.startup["total"] = round(time.perf_counter() - started, 3)
+        app.state.startup["ready"] = True
+        logger.info(f"Application démarrée avec succès en {app.state.startup['total']:.3f}s {app.state.startup['steps']}")
     except Exception as e:
         logger.error(f"Erreur lors du démarrage de l'application: {str(e)}")
         raise
@@ -37,8 +84,21 @@ async def startup_event():
 async def shutdown_event():
     """Événement d'arrêt de l'application"""
     try:
+        if getattr(app.state, "worker", None):
+            # Attente bornée : WORKER_SHUTDOWN_TIMEOUT, puis les jobs en cours sont rendus à la file
+            app.state.worker.stop()
+            await app.state.worker_task
+        # Écrit les dernières statistiques des proxies avant de fermer MongoDB
+        await ProxyProber.shutdown()
+        await ProxyManager.shutdown()
+        # Compteurs d'utilisation des templates encore en mémoire
+        await TemplateIndex.shutdown()
         # Ferme la connexion MongoDB
         MongoDB.close()
+        # Ferme les connexions HTTP maintenues en keep-alive
+        await FetchService.shutdown()
+        # Arrête les pools d'analyse HTML (threads et processus)
+        ParsingPool.shutdown()
         logger.info("Application arrêtée avec succès")
     except Exception as e:
         logger.error(f"Erreur lors de l'arrêt de l'application: {str(e)}")
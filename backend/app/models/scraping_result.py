@@ -6,7 +6,7 @@ from bson import ObjectId
 class ScrapingResult(BaseModel):
     id: str = Field(alias='_id')
     task_id: str
-    data: List[Dict[str, Any]]
+    data: List[Dict[str, Any]] = []  # Éléments lus dans scraping_items
     status: str
     created_at: datetime
     updated_at: Optional[datetime] = None  # Rend le champ optionnel
@@ -1,7 +1,37 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, ValidationInfo
 from typing import Optional, Dict, Any, List
+import re
 from datetime import datetime
 from bson import ObjectId
+from app.core.parsers import PARSER_BACKENDS, PARSER_MODULES, STREAMING_MODULES, missing_modules
+
+class CrawlLinkRule(BaseModel):
+    selector: str = "a[href]"  # Liens à suivre (attribut href)
+    allow: Optional[str] = None  # Expression régulière que l'URL absolue doit vérifier
+    deny: Optional[str] = None  # Expression régulière excluant l'URL
+    priority: int = 0  # Les pages de priorité élevée sont visitées en premier
+    selectors: Optional[Dict[str, str]] = None  # Sélecteurs des pages atteintes par cette règle (fiches détail)
+    extract: bool = True  # False pour les pages de navigation seule (listes, index)
+
+    @field_validator('allow', 'deny')
+    @classmethod
+    def validate_pattern(cls, v):
+        if v is not None:
+            try:
+                re.compile(v)
+            except re.error as e:
+                raise ValueError(f"Expression régulière invalide: {v} ({str(e)})")
+        return v
+
+class CrawlConfig(BaseModel):
+    enabled: bool = False
+    max_depth: int = 1
+    max_urls: int = 1000
+    link_rules: List[CrawlLinkRule] = [CrawlLinkRule()]
+    same_host: bool = True
+    respect_robots: bool = True
+    delay: float = 0.0  # Délai minimal entre deux requêtes sur un même hôte
+    concurrency: Optional[int] = None
 
 class ScrapingConfig(BaseModel):
     selectors: Dict[str, str] = {}
@@ -10,10 +40,37 @@ class ScrapingConfig(BaseModel):
     navigation_rules: Optional[Dict[str, Any]] = None
     extraction_method: str = "static"
     restrictions: List[str] = []
+    parser: Optional[str] = None  # html.parser, lxml ou selectolax ; None = DEFAULT_HTML_PARSER
+    streaming: bool = False  # Analyse incrémentale (lxml) pour les très grandes pages
+    crawl: Optional[CrawlConfig] = None  # Exploration des liens à partir de l'URL de la tâche
+
+    @field_validator('parser')
+    @classmethod
+    def validate_parser(cls, v, info: ValidationInfo):
+        if v is None:
+            return v
+        if v not in PARSER_BACKENDS:
+            raise ValueError(f"Parseur non supporté: {v} (attendu: {', '.join(PARSER_BACKENDS)})")
+        # Vérifié à la création de la tâche (contexte check_available) : une
+        # tâche déjà enregistrée reste lisible même si le paquet a disparu
+        missing = missing_modules(PARSER_MODULES[v]) if (info.context or {}).get("check_available") else []
+        if missing:
+            raise ValueError(f"Parseur {v} indisponible : paquet(s) {', '.join(missing)} non installé(s)")
+        return v
+
+    @field_validator('streaming')
+    @classmethod
+    def validate_streaming(cls, v, info: ValidationInfo):
+        if v and (info.context or {}).get("check_available"):
+            missing = missing_modules(STREAMING_MODULES)
+            if missing:
+                raise ValueError(f"Analyse incrémentale indisponible : paquet(s) {', '.join(missing)} non installé(s)")
+        return v
 
 class ScrapingTask(BaseModel):
     id: str = Field(alias='_id')
     url: str
+    host: Optional[str] = None
     description: str
     status: str
     created_at: datetime
@@ -51,6 +108,31 @@ class ScrapingTask(BaseModel):
             return cls(**data)
         return None
 
+class ScrapingTaskSummary(BaseModel):
+    """Tâche sans config ni metadata (seul metadata.error est repris), pour les listes"""
+    id: str = Field(alias='_id')
+    url: str
+    host: Optional[str] = None
+    description: str
+    status: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    results_id: Optional[str] = None
+    template_id: Optional[str] = None
+    error: Optional[str] = None
+
+    class Config:
+        populate_by_name = True
+        # Une tâche complète (config, metadata) ne doit pas passer pour un résumé en réponse
+        extra = "forbid"
+
+    @field_validator('id', 'results_id', 'template_id')
+    @classmethod
+    def convert_objectid_to_str(cls, v):
+        if isinstance(v, ObjectId):
+            return str(v)
+        return v
+
 class ScrapingTaskCreate(BaseModel):
     url: str
     description: str
@@ -0,0 +1,94 @@
+import argparse
+import logging
+import random
+import time
+from typing import Dict, Any, List
+from bs4 import BeautifulSoup
+from app.services.scraping.extraction import CompiledExtractor, clean_text
+
+SELECTORS = {
+    "item_container": "div.therapist-card",
+    "name": "h3.name",
+    "titles": ".titles span",
+    "address": "div.contact > .address",
+    "phone": "a.phone",
+    "specialties": "ul.specialties li",
+    "description": "p.description"
+}
+
+
+def build_page(containers: int, seed: int = 42) -> str:
+    """Génère une page d'annuaire synthétique avec `containers` fiches"""
+    rng = random.Random(seed)
+    cards = []
+    for index in range(containers):
+        specialties = "".join(f"<li> Spécialité {rng.randint(1, 40)} </li>" for _ in range(rng.randint(0, 4)))
+        phone = f'<a class="phone" href="tel:{index}">01 23 45 {index % 100:02d}</a>' if rng.random() > 0.2 else ""
+        cards.append(f"""
+        <div class="therapist-card card-{index}">
+          <h3 class="name">  Praticien   {index} </h3>
+          <div class="titles"><span>Psychologue</span> <span>Thérapeute ,</span></div>
+          <div class="contact"><span class="address">{index} rue de Paris
+            75001 Paris</span>{phone}</div>
+          <ul class="specialties">{specialties}</ul>
+          <p class="description">Consultations sur rendez-vous .  Cabinet {index} !</p>
+          <footer><span class="address">ignoré</span></footer>
+        </div>""")
+    return f"<!DOCTYPE html><html><body><main>{''.join(cards)}</main></body></html>"
+
+
+def legacy_extract(soup: BeautifulSoup, selectors: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Extraction historique : un container.select() par champ et par conteneur"""
+    data = []
+    for container in soup.select(selectors.get('item_container', 'body')):
+        item_data = {}
+        for field, selector in selectors.items():
+            if field != 'item_container':
+                elements = container.select(selector)
+                if elements:
+                    if len(elements) > 1:
+                        item_data[field] = [clean_text(el.get_text()) for el in elements]
+                    else:
+                        item_data[field] = clean_text(elements[0].get_text())
+                else:
+                    item_data[field] = None
+        if any(item_data.values()):
+            data.append(item_data)
+    return data
+
+
+def measure(label: str, func, repeat: int) -> List[Dict[str, Any]]:
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<10} {len(result):>7} éléments  {best:8.3f}s  {len(result) / best:10.0f} éléments/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare l'extraction historique et l'extracteur compilé")
+    parser.add_argument("--containers", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parser", default="html.parser")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    html = build_page(args.containers)
+    started = time.perf_counter()
+    soup = BeautifulSoup(html, args.parser)
+    print(f"Page de {len(html) / 1024:.0f} Ko analysée en {time.perf_counter() - started:.3f}s ({args.parser})")
+
+    legacy = measure("historique", lambda: legacy_extract(soup, SELECTORS), args.repeat)
+    extractor = CompiledExtractor(SELECTORS)
+    compiled = measure("compilé", lambda: extractor.extract(soup), args.repeat)
+
+    if legacy != compiled:
+        raise SystemExit("Les deux extractions divergent")
+    print("Résultats identiques")
+
+
+if __name__ == "__main__":
+    main()
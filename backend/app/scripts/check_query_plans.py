@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.database.indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+NOW = datetime.utcnow()
+TASK_ID = str(ObjectId())
+
+# (service, collection, filtre, tri) : forme des requêtes émises par les services.
+# Les mises à jour et suppressions sont vérifiées via le find équivalent.
+QUERIES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("ScrapingManager.get_task", "scraping_tasks", {"_id": ObjectId()}, None),
+    ("ScrapingManager.list_tasks", "scraping_tasks", {}, [("created_at", -1), ("_id", -1)]),
+    ("ScrapingManager.list_tasks (statut)", "scraping_tasks", {"status": "completed"}, [("created_at", -1), ("_id", -1)]),
+    ("ScrapingManager.list_tasks (hôte)", "scraping_tasks", {"host": "example.com"}, [("created_at", -1), ("_id", -1)]),
+    ("ScrapingManager.list_tasks (dates)", "scraping_tasks", {"created_at": {"$gte": NOW, "$lt": NOW}}, [("created_at", -1), ("_id", -1)]),
+    (
+        "ScrapingManager.list_tasks (curseur)",
+        "scraping_tasks",
+        {"$or": [{"created_at": {"$lt": NOW}}, {"created_at": NOW, "_id": {"$lt": ObjectId()}}]},
+        [("created_at", -1), ("_id", -1)]
+    ),
+    ("ScrapingManager._backfill_task_hosts", "scraping_tasks", {"host": {"$exists": False}}, None),
+    ("ScrapingManager.get_results_summary", "scraping_results", {"_id": ObjectId()}, None),
+    (
+        "ScrapingManager._execute_task (reprise)",
+        "scraping_results",
+        {"task_id": TASK_ID, "status": {"$in": ["running", "failed"]}, "data": {"$exists": False}},
+        [("created_at", -1)]
+    ),
+    ("export_results", "scraping_results", {"task_id": TASK_ID}, [("created_at", -1)]),
+    ("ResultStore.reset", "scraping_results", {"task_id": TASK_ID}, None),
+    ("ResultStore.iter_documents", "scraping_items", {"task_id": TASK_ID, "seq": {"$gt": -1}}, [("seq", 1)]),
+    ("ResultStore.next_seq", "scraping_items", {"task_id": TASK_ID}, [("seq", -1)]),
+    (
+        "JobQueue.lease",
+        "scraping_jobs",
+        {"$or": [
+            {"status": "queued", "available_at": {"$lte": NOW}},
+            {"status": "leased", "lease_expires_at": {"$lte": NOW}}
+        ]},
+        [("available_at", 1)]
+    ),
+    ("JobQueue.heartbeat", "scraping_jobs", {"_id": ObjectId(), "status": "leased", "lease_owner": "w"}, None),
+    ("JobQueue.cancel", "scraping_jobs", {"task_id": TASK_ID, "active": True, "status": "queued"}, None),
+    (
+        "CrawlFrontier.pop",
+        "crawl_frontier",
+        {"task_id": TASK_ID, "status": "queued", "not_before": {"$not": {"$gt": NOW}}},
+        [("priority", -1), ("depth", 1), ("_id", 1)]
+    ),
+    (
+        "CrawlFrontier.next_deferred",
+        "crawl_frontier",
+        {"task_id": TASK_ID, "status": "queued", "not_before": {"$exists": True}},
+        [("not_before", 1)]
+    ),
+    ("CrawlFrontier.add", "crawl_frontier", {"task_id": TASK_ID, "url_key": {"$in": [1, 2, 3]}}, None),
+    ("CrawlFrontier._rebuild_seen", "crawl_frontier", {"task_id": TASK_ID}, None),
+    ("CrawlFrontier.open (reprise)", "crawl_frontier", {"task_id": TASK_ID, "status": "in_progress"}, None),
+    ("CrawlFrontier.is_resumable", "crawl_state", {"_id": TASK_ID}, None),
+    ("ScrapingConfigCache.get", "llm_config_cache", {"_id": "key", "expires_at": {"$gt": NOW}}, None),
+    ("ScrapingConfigCache.invalidate", "llm_config_cache", {"host": "example.com"}, None),
+    ("ScrapingConfigCache._sync_generation", "llm_config_cache_meta", {"_id": "generation"}, None),
+    ("MongoBucketStore.acquire", "rate_limit_buckets", {"_id": "example.com"}, None),
+    ("ProxyManager.refresh", "proxy_pool", {"status": "active"}, None),
+    ("ProxyManager.flush", "proxy_pool", {"_id": ObjectId()}, None),
+]
+
+# Lectures complètes assumées, non vérifiées
+FULL_SCANS = [
+    "TemplateIndex.load / version des templates (scraping_templates lus en entier, au changement)",
+    "TemplateManager.get_templates (pagination par décalage)",
+    "ScrapingConfigCache.invalidate sans hôte (vidage complet)",
+    "app/scripts/* (maintenance)",
+]
+
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Étapes du plan retenu, quel que soit le moteur d'exécution (classique ou SBE)"""
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+async def check_query_plans(url: str, keep: bool = False) -> int:
+    """Applique le registre d'index sur une base jetable et vérifie le plan de chaque requête
+
+    Retourne le nombre de requêtes dont le plan contient un COLLSCAN.
+    """
+    client = AsyncIOMotorClient(url)
+    db = client[f"{settings.DATABASE_NAME}_plan_check"]
+    failures = 0
+    try:
+        report = await ensure_indexes(db)
+        logger.info(f"Index appliqués: {report['checked']}, en conflit: {report['conflicts']}")
+        for service, collection, query, sort in QUERIES:
+            cursor = db[collection].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            explain = await cursor.explain()
+            stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+            if "COLLSCAN" in stages:
+                failures += 1
+                logger.error(f"COLLSCAN  {service} sur {collection}: {query} ({' <- '.join(stages)})")
+            else:
+                logger.info(f"ok        {service}: {' <- '.join(stages)}")
+        for scan in FULL_SCANS:
+            logger.info(f"ignoré    {scan}")
+        if failures:
+            logger.error(f"{failures} requêtes sans index sur {len(QUERIES)}")
+        else:
+            logger.info(f"Toutes les requêtes ({len(QUERIES)}) utilisent un index")
+        return failures
+    except Exception as e:
+        logger.error(f"Erreur lors de la vérification des plans: {str(e)}")
+        raise
+    finally:
+        if not keep:
+            await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérifie que chaque requête des services est servie par un index (explain)")
+    parser.add_argument("--url", default=settings.MONGODB_URL, help="mongod local de test (une base jetable y est créée)")
+    parser.add_argument("--keep", action="store_true", help="Conserve la base de test")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(1 if asyncio.run(check_query_plans(args.url, args.keep)) else 0)
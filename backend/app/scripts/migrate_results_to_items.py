@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import logging
+from bson import ObjectId
+from app.core.config import settings
+from app.database.mongodb import MongoDB
+from app.services.scraping.result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_results(dry_run: bool = False, drop_superseded: bool = False):
+    """Convertit les résultats historiques (tableau data) en un document par élément
+
+    Pour chaque tâche, le résultat courant (results_id de la tâche, à défaut le
+    plus récent) est découpé dans scraping_items puis son tableau data est
+    retiré. Chaque résultat est traité en entier ou pas du tout : le tableau
+    n'est retiré qu'une fois tous les éléments écrits, et un résultat
+    interrompu est recopié au passage suivant. Les anciennes exécutions d'une
+    même tâche ne sont plus lisibles par l'API ; --drop-superseded les supprime.
+    """
+    db = MongoDB.get_db()
+    store = ResultStore(db)
+    await store.ensure_indexes()
+
+    try:
+        # Liste les résultats à migrer sans charger leurs tableaux
+        by_task = {}
+        async for result in db.scraping_results.find(
+            {"data": {"$exists": True}},
+            {"task_id": 1, "created_at": 1}
+        ).sort("created_at", 1):
+            by_task.setdefault(result["task_id"], []).append(result["_id"])
+        logger.info(f"{sum(len(ids) for ids in by_task.values())} résultats à migrer pour {len(by_task)} tâches")
+
+        migrated = items = superseded = 0
+        for task_id, result_ids in by_task.items():
+            current = result_ids[-1]
+            try:
+                task = await db.scraping_tasks.find_one({"_id": ObjectId(task_id)}, {"results_id": 1})
+            except Exception:
+                task = None
+            if task and task.get("results_id"):
+                # Résultat courant déjà migré : il ne reste que des exécutions antérieures
+                current = ObjectId(task["results_id"]) if ObjectId(task["results_id"]) in result_ids else None
+            stale = [result_id for result_id in result_ids if result_id != current]
+            superseded += len(stale)
+            if current is None:
+                if drop_superseded and not dry_run:
+                    await db.scraping_results.delete_many({"_id": {"$in": stale}})
+                continue
+
+            result = await db.scraping_results.find_one({"_id": current}, {"data": 1})
+            data = result.get("data") or []
+            if dry_run:
+                logger.info(f"Tâche {task_id}: {len(data)} éléments à migrer, {len(stale)} exécutions antérieures")
+                continue
+
+            # Repart de zéro si un passage précédent a été interrompu
+            await store.items.delete_many({"task_id": task_id})
+            for start in range(0, len(data), settings.RESULTS_BATCH_SIZE):
+                batch = data[start:start + settings.RESULTS_BATCH_SIZE]
+                await store.items.insert_many([
+                    {"task_id": task_id, "seq": start + offset, "data": item}
+                    for offset, item in enumerate(batch)
+                ])
+            await db.scraping_results.update_one(
+                {"_id": current},
+                {
+                    "$unset": {"data": ""},
+                    "$set": {
+                        "storage": "items",
+                        "metadata.total_items": len(data),
+                        "metadata.fields": list(dict.fromkeys(key for item in data for key in item))
+                    }
+                }
+            )
+            if drop_superseded and stale:
+                await db.scraping_results.delete_many({"_id": {"$in": stale}})
+            migrated += 1
+            items += len(data)
+            logger.info(f"Tâche {task_id}: {len(data)} éléments migrés")
+
+        if superseded and not drop_superseded:
+            logger.info(f"{superseded} exécutions antérieures conservées telles quelles (--drop-superseded pour les supprimer)")
+        logger.info(f"Migration terminée: {migrated} résultats, {items} éléments")
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la migration des résultats: {str(e)}")
+        raise
+    finally:
+        MongoDB.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migre les résultats vers un document par élément (scraping_items)")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche ce qui serait migré sans rien écrire")
+    parser.add_argument("--drop-superseded", action="store_true", help="Supprime les exécutions antérieures d'une même tâche")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate_results(dry_run=args.dry_run, drop_superseded=args.drop_superseded))
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, AsyncIterator, List, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ArtifactEntry:
+    task_id: str
+    results_id: str
+    format: str
+    path: str
+    size: int
+    digest: str
+    content_type: str
+    extension: str
+    created_at: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest[:32]}"'
+
+
+class ExportArtifactCache:
+    """Fichiers d'export déjà produits, sur disque, par (results_id, format)
+
+    Un résultat terminé ne change plus : le fichier produit pour un format
+    est conservé et resservi tel quel. Les fichiers d'une tâche sont rangés
+    sous {directory}/{task_id}/ (données + entrée JSON), ce qui permet de
+    tout invalider d'un coup quand la tâche est supprimée ou relancée.
+    Le disque fait foi : l'API et les workers d'un même hôte partagent le
+    répertoire. L'éviction est de type LRU (date de l'entrée, mise à jour à
+    chaque lecture), bornée par la taille totale des fichiers.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _check_component(value: str) -> str:
+        # Les identifiants deviennent des noms de fichiers
+        if not value or os.sep in value or value.startswith("."):
+            raise ValueError(f"Identifiant invalide pour le cache d'exports: {value}")
+        return value
+
+    def _task_dir(self, task_id: str) -> str:
+        return os.path.join(self.directory, self._check_component(task_id))
+
+    def _base_path(self, task_id: str, results_id: str, format: str) -> str:
+        name = f"{self._check_component(str(results_id))}.{self._check_component(format)}"
+        return os.path.join(self._task_dir(task_id), name)
+
+    async def lookup(self, task_id: str, results_id: str, format: str) -> Optional[ArtifactEntry]:
+        """Entrée du fichier d'export s'il est en cache (marque l'accès pour le LRU)"""
+        base = self._base_path(task_id, results_id, format)
+        return await asyncio.to_thread(self._read_entry, base)
+
+    def _read_entry(self, base: str) -> Optional[ArtifactEntry]:
+        entry_path = f"{base}.json"
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = ArtifactEntry(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Entrée du cache d'exports illisible ignorée {entry_path}: {str(e)}")
+            self._remove_files(base)
+            return None
+        try:
+            size = os.path.getsize(entry.path)
+        except OSError:
+            size = None
+        if size != entry.size:
+            # Fichier évincé ou remplacé par un autre processus entre-temps
+            self._remove_files(base)
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    async def tee(
+        self,
+        task_id: str,
+        results_id: str,
+        format: str,
+        content_type: str,
+        extension: str,
+        chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Transmet les blocs d'un export tout en les écrivant dans le cache
+
+        Le fichier n'est enregistré que si l'export va jusqu'au bout : un
+        client qui abandonne le téléchargement ne laisse pas de fichier tronqué.
+        """
+        base = self._base_path(task_id, results_id, format)
+        tmp_path = f"{base}.{uuid.uuid4().hex}.tmp"
+        await asyncio.to_thread(os.makedirs, os.path.dirname(base), exist_ok=True)
+        output = await asyncio.to_thread(open, tmp_path, "wb")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(output.write, chunk)
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
+            await asyncio.to_thread(output.close)
+        except BaseException:
+            output.close()
+            self._remove_file(tmp_path)
+            raise
+
+        entry = ArtifactEntry(
+            task_id=task_id,
+            results_id=str(results_id),
+            format=format,
+            path=f"{base}.data",
+            size=size,
+            digest=digest.hexdigest(),
+            content_type=content_type,
+            extension=extension,
+            created_at=time.time()
+        )
+        try:
+            await asyncio.to_thread(self._commit, entry, tmp_path, base)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire dans le cache d'exports: {str(e)}")
+            self._remove_file(tmp_path)
+            return
+        await self.evict()
+
+    async def build(
+        self,
+        task_id: str,
+        results_id: str,
+        format: str,
+        content_type: str,
+        extension: str,
+        chunks: AsyncIterator[bytes]
+    ) -> Optional[ArtifactEntry]:
+        """Produit entièrement le fichier dans le cache et retourne son entrée"""
+        async for _ in self.tee(task_id, results_id, format, content_type, extension, chunks):
+            pass
+        return await self.lookup(task_id, results_id, format)
+
+    def _commit(self, entry: ArtifactEntry, tmp_path: str, base: str):
+        os.replace(tmp_path, entry.path)
+        entry_path = f"{base}.json"
+        tmp_entry = f"{entry_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_entry, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp_entry, entry_path)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remove_files(self, base: str):
+        self._remove_file(f"{base}.json")
+        self._remove_file(f"{base}.data")
+
+    async def invalidate(self, task_id: str):
+        """Supprime tous les fichiers d'export d'une tâche (suppression ou nouvelle exécution)"""
+        await asyncio.to_thread(shutil.rmtree, self._task_dir(task_id), True)
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(dernier accès, taille, chemin de base) des fichiers en cache"""
+        artifacts = []
+        try:
+            task_dirs = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return artifacts
+        for task_dir in task_dirs:
+            if not task_dir.is_dir():
+                continue
+            for entry in os.scandir(task_dir.path):
+                if not entry.name.endswith(".data"):
+                    continue
+                base = entry.path[:-len(".data")]
+                try:
+                    accessed = os.path.getmtime(f"{base}.json")
+                except OSError:
+                    # Données sans entrée : écriture interrompue entre les deux renommages
+                    accessed = 0.0
+                artifacts.append((accessed, entry.stat().st_size, base))
+        return artifacts
+
+    def _evict_sync(self) -> int:
+        artifacts = self._scan()
+        total = sum(size for _, size, _ in artifacts)
+        removed = 0
+        for _, size, base in sorted(artifacts):
+            if total <= self.max_bytes:
+                break
+            self._remove_files(base)
+            total -= size
+            removed += 1
+        return removed
+
+    async def evict(self):
+        removed = await asyncio.to_thread(self._evict_sync)
+        if removed:
+            logger.info(f"Cache d'exports: {removed} fichiers évincés")
+
+    async def get_stats(self) -> Dict[str, Any]:
+        artifacts = await asyncio.to_thread(self._scan)
+        return {
+            "artifacts": len(artifacts),
+            "total_bytes": sum(size for _, size, _ in artifacts),
+            "max_bytes": self.max_bytes
+        }
+
+
+def create_artifact_cache() -> Optional[ExportArtifactCache]:
+    if not settings.EXPORT_CACHE_ENABLED:
+        return None
+    return ExportArtifactCache(settings.EXPORT_CACHE_DIR, settings.EXPORT_CACHE_MAX_BYTES)
@@ -1,18 +1,111 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, BinaryIO, Protocol
+from typing import List, Dict, Any, AsyncIterator, Union
+import json
+from app.core.config import settings
+
+# Séparateur des valeurs d'une liste aplatie dans une cellule
+LIST_SEPARATOR = "; "
+
+
+def flatten_value(value: Any) -> Union[str, int, float, bool]:
+    """Valeur de cellule (CSV, Excel) : scalaire inchangé, listes aplaties, objets en JSON
+
+    Les listes imbriquées sont aplaties récursivement et leurs éléments vides
+    omis : ["a", ["b", None]] donne "a; b".
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        parts = (flatten_value(element) for element in value)
+        return LIST_SEPARATOR.join(str(part) for part in parts if part != "")
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
 
 class ExportStrategy(ABC):
+    # Le format a besoin de la liste des colonnes avant la première ligne (CSV, Excel)
+    needs_fields: bool = False
+    # Le format a besoin d'une première lecture complète des éléments (types des colonnes)
+    needs_scan: bool = False
+
+    def check_available(self):
+        """Lève ValueError si une dépendance optionnelle du format est absente"""
+
+    async def scan(self, items: AsyncIterator[Dict[str, Any]]):
+        """Première lecture des éléments, si needs_scan"""
+
     @abstractmethod
-    async def export_data(self, data: List[Dict[str, Any]]) -> BinaryIO:
-        """Exporte les données dans le format spécifique"""
+    def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        """Produit le fichier par blocs d'octets, au fil des éléments lus
+
+        fields est l'union ordonnée des clés des éléments (vide si le format
+        n'en a pas besoin).
+        """
         pass
-    
+
     @abstractmethod
     def get_content_type(self) -> str:
         """Retourne le type MIME du format d'export"""
         pass
-    
+
     @abstractmethod
     def get_file_extension(self) -> str:
         """Retourne l'extension de fichier pour ce format"""
-        pass 
\ No newline at end of file
+        pass
+
+
+class ChunkBuffer:
+    """Regroupe de petites écritures en blocs d'environ STREAM_CHUNK_SIZE octets"""
+
+    def __init__(self, chunk_size: int = 0):
+        self.chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> bool:
+        """Ajoute data, retourne True quand un bloc est prêt"""
+        self.parts.append(data)
+        self.size += len(data)
+        return self.size >= self.chunk_size
+
+    def take(self) -> bytes:
+        chunk = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return chunk
+
+
+class ChunkSink:
+    """Fichier en écriture seule, sans retour en arrière, dont le contenu écrit est repris par blocs
+
+    Cible des bibliothèques qui écrivent dans un fichier (pyarrow, zipfile) :
+    ce qui a été écrit est transmis puis oublié.
+    """
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        chunk = b"".join(self.parts)
+        self.parts = []
+        return chunk
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, List, Optional, AsyncIterator, BinaryIO, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from .base import ChunkSink
+from .result_exporter import ResultExporter
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TYPES = {
+    "zip": "application/zip",
+    "tar": "application/x-tar"
+}
+LAYOUTS = ("per_task", "merged")
+# Formats déjà compressés : stockés tels quels dans une archive zip
+COMPRESSED_FORMATS = {"excel", "parquet", "ndjson.gz", "ndjson.zst"}
+
+
+class _Member:
+    """Fichier prêt à être ajouté à l'archive (taille connue, lu par blocs)"""
+
+    def __init__(self, name: str, file: BinaryIO, size: int, temporary: Optional[str] = None):
+        self.name = name
+        self.file = file
+        self.size = size
+        self.temporary = temporary
+
+    def close(self):
+        self.file.close()
+        if self.temporary:
+            try:
+                os.unlink(self.temporary)
+            except OSError:
+                pass
+
+
+class _TarWriter:
+    """Archive tar écrite au fil de l'eau : en-tête, contenu, bourrage par membre"""
+
+    def __init__(self):
+        self.written = 0
+
+    def _count(self, data: bytes) -> bytes:
+        self.written += len(data)
+        return data
+
+    async def add(self, name: str, size: int, chunks: AsyncIterator[bytes], compress: bool = True) -> AsyncIterator[bytes]:
+        # compress : sans objet, une archive tar n'est pas compressée membre par membre
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        yield self._count(info.tobuf(format=tarfile.PAX_FORMAT))
+        async for chunk in chunks:
+            yield self._count(chunk)
+        padding = -size % tarfile.BLOCKSIZE
+        if padding:
+            yield self._count(tarfile.NUL * padding)
+
+    async def close(self) -> AsyncIterator[bytes]:
+        # Deux blocs vides, puis complément jusqu'à un enregistrement entier
+        end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+        end += tarfile.NUL * (-(self.written + len(end)) % tarfile.RECORDSIZE)
+        yield self._count(end)
+
+
+class _ZipWriter:
+    """Archive zip écrite au fil de l'eau (descripteurs de données, zip64)"""
+
+    def __init__(self):
+        self.sink = ChunkSink()
+        # Cible sans retour en arrière : zipfile écrit tailles et CRC après chaque membre
+        self.archive = zipfile.ZipFile(self.sink, "w", allowZip64=True)
+
+    async def add(self, name: str, size: int, chunks: AsyncIterator[bytes], compress: bool = True) -> AsyncIterator[bytes]:
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        member = self.archive.open(info, "w", force_zip64=True)
+        async for chunk in chunks:
+            # Compression hors de la boucle d'événements
+            await asyncio.to_thread(member.write, chunk)
+            data = self.sink.take()
+            if data:
+                yield data
+        await asyncio.to_thread(member.close)
+        yield self.sink.take()
+
+    async def close(self) -> AsyncIterator[bytes]:
+        self.archive.close()
+        yield self.sink.take()
+
+
+async def _read_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await asyncio.to_thread(file.read, settings.STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+class BulkExporter:
+    """Export de plusieurs tâches dans une seule archive zip ou tar, transmise au fil de l'eau
+
+    per_task : un fichier par tâche, produits en parallèle
+    (BULK_EXPORT_CONCURRENCY) sur disque ; les résultats terminés passent
+    par le cache d'exports. merged : un seul fichier, tous les éléments
+    précédés d'une colonne task_id. L'archive se termine par manifest.json
+    (tâches exportées, erreurs). La mémoire utilisée ne dépend ni du nombre
+    de tâches ni du volume des résultats.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, exporter: Optional[ResultExporter] = None):
+        self.db = db
+        # Exporteur partagé avec l'API : même cache d'exports et mêmes exporteurs de format
+        self.exporter = exporter or ResultExporter(db)
+
+    async def find_task_ids(self, filters: Dict[str, Any], limit: int) -> List[str]:
+        """Identifiants des tâches filtrées, des plus anciennes aux plus récentes"""
+        tasks = await self.db.scraping_tasks.find(
+            filters,
+            {"_id": 1},
+            sort=[("created_at", 1), ("_id", 1)],
+            limit=limit
+        ).to_list(None)
+        return [str(task["_id"]) for task in tasks]
+
+    async def export(
+        self,
+        task_ids: List[str],
+        format: str,
+        archive: str = "zip",
+        layout: str = "per_task"
+    ) -> Tuple[AsyncIterator[bytes], str, str]:
+        """Retourne: (flux d'octets de l'archive, type MIME, extension)
+
+        Le format, l'archive et la disposition sont vérifiés avant le premier
+        octet (ValueError) : une erreur en cours de transfert ne peut plus
+        être signalée par le code de réponse.
+        """
+        if archive not in ARCHIVE_TYPES:
+            raise ValueError(f"Archive non supportée: {archive}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Disposition non supportée: {layout}")
+        self.exporter.export_manager.get_exporter(format)
+        return self._archive(task_ids, format, archive, layout), ARCHIVE_TYPES[archive], archive
+
+    async def _archive(self, task_ids: List[str], format: str, archive: str, layout: str) -> AsyncIterator[bytes]:
+        writer = _ZipWriter() if archive == "zip" else _TarWriter()
+        compress = format not in COMPRESSED_FORMATS
+        manifest: Dict[str, Any] = {"format": format, "layout": layout, "files": [], "errors": []}
+
+        members = self._per_task_members(task_ids, format, manifest) if layout == "per_task" \
+            else self._merged_member(task_ids, format, manifest)
+        async for member in members:
+            try:
+                async for data in writer.add(member.name, member.size, _read_chunks(member.file), compress):
+                    yield data
+            finally:
+                member.close()
+
+        body = json.dumps(manifest, ensure_ascii=False, indent=2, default=str).encode("utf-8")
+
+        async def manifest_chunks():
+            yield body
+
+        async for data in writer.add("manifest.json", len(body), manifest_chunks()):
+            yield data
+        async for data in writer.close():
+            yield data
+        logger.info(
+            f"Export groupé {format}/{archive}: {len(manifest['files'])} fichiers, "
+            f"{len(manifest['errors'])} erreurs"
+        )
+
+    async def _spool(self, name: str, output: AsyncIterator[bytes]) -> _Member:
+        """Écrit un export dans un fichier temporaire (la taille d'un membre tar doit être connue)"""
+        descriptor, path = tempfile.mkstemp(suffix=".export")
+        file = os.fdopen(descriptor, "w+b")
+        try:
+            size = 0
+            async for chunk in output:
+                await asyncio.to_thread(file.write, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(file.flush)
+            file.seek(0)
+            return _Member(name, file, size, path)
+        except BaseException:
+            file.close()
+            os.unlink(path)
+            raise
+
+    async def _produce(self, task_id: str, format: str) -> Optional[_Member]:
+        """Fichier d'export d'une tâche ; None si elle n'a pas de résultats"""
+        summary = await self.exporter.find_summary(task_id)
+        if not summary:
+            return None
+        if self.exporter.cacheable(summary):
+            entry = await self.exporter.build(task_id, summary, format)
+            if entry is not None:
+                try:
+                    # Ouvert tout de suite : une éviction ultérieure n'interrompt pas la lecture
+                    return _Member(f"{task_id}.{entry.extension}", open(entry.path, "rb"), entry.size)
+                except OSError:
+                    pass
+        output, _, extension = await self.exporter.stream(task_id, summary, format)
+        return await self._spool(f"{task_id}.{extension}", output)
+
+    async def _per_task_members(
+        self,
+        task_ids: List[str],
+        format: str,
+        manifest: Dict[str, Any]
+    ) -> AsyncIterator[_Member]:
+        """Membres dans l'ordre des tâches, au plus BULK_EXPORT_CONCURRENCY produits d'avance"""
+        remaining = iter(task_ids)
+        pending = deque(
+            (task_id, asyncio.create_task(self._produce(task_id, format)))
+            for task_id in islice(remaining, max(1, settings.BULK_EXPORT_CONCURRENCY))
+        )
+        try:
+            while pending:
+                task_id, production = pending.popleft()
+                following = next(remaining, None)
+                if following is not None:
+                    pending.append((following, asyncio.create_task(self._produce(following, format))))
+                try:
+                    member = await production
+                except Exception as e:
+                    # Une tâche en erreur n'interrompt pas l'archive, elle est signalée dans le manifeste
+                    logger.error(f"Erreur lors de l'export de la tâche {task_id}: {str(e)}")
+                    manifest["errors"].append({"task_id": task_id, "error": str(e)})
+                    continue
+                if member is None:
+                    manifest["errors"].append({"task_id": task_id, "error": "Résultats non trouvés"})
+                    continue
+                manifest["files"].append({"task_id": task_id, "name": member.name, "size": member.size})
+                yield member
+        finally:
+            # Archive interrompue (client déconnecté) : les fichiers produits d'avance sont libérés
+            for _, production in pending:
+                production.cancel()
+            for _, production in pending:
+                try:
+                    member = await production
+                except BaseException:
+                    continue
+                if member is not None:
+                    member.close()
+
+    async def _merged_member(
+        self,
+        task_ids: List[str],
+        format: str,
+        manifest: Dict[str, Any]
+    ) -> AsyncIterator[_Member]:
+        """Un seul membre : les éléments de toutes les tâches, précédés de task_id"""
+        fields: Optional[List[str]] = ["task_id"]
+        for task_id in task_ids:
+            summary = await self.db.scraping_results.find_one(
+                {"task_id": task_id},
+                {"metadata.fields": 1},
+                sort=[("created_at", -1)]
+            )
+            if not summary:
+                continue
+            known = summary.get("metadata", {}).get("fields")
+            if known is None:
+                # Résultat sans schéma enregistré : l'exporteur fera sa première lecture
+                fields = None
+                break
+            fields.extend(field for field in known if field not in fields)
+
+        async def items():
+            for task_id in task_ids:
+                summary = await self.exporter.find_summary(task_id)
+                if not summary:
+                    continue
+                async for item in self.exporter.store.iter_items(task_id, summary):
+                    row = {"task_id": task_id}
+                    row.update(item)
+                    # La colonne ajoutée prime sur un champ extrait du même nom
+                    row["task_id"] = task_id
+                    yield row
+
+        output, _, extension = await self.exporter.export_manager.export_stream(items, format, fields=fields)
+        member = await self._spool(f"export.{extension}", output)
+        manifest["files"].append({"task_ids": task_ids, "name": member.name, "size": member.size})
+        yield member
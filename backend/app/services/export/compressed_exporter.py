@@ -0,0 +1,45 @@
+import zlib
+from typing import List, Dict, Any, AsyncIterator
+from .ndjson_exporter import NDJSONExporter
+
+class GzipNDJSONExporter(NDJSONExporter):
+    """NDJSON compressé en gzip, au fil des blocs"""
+
+    def _compressor(self):
+        # wbits=31 : en-tête et somme de contrôle gzip
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        compressor = self._compressor()
+        async for chunk in super().export(items, fields):
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def get_content_type(self) -> str:
+        return "application/gzip"
+
+    def get_file_extension(self) -> str:
+        return "ndjson.gz"
+
+
+class ZstdNDJSONExporter(GzipNDJSONExporter):
+    """NDJSON compressé en zstd (paquet zstandard)"""
+
+    def check_available(self):
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("Format ndjson.zst indisponible : le paquet zstandard n'est pas installé")
+
+    def _compressor(self):
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compressobj()
+
+    def get_content_type(self) -> str:
+        return "application/zstd"
+
+    def get_file_extension(self) -> str:
+        return "ndjson.zst"
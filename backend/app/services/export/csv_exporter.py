@@ -1,27 +1,32 @@
 import csv
-from io import StringIO, BytesIO
-from typing import List, Dict, Any, BinaryIO
-from .base import ExportStrategy
+from io import StringIO
+from typing import List, Dict, Any, AsyncIterator
+from app.core.config import settings
+from .base import ExportStrategy, flatten_value
 
 class CSVExporter(ExportStrategy):
-    async def export_data(self, data: List[Dict[str, Any]]) -> BinaryIO:
-        if not data:
-            return BytesIO()
-            
+    needs_fields = True
+
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        if not fields:
+            return
+        # Colonnes : union des clés de tous les éléments, valeur vide si absente
         output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        
+        writer = csv.DictWriter(output, fieldnames=fields, restval="", extrasaction="ignore")
+
         writer.writeheader()
-        writer.writerows(data)
-        
-        # Convertit en BytesIO pour le retour
-        binary_output = BytesIO(output.getvalue().encode('utf-8'))
-        output.close()
-        
-        return binary_output
-    
+        async for item in items:
+            writer.writerow({key: flatten_value(value) for key, value in item.items()})
+            if output.tell() >= settings.STREAM_CHUNK_SIZE:
+                yield output.getvalue().encode('utf-8')
+                output.seek(0)
+                output.truncate()
+
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+
     def get_content_type(self) -> str:
         return "text/csv"
-    
+
     def get_file_extension(self) -> str:
-        return "csv" 
\ No newline at end of file
+        return "csv"
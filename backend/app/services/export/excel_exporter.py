@@ -1,30 +1,90 @@
-from typing import List, Dict, Any, BinaryIO
-from io import BytesIO
-import pandas as pd
-from .base import ExportStrategy
+import asyncio
+import os
+import tempfile
+from typing import List, Dict, Any, AsyncIterator
+import xlsxwriter
+from app.core.config import settings
+from .base import ExportStrategy, flatten_value
+
+# Limites d'une feuille Excel
+MAX_ROWS = 1048576
+MAX_CELL_LENGTH = 32767
+# Largeur de colonne plafonnée, en caractères
+MAX_COLUMN_WIDTH = 60
 
 class ExcelExporter(ExportStrategy):
-    async def export_data(self, data: List[Dict[str, Any]]) -> BinaryIO:
-        df = pd.DataFrame(data)
-        output = BytesIO()
-        
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Données')
-            
-            # Ajuste automatiquement la largeur des colonnes
-            worksheet = writer.sheets['Données']
-            for idx, col in enumerate(df.columns):
-                max_length = max(
-                    df[col].astype(str).apply(len).max(),
-                    len(str(col))
-                )
-                worksheet.set_column(idx, idx, max_length + 2)
-        
-        output.seek(0)
-        return output
-    
+    """Classeur xlsx écrit ligne par ligne (mode constant_memory de xlsxwriter)
+
+    Chaque ligne est vidée sur disque dès que la suivante commence : la
+    mémoire ne dépend pas du nombre de lignes. Le classeur est assemblé dans
+    un fichier temporaire puis transmis par blocs. La largeur des colonnes
+    est le maximum courant des valeurs écrites. Au-delà de la limite de
+    lignes d'Excel, les éléments continuent sur une nouvelle feuille.
+    """
+    needs_fields = True
+
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        descriptor, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(descriptor)
+        try:
+            workbook = xlsxwriter.Workbook(path, {
+                "constant_memory": True,
+                # Contenu scrapé : jamais interprété comme formule ou lien
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+                "nan_inf_to_errors": True
+            })
+            header = workbook.add_format({"bold": True})
+            sheets = 0
+            worksheet = None
+            widths: List[float] = []
+            row = MAX_ROWS
+
+            def finish_sheet():
+                for column, width in enumerate(widths):
+                    worksheet.set_column(column, column, min(width, MAX_COLUMN_WIDTH) + 2)
+
+            async for item in items:
+                if row >= MAX_ROWS:
+                    if worksheet is not None:
+                        finish_sheet()
+                    sheets += 1
+                    worksheet = workbook.add_worksheet("Données" if sheets == 1 else f"Données {sheets}")
+                    worksheet.write_row(0, 0, fields, header)
+                    widths = [len(str(field)) for field in fields]
+                    row = 1
+                values = []
+                for column, field in enumerate(fields):
+                    value = flatten_value(item.get(field))
+                    if isinstance(value, str):
+                        value = value[:MAX_CELL_LENGTH]
+                        widths[column] = max(widths[column], len(value))
+                    else:
+                        widths[column] = max(widths[column], len(str(value)))
+                    values.append(value)
+                worksheet.write_row(row, 0, values)
+                row += 1
+
+            if worksheet is None:
+                worksheet = workbook.add_worksheet("Données")
+                if fields:
+                    worksheet.write_row(0, 0, fields, header)
+                widths = [len(str(field)) for field in fields]
+            finish_sheet()
+            # Compression du classeur : hors de la boucle d'événements
+            await asyncio.to_thread(workbook.close)
+
+            with open(path, "rb") as output:
+                while True:
+                    chunk = await asyncio.to_thread(output.read, settings.STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.unlink(path)
+
     def get_content_type(self) -> str:
         return "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    
+
     def get_file_extension(self) -> str:
-        return "xlsx" 
\ No newline at end of file
+        return "xlsx"
@@ -1,17 +1,21 @@
-from typing import List, Dict, Any, BinaryIO
-from io import BytesIO
+from typing import List, Dict, Any, AsyncIterator
 import json
-from .base import ExportStrategy
+from .base import ExportStrategy, ChunkBuffer
 
 class JSONExporter(ExportStrategy):
-    async def export_data(self, data: List[Dict[str, Any]]) -> BinaryIO:
-        output = BytesIO()
-        json.dump(data, output, ensure_ascii=False, indent=2)
-        output.seek(0)
-        return output
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        # Tableau écrit élément par élément : jamais plus d'un bloc en mémoire
+        buffer = ChunkBuffer()
+        separator = b"[\n  "
+        async for item in items:
+            if buffer.write(separator + json.dumps(item, ensure_ascii=False, default=str).encode('utf-8')):
+                yield buffer.take()
+            separator = b",\n  "
+        buffer.write(b"[]\n" if separator == b"[\n  " else b"\n]\n")
+        yield buffer.take()
     
     def get_content_type(self) -> str:
         return "application/json"
     
     def get_file_extension(self) -> str:
-        return "json" 
\ No newline at end of file
+        return "json"
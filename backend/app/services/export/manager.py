@@ -1,34 +1,65 @@
-from typing import Dict, Type, BinaryIO, List, Any
+from typing import Dict, Type, List, Any, AsyncIterator, Callable, Optional, Tuple
 from .base import ExportStrategy
 from .csv_exporter import CSVExporter
 from .excel_exporter import ExcelExporter
 from .json_exporter import JSONExporter
+from .ndjson_exporter import NDJSONExporter
+from .compressed_exporter import GzipNDJSONExporter, ZstdNDJSONExporter
+from .parquet_exporter import ParquetExporter
+
+# Ouvre une nouvelle lecture des éléments (le schéma peut demander une première passe)
+ItemSource = Callable[[], AsyncIterator[Dict[str, Any]]]
 
 class ExportManager:
     def __init__(self):
         self.exporters: Dict[str, Type[ExportStrategy]] = {
             "csv": CSVExporter,
             "excel": ExcelExporter,
-            "json": JSONExporter
+            "json": JSONExporter,
+            "ndjson": NDJSONExporter,
+            "ndjson.gz": GzipNDJSONExporter,
+            "ndjson.zst": ZstdNDJSONExporter,
+            "parquet": ParquetExporter
         }
-    
-    async def export_data(
-        self,
-        data: List[Dict[str, Any]],
-        format: str
-    ) -> tuple[BinaryIO, str, str]:
-        """
-        Exporte les données dans le format demandé
-        Retourne: (données binaires, type MIME, extension de fichier)
-        """
+
+    def get_exporter(self, format: str) -> ExportStrategy:
         if format not in self.exporters:
             raise ValueError(f"Format d'export non supporté: {format}")
-            
         exporter = self.exporters[format]()
-        output = await exporter.export_data(data)
-        
+        exporter.check_available()
+        return exporter
+
+    @staticmethod
+    async def infer_fields(items: AsyncIterator[Dict[str, Any]]) -> List[str]:
+        """Union des clés des éléments, dans l'ordre de première apparition"""
+        fields: Dict[str, None] = {}
+        async for item in items:
+            for key in item:
+                if key not in fields:
+                    fields[key] = None
+        return list(fields)
+
+    async def export_stream(
+        self,
+        source: ItemSource,
+        format: str,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[AsyncIterator[bytes], str, str]:
+        """
+        Exporte les éléments dans le format demandé, par blocs d'octets
+        Retourne: (flux d'octets, type MIME, extension de fichier)
+
+        fields : schéma connu (métadonnées des résultats) ; à défaut, et si le
+        format en a besoin, une première lecture le calcule. Les formats typés
+        (parquet) font toujours leur propre première lecture.
+        """
+        exporter = self.get_exporter(format)
+        if exporter.needs_fields and not fields:
+            fields = await self.infer_fields(source())
+        if exporter.needs_scan:
+            await exporter.scan(source())
         return (
-            output,
+            exporter.export(source(), fields or []),
             exporter.get_content_type(),
             exporter.get_file_extension()
-        ) 
\ No newline at end of file
+        )
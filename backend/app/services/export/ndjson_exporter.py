@@ -0,0 +1,20 @@
+from typing import List, Dict, Any, AsyncIterator
+import json
+from .base import ExportStrategy, ChunkBuffer
+
+class NDJSONExporter(ExportStrategy):
+    """Un objet JSON par ligne (JSON Lines)"""
+
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        buffer = ChunkBuffer()
+        async for item in items:
+            if buffer.write(json.dumps(item, ensure_ascii=False, default=str).encode('utf-8') + b"\n"):
+                yield buffer.take()
+        if buffer.size:
+            yield buffer.take()
+    
+    def get_content_type(self) -> str:
+        return "application/x-ndjson"
+    
+    def get_file_extension(self) -> str:
+        return "ndjson"
@@ -0,0 +1,142 @@
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional
+from app.core.config import settings
+from .base import ExportStrategy, ChunkSink, flatten_value
+
+
+def _kind(value: Any) -> str:
+    # bool avant int : bool est une sous-classe d'int
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+
+def _resolve(kinds: set) -> str:
+    """Type commun d'un ensemble de types observés ; texte en cas de mélange"""
+    if kinds == {"bool"}:
+        return "bool"
+    if kinds == {"int"}:
+        return "int"
+    if kinds and kinds <= {"int", "float"}:
+        return "float"
+    return "str"
+
+
+def _convert(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == "str":
+        value = flatten_value(value)
+        return value if isinstance(value, str) else str(value)
+    if kind == "float":
+        return float(value)
+    return value
+
+
+class _Column:
+    """Types observés pour une colonne lors de la première lecture"""
+    __slots__ = ("scalars", "elements", "is_list", "kind")
+
+    def __init__(self):
+        self.scalars: set = set()
+        self.elements: set = set()
+        self.is_list = False
+        self.kind = "str"
+
+    def observe(self, value: Any):
+        if value is None:
+            return
+        if isinstance(value, (list, tuple, set)):
+            self.is_list = True
+            self.elements.update(_kind(element) for element in value if element is not None)
+        else:
+            self.scalars.add(_kind(value))
+
+    def resolve(self) -> str:
+        # Une colonne qui contient au moins une liste reste une colonne de listes
+        self.kind = _resolve(self.elements | self.scalars) if self.is_list else _resolve(self.scalars)
+        return self.kind
+
+    def convert(self, value: Any) -> Any:
+        if not self.is_list:
+            return _convert(value, self.kind)
+        if value is None:
+            return None
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        return [_convert(element, self.kind) for element in values]
+
+
+class ParquetExporter(ExportStrategy):
+    """Fichier Parquet écrit par groupes de lignes (PARQUET_ROW_GROUP_SIZE)
+
+    Les types des colonnes sont déduits d'une première lecture de tous les
+    éléments : entier, flottant, booléen, texte en cas de mélange ; une
+    colonne contenant des listes devient une colonne de listes. Chaque
+    groupe de lignes est transmis dès qu'il est écrit.
+    """
+    needs_scan = True
+
+    def __init__(self):
+        self.columns: Dict[str, _Column] = {}
+
+    def check_available(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Format parquet indisponible : le paquet pyarrow n'est pas installé")
+
+    async def scan(self, items: AsyncIterator[Dict[str, Any]]):
+        async for item in items:
+            for key, value in item.items():
+                column = self.columns.get(key)
+                if column is None:
+                    column = self.columns[key] = _Column()
+                column.observe(value)
+
+    def _schema(self):
+        import pyarrow as pa
+
+        types = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+        return pa.schema([
+            (name, pa.list_(types[column.resolve()]) if column.is_list else types[column.resolve()])
+            for name, column in self.columns.items()
+        ])
+
+    async def export(self, items: AsyncIterator[Dict[str, Any]], fields: List[str]) -> AsyncIterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = self._schema()
+        sink = ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression=settings.PARQUET_COMPRESSION)
+
+        def write(batch: Dict[str, List[Any]]):
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+
+        batch: Optional[Dict[str, List[Any]]] = None
+        rows = 0
+        async for item in items:
+            if batch is None:
+                batch = {name: [] for name in self.columns}
+            for name, column in self.columns.items():
+                batch[name].append(column.convert(item.get(name)))
+            rows += 1
+            if rows >= settings.PARQUET_ROW_GROUP_SIZE:
+                # Conversion et compression hors de la boucle d'événements
+                await asyncio.to_thread(write, batch)
+                batch, rows = None, 0
+                yield sink.take()
+        if batch is not None:
+            await asyncio.to_thread(write, batch)
+        await asyncio.to_thread(writer.close)
+        yield sink.take()
+
+    def get_content_type(self) -> str:
+        return "application/vnd.apache.parquet"
+
+    def get_file_extension(self) -> str:
+        return "parquet"
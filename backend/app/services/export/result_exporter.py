@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, Any, Optional, AsyncIterator, Tuple, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.services.scraping.result_store import ResultStore
+from .artifact_cache import ExportArtifactCache, ArtifactEntry, create_artifact_cache
+from .manager import ExportManager
+
+logger = logging.getLogger(__name__)
+
+
+class ResultExporter:
+    """Export des résultats d'une tâche, avec le cache des fichiers produits
+
+    Seuls les résultats terminés passent par le cache : tant qu'une tâche
+    tourne, chaque export relit les éléments stockés.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        export_manager: Optional[ExportManager] = None,
+        cache: Optional[ExportArtifactCache] = None
+    ):
+        self.db = db
+        self.store = ResultStore(db)
+        self.export_manager = export_manager or ExportManager()
+        self.cache = cache if cache is not None else create_artifact_cache()
+
+    async def find_summary(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Dernier résumé des résultats d'une tâche ; les éléments sont lus à la demande"""
+        summary = await self.db.scraping_results.find_one({"task_id": task_id}, {"data": 0}, sort=[("created_at", -1)])
+        if summary and summary.get("storage") != "items":
+            # Résultat non migré : le tableau data est nécessaire
+            summary = await self.db.scraping_results.find_one({"_id": summary["_id"]})
+        return summary
+
+    def cacheable(self, summary: Dict[str, Any]) -> bool:
+        return self.cache is not None and summary.get("status") == "completed"
+
+    async def stream(
+        self,
+        task_id: str,
+        summary: Dict[str, Any],
+        format: str
+    ) -> Tuple[AsyncIterator[bytes], str, str]:
+        """Export produit à la volée : (flux d'octets, type MIME, extension)"""
+        return await self.export_manager.export_stream(
+            lambda: self.store.iter_items(task_id, summary),
+            format,
+            fields=summary.get("metadata", {}).get("fields")
+        )
+
+    async def lookup(self, task_id: str, summary: Dict[str, Any], format: str) -> Optional[ArtifactEntry]:
+        # Format inconnu ou indisponible : ValueError, même si un fichier traîne en cache
+        self.export_manager.get_exporter(format)
+        return await self.cache.lookup(task_id, str(summary["_id"]), format)
+
+    async def stream_and_cache(
+        self,
+        task_id: str,
+        summary: Dict[str, Any],
+        format: str
+    ) -> Tuple[AsyncIterator[bytes], str, str]:
+        """Comme stream, le fichier transmis étant enregistré dans le cache au passage"""
+        output, content_type, extension = await self.stream(task_id, summary, format)
+        output = self.cache.tee(task_id, str(summary["_id"]), format, content_type, extension, output)
+        return output, content_type, extension
+
+    async def build(self, task_id: str, summary: Dict[str, Any], format: str) -> Optional[ArtifactEntry]:
+        """Fichier d'export en cache, produit entièrement s'il n'y est pas encore"""
+        entry = await self.lookup(task_id, summary, format)
+        if entry is not None:
+            return entry
+        output, content_type, extension = await self.stream(task_id, summary, format)
+        return await self.cache.build(task_id, str(summary["_id"]), format, content_type, extension, output)
+
+    async def prebuild(self, task_id: str, formats: Optional[List[str]] = None):
+        """Produit les formats EXPORT_PREBUILD_FORMATS à la fin d'une tâche
+
+        Un échec n'est que journalisé : le fichier sera produit à la première demande.
+        """
+        if formats is None:
+            formats = [name.strip() for name in settings.EXPORT_PREBUILD_FORMATS.split(",") if name.strip()]
+        if not formats or self.cache is None:
+            return
+        for format in formats:
+            try:
+                summary = await self.find_summary(task_id)
+                if not summary or not self.cacheable(summary):
+                    return
+                entry = await self.build(task_id, summary, format)
+                if entry is not None:
+                    logger.info(f"Export {format} de la tâche {task_id} prêt: {entry.size} octets")
+            except Exception as e:
+                logger.error(f"Erreur lors de la préparation de l'export {format} de la tâche {task_id}: {str(e)}")
+
+    async def invalidate(self, task_id: str):
+        if self.cache is not None:
+            await self.cache.invalidate(task_id)
@@ -0,0 +1,538 @@
+import aiohttp
+import asyncio
+import codecs
+import json
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, AsyncIterator, Callable
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.core import metrics
+from app.services.http.response_cache import ResponseCache, create_response_cache
+from app.services.http.rate_limiter import RateLimiter, create_rate_limiter
+from app.services.proxy.manager import ProxyManager
+from app.services.http.retry import (
+    CircuitBreaker, RetryPolicy, FETCH_POLICY, NO_RETRY, TRANSIENT_ERRORS, with_retry
+)
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de ce nombre d'hôtes suivis, les entrées inactives sont purgées
+MAX_TRACKED_HOSTS = 1024
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.IGNORECASE)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16")
+)
+
+
+class ResponseTooLarge(Exception):
+    """Corps de réponse au-delà de MAX_RESPONSE_BYTES"""
+
+
+def _valid_encoding(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(headers: Dict[str, str], head: bytes) -> str:
+    """Détermine l'encodage : BOM, en-tête Content-Type, balise <meta> puis UTF-8"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    content_type = headers.get("content-type", "")
+    for part in content_type.split(";")[1:]:
+        key, _, value = part.strip().partition("=")
+        if key.lower() == "charset":
+            encoding = _valid_encoding(value.strip('"\' '))
+            if encoding:
+                return encoding
+    match = _META_CHARSET_RE.search(head[:4096])
+    if match:
+        encoding = _valid_encoding(match.group(1).decode("ascii", errors="ignore"))
+        if encoding:
+            return encoding
+    return "utf-8"
+
+
+def check_declared_size(headers: Dict[str, str], max_bytes: int):
+    """Refuse d'emblée une réponse dont le Content-Length dépasse la limite"""
+    try:
+        declared = int(headers.get("content-length", "0") or 0)
+    except ValueError:
+        return
+    if max_bytes and declared > max_bytes:
+        raise ResponseTooLarge(f"Réponse trop volumineuse: {declared} octets (limite {max_bytes})")
+
+
+@dataclass
+class FetchResponse:
+    """Réponse HTTP entièrement lue, indépendante du client sous-jacent"""
+    url: str
+    status: int
+    headers: Dict[str, str]
+    content: bytes
+
+    @property
+    def encoding(self) -> str:
+        return sniff_charset(self.headers, self.content[:4096])
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+@dataclass
+class StreamedResponse:
+    """Réponse HTTP dont le corps est lu par morceaux"""
+    url: str
+    status: int
+    headers: Dict[str, str]
+    _iter_chunks: Callable[[int], AsyncIterator[bytes]]
+
+    def aiter_bytes(self, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+        return self._iter_chunks(chunk_size)
+
+    async def read(self, max_bytes: int = 0) -> bytes:
+        """Lit tout le corps, en s'arrêtant au-delà de max_bytes (0 = sans limite)"""
+        check_declared_size(self.headers, max_bytes)
+        chunks = []
+        size = 0
+        async for chunk in self.aiter_bytes():
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise ResponseTooLarge(f"Réponse trop volumineuse: plus de {max_bytes} octets")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+class _HostState:
+    """Limite de concurrence, disjoncteur et compteurs pour un hôte"""
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.breaker = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.errors = 0
+
+
+class _AiohttpBackend:
+    """Backend HTTP/1.1 avec keep-alive, limite par hôte et cache DNS"""
+    name = "aiohttp"
+
+    def __init__(self, timeout: float, headers: Dict[str, str], proxy: Optional[str] = None):
+        self.timeout = timeout
+        self.headers = headers
+        self.proxy = proxy
+        self.connector: Optional[aiohttp.TCPConnector] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        self.connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_MAX_CONNECTIONS,
+            limit_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self.connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.headers
+        )
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        json_body: Any,
+        timeout: Optional[float]
+    ) -> AsyncIterator[StreamedResponse]:
+        kwargs: Dict[str, Any] = {"headers": headers, "json": json_body}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+        if self.proxy:
+            kwargs["proxy"] = self.proxy
+        async with self.session.request(method, url, **kwargs) as response:
+            yield StreamedResponse(
+                url=str(response.url),
+                status=response.status,
+                headers={k.lower(): v for k, v in response.headers.items()},
+                _iter_chunks=response.content.iter_chunked
+            )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+            self.connector = None
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.connector:
+            return {}
+        # Attributs internes d'aiohttp : lus prudemment pour ne pas casser sur une mise à jour
+        idle = getattr(self.connector, "_conns", {}) or {}
+        acquired = getattr(self.connector, "_acquired", set()) or set()
+        return {
+            "idle_connections": sum(len(conns) for conns in idle.values()),
+            "active_connections": len(acquired),
+            "limit": self.connector.limit,
+            "limit_per_host": self.connector.limit_per_host
+        }
+
+
+class _HttpxBackend:
+    """Backend HTTP/2 (multiplexage) basé sur httpx, nécessite le paquet h2"""
+    name = "httpx-h2"
+
+    def __init__(self, timeout: float, headers: Dict[str, str], proxy: Optional[str] = None):
+        self.timeout = timeout
+        self.headers = headers
+        self.proxy = proxy
+        self.client = None
+
+    async def start(self):
+        import httpx
+
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_TIMEOUT
+            ),
+            timeout=self.timeout,
+            headers=self.headers,
+            follow_redirects=True,
+            proxy=self.proxy
+        )
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        json_body: Any,
+        timeout: Optional[float]
+    ) -> AsyncIterator[StreamedResponse]:
+        kwargs: Dict[str, Any] = {"headers": headers, "json": json_body}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        async with self.client.stream(method, url, **kwargs) as response:
+            yield StreamedResponse(
+                url=str(response.url),
+                status=response.status_code,
+                headers={k.lower(): v for k, v in response.headers.items()},
+                _iter_chunks=lambda chunk_size: response.aiter_bytes(chunk_size)
+            )
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.client:
+            return {}
+        pool = getattr(self.client._transport, "_pool", None)
+        connections = getattr(pool, "connections", []) or []
+        return {
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "limit": settings.HTTP_MAX_CONNECTIONS
+        }
+
+
+class FetchService:
+    """Client HTTP partagé par toute l'application (pool de connexions unique)
+
+    Les requêtes passant par un proxy utilisent un client dédié à ce proxy,
+    créé à la première utilisation, pour garder ses connexions ouvertes.
+    """
+    _instance: Optional["FetchService"] = None
+
+    def __init__(self):
+        self.timeout = settings.REQUEST_TIMEOUT
+        self.per_host_limit = settings.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.backend = self._select_backend()
+        self.proxy_backends: Dict[str, Any] = {}
+        self.cache: Optional[ResponseCache] = create_response_cache()
+        self.rate_limiter: Optional[RateLimiter] = create_rate_limiter()
+        self._hosts: Dict[str, _HostState] = {}
+        self._started = False
+        self._start_lock: Optional[asyncio.Lock] = None
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @classmethod
+    def get_instance(cls) -> "FetchService":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._instance:
+            await cls._instance.close()
+            cls._instance = None
+
+    def _select_backend(self, proxy: Optional[str] = None):
+        headers = dict(settings.DEFAULT_HEADERS)
+        if settings.HTTP2_ENABLED:
+            try:
+                import h2  # noqa: F401
+                return _HttpxBackend(self.timeout, headers, proxy)
+            except ImportError:
+                logger.warning("HTTP2_ENABLED actif mais le paquet h2 est absent, utilisation d'aiohttp")
+        return _AiohttpBackend(self.timeout, headers, proxy)
+
+    async def _backend_for(self, proxy: Optional[str]):
+        if not proxy:
+            return self.backend
+        backend = self.proxy_backends.get(proxy)
+        if backend is None:
+            backend = self._select_backend(proxy)
+            await backend.start()
+            self.proxy_backends[proxy] = backend
+        return backend
+
+    async def start(self):
+        """Ouvre le pool de connexions (idempotent)"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            await self.backend.start()
+            if self.cache:
+                await self.cache.load()
+            self._started = True
+            logger.info(
+                f"FetchService démarré (backend={self.backend.name}, "
+                f"max={settings.HTTP_MAX_CONNECTIONS}, par hôte={self.per_host_limit})"
+            )
+
+    async def close(self):
+        if self._started:
+            await self.backend.close()
+            for backend in self.proxy_backends.values():
+                await backend.close()
+            self.proxy_backends = {}
+            self._started = False
+            logger.info("FetchService arrêté")
+
+    def _host_state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= MAX_TRACKED_HOSTS:
+                self._prune_hosts()
+            state = self._hosts[host] = _HostState(self.per_host_limit)
+        return state
+
+    def _prune_hosts(self):
+        for host in [
+            h for h, s in self._hosts.items()
+            if s.in_flight == 0 and s.waiting == 0 and s.breaker.state == "closed"
+        ]:
+            del self._hosts[host]
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        timeout: Optional[float] = None,
+        rate_limit: bool = True,
+        proxy: Optional[str] = None,
+        breaker: bool = True
+    ) -> AsyncIterator[StreamedResponse]:
+        """Ouvre une requête dont le corps est consommé par morceaux
+
+        rate_limit=False dispense la requête de la limite par hôte (services
+        internes comme Ollama). Lève CircuitOpen sans rien envoyer si l'hôte
+        est considéré comme indisponible ; breaker=False ignore le disjoncteur
+        (sondes de proxies, dont l'échec ne dit rien de l'hôte cible). Pas de
+        nouvelle tentative ici : le corps est consommé par l'appelant.
+        """
+        if not self._started:
+            await self.start()
+
+        host = urlsplit(url).netloc.lower()
+        state = self._host_state(url)
+        circuit = state.breaker if breaker else CircuitBreaker(0, 0)
+        probe = circuit.before_request(host)
+        recorded = False
+        try:
+            backend = await self._backend_for(proxy)
+            if rate_limit and self.rate_limiter:
+                await self.rate_limiter.acquire(host)
+            state.waiting += 1
+            try:
+                await state.semaphore.acquire()
+            finally:
+                state.waiting -= 1
+            state.in_flight += 1
+            state.requests += 1
+            self.requests_total += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                async with backend.stream(method, url, headers, json, timeout) as response:
+                    recorded = True
+                    if response.status >= 500:
+                        circuit.record_failure(host)
+                    else:
+                        circuit.record_success()
+                    yield response
+            except Exception as e:
+                state.errors += 1
+                self.errors_total += 1
+                if not recorded and isinstance(e, TRANSIENT_ERRORS):
+                    recorded = True
+                    circuit.record_failure(host)
+                raise
+            finally:
+                state.in_flight -= 1
+                self.in_flight -= 1
+                state.semaphore.release()
+        finally:
+            # Requête d'essai abandonnée sans verdict (annulée pendant l'attente
+            # du limiteur ou d'un emplacement, erreur non réseau) : le disjoncteur
+            # laissera passer la suivante
+            if probe and not recorded:
+                circuit.release_probe()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        timeout: Optional[float] = None,
+        rate_limit: bool = True,
+        retry: Optional[RetryPolicy] = None,
+        proxies: Optional[ProxyManager] = None
+    ) -> FetchResponse:
+        """Exécute une requête et lit entièrement le corps de la réponse
+
+        Par défaut, GET et HEAD sont réessayés (FETCH_POLICY), les autres
+        méthodes non : un POST n'est rejoué que si l'appelant le demande.
+        Avec un pool de proxies, chaque tentative tire un proxy et lui
+        attribue le résultat.
+        """
+        async def attempt() -> FetchResponse:
+            proxy = await proxies.acquire() if proxies else None
+            started = time.monotonic()
+            try:
+                async with self.stream(
+                    method, url,
+                    headers=headers, json=json, timeout=timeout,
+                    rate_limit=rate_limit, proxy=proxy.url if proxy else None
+                ) as response:
+                    content = await response.read(settings.MAX_RESPONSE_BYTES)
+            except TRANSIENT_ERRORS:
+                if proxy:
+                    proxies.record(proxy, False, time.monotonic() - started)
+                raise
+            if proxy:
+                proxies.record_response(proxy, response.status, time.monotonic() - started)
+            return FetchResponse(
+                url=response.url,
+                status=response.status,
+                headers=response.headers,
+                content=content
+            )
+
+        policy = retry or (FETCH_POLICY if method.upper() in ("GET", "HEAD") else NO_RETRY)
+        return await with_retry(attempt, policy, f"{method} {url}")
+
+    async def get(self, url: str, *, use_cache: bool = True, **kwargs) -> FetchResponse:
+        """GET passant par le cache HTTP (revalidation conditionnelle si périmé)"""
+        if not self.cache or not use_cache:
+            return await self.request("GET", url, **kwargs)
+        if not self._started:
+            await self.start()
+
+        request_headers = dict(kwargs.pop("headers", None) or {})
+        entry = self.cache.lookup(url, request_headers)
+        if entry and self.cache.is_fresh(entry):
+            body = await self.cache.read_body(entry)
+            if body is not None:
+                metrics.incr("http_cache.hit")
+                return FetchResponse(url=entry.url, status=entry.status, headers=entry.headers, content=body)
+            entry = None
+
+        headers = dict(request_headers)
+        if entry:
+            headers.update(self.cache.conditional_headers(entry))
+        response = await self.request("GET", url, headers=headers, **kwargs)
+
+        if response.status == 304 and entry:
+            body = await self.cache.read_body(entry)
+            if body is not None:
+                entry = await self.cache.refresh(entry, response.headers)
+                metrics.incr("http_cache.revalidated")
+                return FetchResponse(url=entry.url, status=entry.status, headers=entry.headers, content=body)
+            # Corps perdu entre-temps : requête complète sans validateurs
+            for name in ("If-None-Match", "If-Modified-Since"):
+                headers.pop(name, None)
+            response = await self.request("GET", url, headers=headers, **kwargs)
+
+        metrics.incr("http_cache.miss")
+        if response.status == 200:
+            await self.cache.store(url, response.status, response.headers, response.content, request_headers)
+        return response
+
+    async def post(self, url: str, **kwargs) -> FetchResponse:
+        return await self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du pool pour le dimensionnement"""
+        return {
+            "backend": self.backend.name,
+            "started": self._started,
+            "timeout": self.timeout,
+            "per_host_limit": self.per_host_limit,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "pool": self.backend.stats(),
+            "proxy_pools": {proxy: backend.stats() for proxy, backend in self.proxy_backends.items()},
+            "cache": self.cache.get_stats() if self.cache else None,
+            "rate_limit": self.rate_limiter.get_stats() if self.rate_limiter else None,
+            "hosts": {
+                host: {
+                    "in_flight": state.in_flight,
+                    "waiting": state.waiting,
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "circuit": state.breaker.state,
+                    "circuit_rejected": state.breaker.rejected
+                }
+                for host, state in self._hosts.items()
+            }
+        }
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de ce nombre d'hôtes suivis, les compartiments pleins sont purgés
+MAX_TRACKED_BUCKETS = 1024
+# Après une erreur du magasin partagé, durée pendant laquelle la limite reste locale
+STORE_RETRY_DELAY = 30
+
+
+@dataclass
+class RateLimit:
+    requests: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        """Jetons par seconde"""
+        return self.requests / self.period
+
+
+def parse_overrides(raw: str) -> Dict[str, RateLimit]:
+    """RATE_LIMIT_OVERRIDES : {"hote": [requêtes, période]} ou {"hote": {"requests": .., "period": ..}}"""
+    if not raw:
+        return {}
+    try:
+        overrides = {}
+        for host, value in json.loads(raw).items():
+            if isinstance(value, dict):
+                overrides[host.lower()] = RateLimit(int(value["requests"]), float(value["period"]))
+            else:
+                overrides[host.lower()] = RateLimit(int(value[0]), float(value[1]))
+        return overrides
+    except Exception as e:
+        logger.error(f"RATE_LIMIT_OVERRIDES invalide, ignoré: {str(e)}")
+        return {}
+
+
+class LocalBucketStore:
+    """Compartiments en mémoire : limite propre à ce processus"""
+    name = "local"
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def acquire(self, host: str, limit: RateLimit, wanted: int) -> Tuple[int, float]:
+        """Prend jusqu'à wanted jetons, retourne (jetons obtenus, attente avant le prochain jeton)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(host, (float(limit.requests), now))
+        tokens = min(float(limit.requests), tokens + (now - updated) * limit.rate)
+        granted = min(wanted, int(tokens))
+        tokens -= granted
+        if len(self._buckets) >= MAX_TRACKED_BUCKETS and host not in self._buckets:
+            self._buckets.clear()
+        self._buckets[host] = (tokens, now)
+        return granted, 0.0 if granted else (1 - tokens) / limit.rate
+
+
+class MongoBucketStore:
+    """Compartiments partagés dans MongoDB : un budget global pour tous les processus
+
+    Le remplissage et le prélèvement se font en une seule mise à jour atomique
+    (pipeline d'agrégation), avec l'horloge du serveur ($$NOW) pour que les
+    processus ne dépendent pas de la synchronisation de leurs horloges.
+    """
+    name = "mongo"
+    COLLECTION = "rate_limit_buckets"
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def collection(self):
+        if self._db is None:
+            from app.database.mongodb import MongoDB
+
+            self._db = MongoDB.get_db()
+        return self._db[self.COLLECTION]
+
+    async def acquire(self, host: str, limit: RateLimit, wanted: int) -> Tuple[int, float]:
+        from pymongo import ReturnDocument
+
+        capacity = float(limit.requests)
+        rate_per_ms = limit.rate / 1000
+        now = {"$toLong": "$$NOW"}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": host},
+            [
+                {"$set": {
+                    "tokens": {"$min": [capacity, {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated_ms", now]}]}, rate_per_ms]}
+                    ]}]},
+                    "updated_ms": now,
+                    "capacity": capacity
+                }},
+                {"$set": {"granted": {"$min": [wanted, {"$floor": "$tokens"}]}}},
+                {"$set": {"tokens": {"$subtract": ["$tokens", "$granted"]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        granted = int(bucket.get("granted", 0))
+        return granted, 0.0 if granted else (1 - bucket["tokens"]) / limit.rate
+
+
+class RateLimiter:
+    """Limiteur à jetons par hôte, appliqué à chaque requête sortante
+
+    Les jetons sont obtenus du magasin (local ou partagé) par lots et consommés
+    localement ; un lot non utilisé expire après une période pour ne pas
+    fausser le budget global. En cas d'indisponibilité du magasin partagé,
+    le limiteur bascule temporairement sur des compartiments locaux.
+    """
+
+    def __init__(
+        self,
+        store,
+        default: RateLimit,
+        overrides: Optional[Dict[str, RateLimit]] = None,
+        batch_size: int = 1
+    ):
+        self.store = store
+        self.fallback = LocalBucketStore()
+        self.default = default
+        self.overrides = overrides or {}
+        self.batch_size = max(1, batch_size)
+        self._leases: Dict[str, Tuple[int, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waits: Dict[str, Dict[str, float]] = {}
+        self._store_down_until = 0.0
+
+    def limit_for(self, host: str) -> RateLimit:
+        """Limite du domaine le plus spécifique configuré (hôte, puis domaines parents)"""
+        labels = host.split(".")
+        for index in range(len(labels)):
+            override = self.overrides.get(".".join(labels[index:]))
+            if override:
+                return override
+        return self.default
+
+    async def acquire(self, host: str):
+        """Attend qu'une requête vers host soit autorisée"""
+        host = host.lower()
+        limit = self.limit_for(host)
+        if limit.requests <= 0:
+            return
+        lock = self._locks.get(host)
+        if lock is None:
+            if len(self._locks) >= MAX_TRACKED_BUCKETS:
+                self._prune()
+            lock = self._locks[host] = asyncio.Lock()
+
+        started = time.monotonic()
+        # Les demandes d'un même hôte sont servies dans l'ordre d'arrivée
+        async with lock:
+            while True:
+                tokens, expires = self._leases.get(host, (0, 0.0))
+                if tokens > 0 and expires > time.monotonic():
+                    self._leases[host] = (tokens - 1, expires)
+                    break
+                granted, wait = await self._take(host, limit)
+                if granted:
+                    self._leases[host] = (granted - 1, time.monotonic() + limit.period)
+                    break
+                await asyncio.sleep(max(wait, 0.01))
+
+        waited = time.monotonic() - started
+        stats = self._waits.setdefault(host, {"requests": 0, "waits": 0, "wait_seconds": 0.0})
+        stats["requests"] += 1
+        if waited >= 0.001:
+            stats["waits"] += 1
+            stats["wait_seconds"] += waited
+            metrics.observe("rate_limit.wait_seconds", waited)
+
+    async def _take(self, host: str, limit: RateLimit) -> Tuple[int, float]:
+        # Un lot ne dépasse jamais une fraction du budget, pour le partager entre processus
+        wanted = max(1, min(self.batch_size, limit.requests // 4))
+        if time.monotonic() >= self._store_down_until:
+            try:
+                return await self.store.acquire(host, limit, wanted)
+            except Exception as e:
+                logger.warning(f"Magasin de limitation {self.store.name} indisponible, limite locale pendant {STORE_RETRY_DELAY}s: {str(e)}")
+                self._store_down_until = time.monotonic() + STORE_RETRY_DELAY
+        return await self.fallback.acquire(host, limit, wanted)
+
+    def _prune(self):
+        for host in [h for h, lock in self._locks.items() if not lock.locked()]:
+            del self._locks[host]
+            self._leases.pop(host, None)
+            self._waits.pop(host, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "store": self.store.name,
+            "default": {"requests": self.default.requests, "period": self.default.period},
+            "overrides": {host: [limit.requests, limit.period] for host, limit in self.overrides.items()},
+            "hosts": self._waits
+        }
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    store = MongoBucketStore() if settings.RATE_LIMIT_STORE == "mongo" else LocalBucketStore()
+    return RateLimiter(
+        store,
+        RateLimit(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_PERIOD),
+        parse_overrides(settings.RATE_LIMIT_OVERRIDES),
+        settings.RATE_LIMIT_BATCH
+    )
@@ -0,0 +1,324 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    digest: str
+    size: int
+    status: int
+    headers: Dict[str, str]
+    stored_at: float
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    no_cache: bool = False
+    # En-têtes de requête nommés par Vary, avec leur valeur lors de l'enregistrement
+    vary: Dict[str, str] = field(default_factory=dict)
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _request_values(names, request_headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Valeurs des en-têtes de requête names : en-têtes par défaut du client, puis ceux de la requête"""
+    merged = {key.lower(): value for key, value in settings.DEFAULT_HEADERS.items()}
+    merged.update({key.lower(): value for key, value in (request_headers or {}).items()})
+    return {name: merged.get(name, "") for name in names}
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseCache:
+    """Cache HTTP persistant sur disque, adressé par contenu
+
+    Les corps sont stockés une seule fois sous leur empreinte SHA-256
+    (objects/), chaque URL pointe vers un corps via une entrée JSON (entries/).
+    Une réponse avec Vary n'est resservie qu'à une requête portant les mêmes
+    valeurs pour les en-têtes concernés (Vary: * n'est jamais enregistrée).
+    L'éviction est de type LRU, bornée par la taille totale des corps.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, heuristic_ttl: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.heuristic_ttl = heuristic_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refcounts: Dict[str, int] = {}
+        self.total_bytes = 0
+        self._loaded = False
+
+    @staticmethod
+    def make_key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, "entries", f"{key}.json")
+
+    async def load(self):
+        """Charge l'index depuis le disque (idempotent)"""
+        if self._loaded:
+            return
+        entries = await asyncio.to_thread(self._read_entries)
+        for entry in entries:
+            self._add(entry)
+        self._loaded = True
+        logger.info(f"Cache HTTP chargé: {len(self._entries)} entrées, {self.total_bytes} octets")
+        await self._evict()
+
+    def _read_entries(self):
+        entries_dir = os.path.join(self.directory, "entries")
+        os.makedirs(entries_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        loaded = []
+        for name in os.listdir(entries_dir):
+            path = os.path.join(entries_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = CacheEntry(**json.load(f))
+                if os.path.exists(self._object_path(entry.digest)):
+                    # L'ordre LRU est reconstruit à partir de la date de dernier accès
+                    loaded.append((os.path.getmtime(path), entry))
+                else:
+                    os.remove(path)
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Entrée de cache illisible ignorée {name}: {str(e)}")
+        return [entry for _, entry in sorted(loaded, key=lambda item: item[0])]
+
+    def _add(self, entry: CacheEntry):
+        self._entries[entry.key] = entry
+        count = self._refcounts.get(entry.digest, 0)
+        if count == 0:
+            self.total_bytes += entry.size
+        self._refcounts[entry.digest] = count + 1
+
+    def _discard(self, key: str) -> Optional[str]:
+        """Retire une entrée de l'index, retourne le digest si le corps n'est plus référencé"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        count = self._refcounts.get(entry.digest, 1) - 1
+        if count <= 0:
+            self._refcounts.pop(entry.digest, None)
+            self.total_bytes -= entry.size
+            return entry.digest
+        self._refcounts[entry.digest] = count
+        return None
+
+    def lookup(self, url: str, request_headers: Optional[Dict[str, str]] = None) -> Optional[CacheEntry]:
+        entry = self._entries.get(self.make_key(url))
+        if entry and entry.vary and _request_values(entry.vary, request_headers) != entry.vary:
+            # Autre variante de la ressource : traitée comme absente
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return not entry.no_cache and time.time() < entry.expires_at
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    async def read_body(self, entry: CacheEntry) -> Optional[bytes]:
+        try:
+            body = await asyncio.to_thread(self._read_file, self._object_path(entry.digest))
+        except OSError:
+            logger.warning(f"Corps en cache manquant pour {entry.url}, entrée supprimée")
+            await self.invalidate(entry.url)
+            return None
+        self._entries.move_to_end(entry.key)
+        try:
+            os.utime(self._entry_path(entry.key))
+        except OSError:
+            pass
+        return body
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _freshness(self, headers: Dict[str, str], directives: Dict[str, Optional[str]], now: float) -> float:
+        """Calcule la date d'expiration selon Cache-Control, Expires puis l'heuristique"""
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name) is not None:
+                try:
+                    age = float(headers.get("age", 0) or 0)
+                    return now + max(0.0, float(directives[name]) - age)
+                except ValueError:
+                    pass
+        expires = _parse_http_date(headers.get("expires"))
+        if expires is not None:
+            date = _parse_http_date(headers.get("date")) or now
+            return now + max(0.0, expires - date)
+        last_modified = _parse_http_date(headers.get("last-modified"))
+        if last_modified is not None:
+            # Heuristique RFC 9111 : 10 % de l'âge du document, plafonné
+            return now + min(self.heuristic_ttl, max(0.0, (now - last_modified) * 0.1))
+        # Sans Last-Modified, pas de fraîcheur heuristique : revalidation ou nouvelle requête
+        return now
+
+    async def store(
+        self,
+        url: str,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        request_headers: Optional[Dict[str, str]] = None
+    ) -> Optional[CacheEntry]:
+        """Enregistre une réponse si Cache-Control l'autorise
+
+        request_headers : en-têtes de la requête, pour les valeurs nommées par Vary
+        """
+        if status != 200 or len(body) > self.max_bytes:
+            return None
+        directives = _parse_cache_control(headers.get("cache-control", ""))
+        if "no-store" in directives:
+            return None
+        vary_names = sorted({name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()})
+        if "*" in vary_names:
+            return None
+
+        now = time.time()
+        entry = CacheEntry(
+            key=self.make_key(url),
+            url=url,
+            digest=hashlib.sha256(body).hexdigest(),
+            size=len(body),
+            status=status,
+            headers=headers,
+            stored_at=now,
+            expires_at=self._freshness(headers, directives, now),
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+            no_cache="no-cache" in directives,
+            vary=_request_values(vary_names, request_headers)
+        )
+        if entry.expires_at <= now and not (entry.etag or entry.last_modified):
+            # Ni fraîcheur ni validateur : la réponse ne pourra jamais être réutilisée
+            return None
+
+        try:
+            await asyncio.to_thread(self._write_entry, entry, body)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire dans le cache HTTP: {str(e)}")
+            return None
+
+        orphan = self._discard(entry.key)
+        self._add(entry)
+        if orphan and orphan != entry.digest:
+            await asyncio.to_thread(self._remove_object, orphan)
+        await self._evict()
+        return entry
+
+    async def refresh(self, entry: CacheEntry, headers: Dict[str, str]) -> CacheEntry:
+        """Met à jour une entrée après une revalidation 304"""
+        merged = {**entry.headers, **headers}
+        directives = _parse_cache_control(merged.get("cache-control", ""))
+        now = time.time()
+        entry.headers = merged
+        entry.stored_at = now
+        entry.expires_at = self._freshness(merged, directives, now)
+        entry.etag = merged.get("etag", entry.etag)
+        entry.last_modified = merged.get("last-modified", entry.last_modified)
+        entry.no_cache = "no-cache" in directives
+        try:
+            await asyncio.to_thread(self._write_entry, entry, None)
+        except OSError as e:
+            logger.warning(f"Impossible de mettre à jour le cache HTTP: {str(e)}")
+        self._entries.move_to_end(entry.key)
+        return entry
+
+    def _write_entry(self, entry: CacheEntry, body: Optional[bytes]):
+        if body is not None:
+            object_path = self._object_path(entry.digest)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = f"{object_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, object_path)
+        entry_path = self._entry_path(entry.key)
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp_path, entry_path)
+
+    def _remove_object(self, digest: str):
+        try:
+            os.remove(self._object_path(digest))
+        except OSError:
+            pass
+
+    def _remove_entry_file(self, key: str):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    async def invalidate(self, url: str):
+        key = self.make_key(url)
+        orphan = self._discard(key)
+        await asyncio.to_thread(self._remove_entry_file, key)
+        if orphan:
+            await asyncio.to_thread(self._remove_object, orphan)
+
+    async def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            orphan = self._discard(key)
+            await asyncio.to_thread(self._remove_entry_file, key)
+            if orphan:
+                await asyncio.to_thread(self._remove_object, orphan)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "objects": len(self._refcounts),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+    return ResponseCache(
+        settings.HTTP_CACHE_DIR,
+        settings.HTTP_CACHE_MAX_BYTES,
+        settings.HTTP_CACHE_HEURISTIC_TTL
+    )
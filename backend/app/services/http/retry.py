@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
+import aiohttp
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _transient_errors() -> Tuple[type, ...]:
+    errors: Tuple[type, ...] = (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError)
+    try:
+        import httpx
+
+        errors += (httpx.TransportError,)
+    except ImportError:
+        pass
+    return errors
+
+
+# Erreurs réseau pour lesquelles une nouvelle tentative a un sens
+TRANSIENT_ERRORS = _transient_errors()
+
+
+class CircuitOpen(Exception):
+    """Hôte considéré comme indisponible : requête refusée sans être envoyée"""
+
+
+class HTTPStatusError(Exception):
+    """Réponse HTTP en erreur, levée par les appelants qui consomment un flux"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None, message: Optional[str] = None):
+        super().__init__(message or f"Erreur HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """En-tête Retry-After (secondes ou date HTTP) converti en secondes"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    name: str
+    max_retries: int
+    base_delay: float
+    max_delay: float
+    retry_statuses: Tuple[int, ...] = ()
+    retry_errors: bool = True
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Attente avant la tentative suivante, None si Retry-After dépasse le plafond
+
+        Backoff exponentiel avec « full jitter » ; Retry-After, s'il est
+        fourni, sert de minimum.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            if retry_after > settings.RETRY_AFTER_MAX:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+
+# GET et HEAD sont idempotents : erreurs réseau, 429 et 5xx transitoires sont réessayés
+FETCH_POLICY = RetryPolicy(
+    name="fetch",
+    max_retries=settings.MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    retry_statuses=(408, 425, 429, 500, 502, 503, 504)
+)
+# Une génération coûte cher et une erreur 500 d'Ollama est rarement passagère
+LLM_POLICY = RetryPolicy(
+    name="llm",
+    max_retries=settings.LLM_MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY * 4,
+    max_delay=settings.RETRY_MAX_DELAY,
+    retry_statuses=(429, 502, 503, 504)
+)
+NO_RETRY = RetryPolicy(name="none", max_retries=0, base_delay=0, max_delay=0, retry_errors=False)
+
+
+async def with_retry(call: Callable[[], Awaitable[Any]], policy: RetryPolicy, description: str) -> Any:
+    """Exécute call avec la politique donnée
+
+    call peut retourner une réponse (attribut status) ou lever HTTPStatusError ;
+    après la dernière tentative, la réponse est retournée ou l'erreur relevée.
+    CircuitOpen n'est jamais réessayée. Tentatives et temps d'attente sont
+    enregistrés dans les métriques de la tâche (retry.<politique>.*).
+    """
+    attempt = 0
+    while True:
+        error: Optional[BaseException] = None
+        result = None
+        try:
+            result = await call()
+        except HTTPStatusError as e:
+            if e.status not in policy.retry_statuses:
+                raise
+            error, status, retry_after = e, e.status, e.retry_after
+        except TRANSIENT_ERRORS as e:
+            if not policy.retry_errors:
+                raise
+            error, status, retry_after = e, None, None
+        else:
+            status = getattr(result, "status", None)
+            if status not in policy.retry_statuses:
+                return result
+            retry_after = parse_retry_after(result.headers.get("retry-after"))
+
+        delay = policy.delay(attempt, retry_after) if attempt < policy.max_retries else None
+        if delay is None:
+            if attempt:
+                metrics.incr(f"retry.{policy.name}.exhausted")
+            if error is not None:
+                raise error
+            return result
+
+        attempt += 1
+        reason = f"HTTP {status}" if status else f"{type(error).__name__}: {error}"
+        logger.warning(f"{description}: {reason}, nouvelle tentative {attempt}/{policy.max_retries} dans {delay:.1f}s")
+        metrics.incr(f"retry.{policy.name}.attempts")
+        metrics.observe(f"retry.{policy.name}.backoff_seconds", delay)
+        await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Disjoncteur par hôte : fermé, ouvert après N échecs consécutifs, puis semi-ouvert
+
+    Ouvert, il refuse les requêtes pendant reset_timeout ; ensuite une seule
+    requête d'essai passe, son succès le referme, son échec le rouvre.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self, host: str) -> bool:
+        """Lève CircuitOpen si la requête est refusée ; True si elle est la requête d'essai"""
+        if self.failure_threshold <= 0 or self.opened_at is None:
+            return False
+        if not self.probing and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.probing = True  # Requête d'essai
+            return True
+        self.rejected += 1
+        metrics.incr("circuit.rejected")
+        raise CircuitOpen(f"Hôte {host} indisponible (disjoncteur ouvert après {self.failures} échecs)")
+
+    def release_probe(self):
+        """Requête d'essai abandonnée sans verdict : la suivante pourra réessayer"""
+        self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, host: str):
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                logger.warning(f"Disjoncteur ouvert pour {host} après {self.failures} échecs consécutifs")
+                metrics.incr("circuit.opened")
+            self.opened_at = time.monotonic()
+            self.probing = False
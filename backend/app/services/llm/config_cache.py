@@ -0,0 +1,175 @@
+import copy
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Iterable, Tuple
+from urllib.parse import urlsplit
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.database.indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+# Les classes générées (ex: "card-123", "css-1x2y3z") varient d'une page à l'autre
+_DIGITS_RE = re.compile(r"\d+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+class ScrapingConfigCache:
+    """Cache des configurations générées par le LLM, indexé par hôte et empreinte de structure DOM
+
+    Un LRU en mémoire évite l'aller-retour MongoDB pour les structures récentes,
+    la collection llm_config_cache partage les configurations entre processus.
+    Chaque invalidation incrémente une génération partagée (llm_config_cache_meta) :
+    les autres processus la relisent au plus toutes les
+    LLM_CONFIG_CACHE_SYNC_INTERVAL secondes et vident alors leur LRU.
+    """
+    _instance: Optional["ScrapingConfigCache"] = None
+    COLLECTION = "llm_config_cache"
+    META_COLLECTION = "llm_config_cache_meta"
+
+    def __init__(self, db: AsyncIOMotorDatabase, ttl: int, max_entries: int):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._indexes_ready = False
+        self._generation: Optional[int] = None
+        self._synced_at = 0.0
+
+    @classmethod
+    def get_instance(cls, db: AsyncIOMotorDatabase) -> "ScrapingConfigCache":
+        if cls._instance is None:
+            cls._instance = cls(db, settings.LLM_CONFIG_CACHE_TTL, settings.LLM_CONFIG_CACHE_SIZE)
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def collection(self):
+        return self.db[self.COLLECTION]
+
+    async def ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        # Dont l'index TTL : MongoDB supprime les entrées une fois expires_at dépassé
+        await ensure_indexes(self.db, [self.COLLECTION])
+        self._indexes_ready = True
+
+    @staticmethod
+    def fingerprint(class_paths: Iterable[str]) -> str:
+        """Empreinte normalisée de l'ensemble des chemins de classes de la page"""
+        normalized = sorted({_DIGITS_RE.sub("#", path.lower()) for path in class_paths})
+        return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    @classmethod
+    def make_key(cls, url: str, class_paths: Iterable[str], description: str, model: str, prompt_version: int) -> Optional[str]:
+        """Clé de cache : hôte, structure, description, modèle et version du prompt
+
+        None si la page n'a aucun élément classé (page rendue en JavaScript,
+        par exemple) : son empreinte vide ne distingue pas deux pages.
+        """
+        class_paths = list(class_paths)
+        if not class_paths:
+            return None
+        description = _SPACES_RE.sub(" ", description.strip().lower())
+        raw = f"{cls.host(url)}\n{cls.fingerprint(class_paths)}\n{description}\n{model}\n{prompt_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _sync_generation(self):
+        """Vide le LRU si un autre processus a invalidé le cache depuis la dernière lecture"""
+        now = time.monotonic()
+        if self._generation is not None and now - self._synced_at < settings.LLM_CONFIG_CACHE_SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        doc = await self.db[self.META_COLLECTION].find_one({"_id": "generation"})
+        generation = doc["value"] if doc else 0
+        if self._generation is not None and generation != self._generation:
+            self._lru.clear()
+        self._generation = generation
+
+    def _remember(self, key: str, expires_at: float, host: str, config: Dict[str, Any]):
+        self._lru[key] = (expires_at, host, config)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retourne une copie de la configuration en cache, ou None"""
+        if not self.enabled:
+            return None
+
+        await self._sync_generation()
+        cached = self._lru.get(key)
+        if cached:
+            expires_at, _, config = cached
+            if expires_at > time.time():
+                self._lru.move_to_end(key)
+                return copy.deepcopy(config)
+            del self._lru[key]
+
+        doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        if not doc:
+            return None
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+        self._remember(key, time.time() + remaining, doc.get("host", ""), doc["config"])
+        return copy.deepcopy(doc["config"])
+
+    async def set(self, key: str, config: Dict[str, Any], url: str):
+        if not self.enabled:
+            return
+        host = self.host(url)
+        now = datetime.utcnow()
+        await self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "config": config,
+                "host": host,
+                "url": url,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl)
+            },
+            upsert=True
+        )
+        self._remember(key, time.time() + self.ttl, host, copy.deepcopy(config))
+
+    async def invalidate(self, key: Optional[str] = None, host: Optional[str] = None) -> int:
+        """Supprime une entrée, toutes les entrées d'un hôte, ou tout le cache"""
+        query: Dict[str, Any] = {}
+        if key:
+            query["_id"] = key
+            self._lru.pop(key, None)
+        if host:
+            host = host.lower()
+            query["host"] = host
+            for cached_key in [k for k, (_, h, _) in self._lru.items() if h == host]:
+                del self._lru[cached_key]
+        if not key and not host:
+            self._lru.clear()
+
+        result = await self.collection.delete_many(query)
+        # Les autres processus videront leur LRU à leur prochaine synchronisation
+        meta = await self.db[self.META_COLLECTION].find_one_and_update(
+            {"_id": "generation"},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._generation = meta["value"]
+        self._synced_at = time.monotonic()
+        logger.info(f"Cache de configurations invalidé ({query or 'complet'}): {result.deleted_count} entrées")
+        return result.deleted_count
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "memory_entries": len(self._lru), "ttl": self.ttl}
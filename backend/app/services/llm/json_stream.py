@@ -0,0 +1,57 @@
+from typing import List
+
+
+class JsonObjectScanner:
+    """Repère la fin du premier objet JSON de premier niveau dans un flux de texte
+
+    Le texte précédant la première accolade (explications, balise ```json) est
+    ignoré. La profondeur des accolades est suivie caractère par caractère en
+    tenant compte des chaînes et des échappements, sans reparser le tampon.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, text: str) -> bool:
+        """Ajoute un fragment, retourne True dès que l'objet est complet"""
+        if self.complete:
+            return True
+
+        start = 0
+        if not self.started:
+            start = text.find("{")
+            if start < 0:
+                return False
+            self.started = True
+
+        for index in range(start, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:index + 1])
+                    self.complete = True
+                    return True
+
+        self._parts.append(text[start:])
+        return False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
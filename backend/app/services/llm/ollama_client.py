@@ -1,61 +1,171 @@
-import httpx
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set
 from bs4 import BeautifulSoup
 from app.core.config import settings
+from app.services.http.fetch_service import FetchService
+from app.services.proxy.manager import ProxyManager
+from app.services.http.retry import HTTPStatusError, LLM_POLICY, parse_retry_after, with_retry
+from app.services.llm.config_cache import ScrapingConfigCache
+from app.services.llm.json_stream import JsonObjectScanner
+from app.services.scraping.parsing import ParsingPool, collect_class_paths
+from app.core import metrics
 import json
 import re
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# À incrémenter à chaque modification du prompt d'analyse : les configurations
+# en cache produites par l'ancien prompt ne sont plus servies
+PROMPT_VERSION = 1
+
 class OllamaClient:
-    def __init__(self):
+    def __init__(
+        self,
+        fetcher: Optional[FetchService] = None,
+        config_cache: Optional[ScrapingConfigCache] = None,
+        parsing_pool: Optional[ParsingPool] = None,
+        proxies: Optional[ProxyManager] = None
+    ):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
+        self.fetcher = fetcher or FetchService.get_instance()
+        self.config_cache = config_cache
+        self.parsing_pool = parsing_pool or ParsingPool.get_instance()
+        self.proxies = proxies or (ProxyManager.get_instance() if settings.USE_PROXY else None)
         logger.info(f"Initialisation OllamaClient avec URL: {self.base_url} et modèle: {self.model}")
         
     async def _generate(self, prompt: str) -> str:
-        """Génère une réponse à partir d'un prompt en utilisant Ollama"""
+        """Génère une réponse à partir d'un prompt en utilisant Ollama
+
+        Les erreurs réseau et les indisponibilités passagères (429, 502-504)
+        sont réessayées selon LLM_POLICY.
+        """
+        if settings.OLLAMA_STREAM:
+            return await with_retry(lambda: self._generate_streaming(prompt), LLM_POLICY, "Génération Ollama")
+        return await with_retry(lambda: self._generate_once(prompt), LLM_POLICY, "Génération Ollama")
+
+    async def _generate_once(self, prompt: str) -> str:
+        """Une tentative de génération, sans streaming"""
         try:
             logger.info(f"Envoi de la requête à Ollama: {self.base_url}/api/generate")
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                logger.info("Tentative de connexion à Ollama...")
-                response = await client.post(
-                    f"{self.base_url}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "stream": False
-                    }
+            logger.info("Tentative de connexion à Ollama...")
+            started = time.monotonic()
+            response = await self.fetcher.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False
+                },
+                timeout=settings.OLLAMA_TIMEOUT,
+                rate_limit=False  # Service interne, hors budget des sites scrapés
+            )
+            
+            logger.info(f"Réponse d'Ollama reçue avec status: {response.status}")
+            
+            if response.status == 200:
+                result = response.json()
+                metrics.observe("llm.duration_seconds", time.monotonic() - started)
+                metrics.incr("llm.tokens", result.get("eval_count", 0))
+                return result["response"]
+            else:
+                logger.error(f"Erreur Ollama: {response.status} - {response.text}")
+                raise HTTPStatusError(
+                    response.status,
+                    parse_retry_after(response.headers.get("retry-after")),
+                    f"Erreur Ollama: {response.status}"
                 )
-                
-                logger.info(f"Réponse d'Ollama reçue avec status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result["response"]
-                else:
-                    logger.error(f"Erreur Ollama: {response.status_code} - {response.text}")
-                    raise Exception(f"Erreur Ollama: {response.status_code}")
                     
         except Exception as e:
             logger.error(f"Erreur lors de la communication avec Ollama: {str(e)}")
             raise
 
+    async def _generate_streaming(self, prompt: str) -> str:
+        """Génère en streaming et coupe la connexion dès que l'objet JSON est complet"""
+        try:
+            logger.info(f"Envoi de la requête en streaming à Ollama: {self.base_url}/api/generate")
+            started = time.monotonic()
+            first_token_at = None
+            tokens = 0
+            scanner = JsonObjectScanner()
+            raw_parts = []
+            pending = b""
+            finished = False
+            
+            async with self.fetcher.stream(
+                "POST",
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True
+                },
+                timeout=settings.OLLAMA_TIMEOUT,
+                rate_limit=False  # Service interne, hors budget des sites scrapés
+            ) as response:
+                if response.status != 200:
+                    body = await response.read()
+                    logger.error(f"Erreur Ollama: {response.status} - {body[:500]!r}")
+                    raise HTTPStatusError(
+                        response.status,
+                        parse_retry_after(response.headers.get("retry-after")),
+                        f"Erreur Ollama: {response.status}"
+                    )
+                
+                # Flux NDJSON : une ligne JSON par token, la dernière porte "done": true
+                async for chunk in response.aiter_bytes():
+                    lines = (pending + chunk).split(b"\n")
+                    pending = lines.pop()
+                    for line in lines:
+                        if not line.strip():
+                            continue
+                        event = json.loads(line)
+                        token = event.get("response", "")
+                        if token:
+                            tokens += 1
+                            if first_token_at is None:
+                                first_token_at = time.monotonic()
+                            raw_parts.append(token)
+                            scanner.feed(token)
+                        if event.get("done"):
+                            tokens = event.get("eval_count", tokens)
+                            finished = True
+                        if scanner.complete or finished:
+                            break
+                    if scanner.complete or finished:
+                        break
+            # La sortie du bloc ferme la connexion : Ollama interrompt la génération
+            
+            duration = time.monotonic() - started
+            metrics.observe("llm.duration_seconds", duration)
+            metrics.incr("llm.tokens", tokens)
+            if first_token_at is not None:
+                metrics.observe("llm.ttft_seconds", first_token_at - started)
+            if scanner.complete:
+                metrics.incr("llm.early_stop")
+            logger.info(
+                f"Génération Ollama terminée en {duration:.2f}s ({tokens} tokens, "
+                f"arrêt anticipé: {scanner.complete})"
+            )
+            
+            return scanner.text if scanner.complete else "".join(raw_parts)
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de la communication avec Ollama: {str(e)}")
+            raise
+
     async def _get_page_content(self, url: str) -> str:
         """Récupère le contenu HTML de la page"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers)
-                if response.status_code == 200:
-                    return response.text
-                else:
-                    raise Exception(f"Erreur HTTP {response.status_code}")
+            # Les en-têtes par défaut (settings.DEFAULT_HEADERS) sont portés par le client partagé
+            response = await self.fetcher.get(url, proxies=self.proxies)
+            if response.status == 200:
+                return response.text
+            else:
+                raise Exception(f"Erreur HTTP {response.status}")
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la page: {str(e)}")
             raise
@@ -66,11 +176,28 @@ class OllamaClient:
             # Récupère le contenu de la page
             html_content = await self._get_page_content(request['url'])
             
-            # Analyse le HTML avec BeautifulSoup pour obtenir la structure
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Analyse la structure HTML dans le pool, hors de la boucle asyncio
+            parser = (request.get('config') or {}).get('parser') or settings.DEFAULT_HTML_PARSER
+            parsed = await self.parsing_pool.run(collect_class_paths, html_content, parser)
+            metrics.observe("parse.seconds", parsed["parse_time"])
+            class_paths = set(parsed["class_paths"])
+            
+            # Une structure déjà analysée avec la même description réutilise sa configuration
+            cache_key = None
+            if self.config_cache and self.config_cache.enabled:
+                cache_key = self.config_cache.make_key(
+                    request['url'], class_paths, request['description'], self.model, PROMPT_VERSION
+                )
+            if cache_key:
+                cached_config = await self.config_cache.get(cache_key)
+                if cached_config:
+                    metrics.incr("llm_config_cache.hit")
+                    logger.info(f"Configuration trouvée en cache pour {request['url']}")
+                    return cached_config
+                metrics.incr("llm_config_cache.miss")
             
             # Crée un résumé de la structure HTML
-            structure_summary = self._get_structure_summary(soup)
+            structure_summary = self._get_structure_summary(class_paths)
             
             prompt = f"""You are a web scraping expert. Analyze this HTML structure and create a scraping configuration.
 
@@ -85,6 +212,8 @@ For therapist data, ensure:
 1. Each field is extracted separately (name, title, address, etc.)
 2. Text is properly cleaned (remove extra spaces, newlines)
 3. Structured data is preserved (specialties as arrays, etc.)
+4. If the listing spans several pages, set "pagination" to true and describe how to reach the next page
+   in "navigation_rules": "next_link" with "next_selector", or "url_template" with a template like "?page={{n}}"
 
 Return a JSON object with this structure:
 {{
@@ -99,6 +228,10 @@ Return a JSON object with this structure:
     }},
     "pagination": false,
     "max_pages": 1,
+    "navigation_rules": {{
+        "type": "next_link",
+        "next_selector": "selector_for_next_page_link"
+    }},
     "extraction_method": "static",
     "restrictions": []
 }}
@@ -147,6 +280,9 @@ IMPORTANT:
                     if not isinstance(value, str) or not value.strip():
                         raise ValueError(f"Le sélecteur '{key}' est invalide")
                 
+                if cache_key:
+                    await self.config_cache.set(cache_key, config, request['url'])
+                
                 return config
                 
             except json.JSONDecodeError as e:
@@ -158,18 +294,9 @@ IMPORTANT:
             logger.error(f"Erreur lors de l'analyse de la requête: {str(e)}")
             raise
 
-    def _get_structure_summary(self, soup: BeautifulSoup) -> str:
+    def _get_structure_summary(self, class_paths: Set[str]) -> str:
         """Crée un résumé de la structure HTML pertinente"""
-        summary = []
-        
-        # Trouve les éléments qui pourraient contenir des données
-        for tag in soup.find_all(['div', 'span', 'p', 'a', 'h1', 'h2', 'h3', 'section']):
-            classes = tag.get('class', [])
-            if classes:
-                class_str = '.'.join(classes)
-                summary.append(f"{tag.name}.{class_str}")
-        
-        return "\n".join(sorted(set(summary)))[:1500]  # Limite la taille du résumé
+        return "\n".join(sorted(class_paths))[:1500]  # Limite la taille du résumé
 
     def _validate_selectors(self, soup: BeautifulSoup, selectors: Dict[str, str]):
         """Valide que les sélecteurs existent dans le HTML"""
@@ -1,76 +1,301 @@
 from typing import Optional, Dict, List
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+import asyncio
+import logging
 import random
+import time
+from pymongo import UpdateOne
 from app.database.mongodb import get_database
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Statuts HTTP qui mettent en cause le proxy (authentification, blocage de son IP)
+PROXY_FAILURE_STATUSES = (403, 407)
+# Limitation de débit du site cible : ne dit rien de la santé du proxy, ni en bien ni en mal
+PROXY_NEUTRAL_STATUSES = (429,)
+
+
+# Latence supposée d'un proxy jamais mesuré, en secondes
+DEFAULT_LATENCY = 1.0
+# Plancher de latence pour la pondération : en dessous, les écarts ne comptent plus
+MIN_WEIGHT_LATENCY = 0.05
+
+
+@dataclass
+class ProxyEntry:
+    """Proxy actif tenu en mémoire, avec ses compteurs et les écarts non encore écrits
+
+    latency_ewma et error_ewma sont des moyennes mobiles exponentielles,
+    alimentées par le trafic réel et par les sondes : elles réagissent en
+    quelques requêtes, contrairement au taux de succès cumulé.
+    """
+    id: object
+    url: str
+    total_requests: int = 0
+    successful_requests: int = 0
+    response_time: float = 0.0
+    pending: Dict[str, int] = field(default_factory=dict)
+    last_used: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    consecutive_failures: int = 0
+    quarantine_level: int = 0
+    quarantined_until: float = 0.0  # time.monotonic()
+    last_probe: float = 0.0  # time.monotonic()
+    dirty: bool = False  # Scores modifiés depuis la dernière écriture
+
+    @property
+    def success_rate(self) -> float:
+        if self.total_requests == 0:
+            return 0.0
+        return (self.successful_requests / self.total_requests) * 100
+
+    @property
+    def quarantined(self) -> bool:
+        return self.quarantined_until > time.monotonic()
+
+    @property
+    def needs_recheck(self) -> bool:
+        """Sorti de quarantaine mais pas encore revalidé"""
+        return self.consecutive_failures >= settings.PROXY_QUARANTINE_FAILURES
+
+    @property
+    def weight(self) -> float:
+        # Favorise les proxies rapides et fiables : la part de trafic baisse avec
+        # la latence et chute avec le taux d'erreur (au carré)
+        latency = self.latency_ewma if self.latency_ewma is not None else DEFAULT_LATENCY
+        return max(0.01, (1 - self.error_ewma) ** 2) / max(latency, MIN_WEIGHT_LATENCY)
+
+    def as_mapping(self) -> Dict[str, str]:
+        return {"http": self.url, "https": self.url}
+
+
 class ProxyManager:
-    def __init__(self):
-        self.db = get_database()
-        
-    async def get_proxy(self) -> Optional[Dict[str, str]]:
-        """Récupère un proxy disponible avec la meilleure performance"""
+    """Pool de proxies en mémoire, tirage pondéré par la latence et le taux d'erreur récents
+
+    La liste des proxies actifs est rechargée depuis MongoDB toutes les
+    PROXY_ROTATION_INTERVAL secondes ; choisir un proxy ne fait donc aucun
+    accès à la base. Les statistiques sont accumulées en mémoire puis écrites
+    par lots (bulk_write de $inc) toutes les PROXY_STATS_FLUSH_INTERVAL secondes.
+    Le tirage est pondéré par les scores EWMA (latence, erreurs) ; un proxy
+    en échec répété est mis en quarantaine, avec une durée qui double à
+    chaque rechute (voir ProxyProber pour les vérifications périodiques).
+    """
+    _instance: Optional["ProxyManager"] = None
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self.proxies: List[ProxyEntry] = []
+        self._by_url: Dict[str, ProxyEntry] = {}
+        self._loaded_at = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.probed = False  # Un ProxyProber revalide les proxies sortis de quarantaine
+
+    @classmethod
+    def get_instance(cls) -> "ProxyManager":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._instance:
+            await cls._instance.close()
+            cls._instance = None
+
+    @staticmethod
+    def _proxy_url(proxy: Dict) -> str:
+        return f"{proxy['protocol']}://{proxy['ip']}:{proxy['port']}"
+
+    async def refresh(self):
+        """Recharge les proxies actifs, en gardant les compteurs des proxies déjà connus"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if self._loaded_at and time.monotonic() - self._loaded_at < settings.PROXY_ROTATION_INTERVAL:
+                return
+            await self.flush()
+            proxies = []
+            by_url = {}
+            async for proxy in self.db.proxy_pool.find({"status": "active"}):
+                url = self._proxy_url(proxy)
+                entry = self._by_url.get(url) or ProxyEntry(id=proxy["_id"], url=url)
+                if not entry.pending:
+                    # Pas d'écart en attente : la base fait foi (autres processus compris)
+                    entry.total_requests = proxy.get("total_requests", 0)
+                    entry.successful_requests = proxy.get("successful_requests", 0)
+                    entry.response_time = proxy.get("response_time", 0.0)
+                if entry.latency_ewma is None and proxy.get("latency_ewma") is not None:
+                    entry.latency_ewma = proxy["latency_ewma"]
+                    entry.error_ewma = proxy.get("error_ewma", 0.0)
+                self._restore_quarantine(entry, proxy.get("quarantined_until"))
+                proxies.append(entry)
+                by_url[url] = entry
+            self.proxies = proxies
+            self._by_url = by_url
+            self._loaded_at = time.monotonic()
+            logger.info(f"Pool de proxies rechargé: {len(proxies)} proxies actifs")
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    @staticmethod
+    def _restore_quarantine(entry: ProxyEntry, quarantined_until: Optional[datetime]):
+        """Reprend une quarantaine enregistrée en base (avant un redémarrage, ou par un autre processus)"""
+        if not quarantined_until:
+            return
+        remaining = (quarantined_until - datetime.utcnow()).total_seconds()
+        if remaining <= 0 or time.monotonic() + remaining <= entry.quarantined_until:
+            return
+        entry.quarantined_until = time.monotonic() + remaining
+        entry.quarantine_level = max(entry.quarantine_level, 1)
+        # À sa sortie, le proxy devra être revalidé comme après une quarantaine locale
+        entry.consecutive_failures = max(entry.consecutive_failures, settings.PROXY_QUARANTINE_FAILURES)
+
+    async def acquire(self) -> Optional[ProxyEntry]:
+        """Tire un proxy hors quarantaine au hasard, pondéré par ses scores"""
         if not settings.USE_PROXY:
             return None
-            
-        proxy = await self.db.proxy_pool.find_one({
-            "status": "active",
-            "last_used": {
-                "$lt": datetime.utcnow() - timedelta(seconds=settings.PROXY_ROTATION_INTERVAL)
-            }
-        }, sort=[("success_rate", -1)])
-        
-        if proxy:
-            await self.db.proxy_pool.update_one(
-                {"_id": proxy["_id"]},
-                {
-                    "$set": {
-                        "last_used": datetime.utcnow()
-                    }
-                }
-            )
-            return {
-                "http": f"{proxy['protocol']}://{proxy['ip']}:{proxy['port']}",
-                "https": f"{proxy['protocol']}://{proxy['ip']}:{proxy['port']}"
-            }
-        return None
-        
-    async def update_proxy_status(self, proxy_url: str, success: bool, response_time: float):
-        """Met à jour les statistiques du proxy"""
-        protocol, address = proxy_url.split("://")
-        ip, port = address.split(":")
-        
-        update = {
-            "$inc": {"total_requests": 1},
-            "$set": {"last_used": datetime.utcnow()}
-        }
-        
+        if not self._loaded_at or time.monotonic() - self._loaded_at >= settings.PROXY_ROTATION_INTERVAL:
+            await self.refresh()
+        if not self.proxies:
+            return None
+        available = [
+            proxy for proxy in self.proxies
+            if not proxy.quarantined and not (self.probed and proxy.needs_recheck)
+        ]
+        if available:
+            entry = random.choices(available, weights=[proxy.weight for proxy in available])[0]
+        else:
+            # Tous écartés : le premier à sortir de quarantaine plutôt qu'une connexion directe
+            entry = min(self.proxies, key=lambda proxy: proxy.quarantined_until)
+        entry.last_used = datetime.utcnow()
+        return entry
+
+    def observe(self, entry: ProxyEntry, success: bool, latency: float):
+        """Met à jour les scores EWMA et la quarantaine (trafic réel et sondes)"""
+        alpha = settings.PROXY_EWMA_ALPHA
+        entry.error_ewma = alpha * (0.0 if success else 1.0) + (1 - alpha) * entry.error_ewma
         if success:
-            update["$inc"]["successful_requests"] = 1
-            update["$set"]["last_success"] = datetime.utcnow()
+            # Une requête en échec n'a pas de latence significative (délai d'attente, refus)
+            entry.latency_ewma = latency if entry.latency_ewma is None else alpha * latency + (1 - alpha) * entry.latency_ewma
+            entry.consecutive_failures = 0
+            entry.quarantine_level = 0
+            entry.quarantined_until = 0.0
         else:
-            update["$inc"]["failed_requests"] = 1
-            
-        await self.db.proxy_pool.update_one(
-            {"ip": ip, "port": int(port)},
-            {
-                **update,
+            entry.consecutive_failures += 1
+            if entry.consecutive_failures >= settings.PROXY_QUARANTINE_FAILURES and not entry.quarantined:
+                duration = min(
+                    settings.PROXY_QUARANTINE_MAX,
+                    settings.PROXY_QUARANTINE_BASE * (2 ** entry.quarantine_level)
+                )
+                entry.quarantine_level += 1
+                entry.quarantined_until = time.monotonic() + duration
+                logger.warning(f"Proxy {entry.url} en quarantaine pour {duration:.0f}s ({entry.consecutive_failures} échecs consécutifs)")
+        entry.dirty = True
+
+    async def get_proxy(self) -> Optional[Dict[str, str]]:
+        """Récupère un proxy disponible, au format {"http": url, "https": url}"""
+        entry = await self.acquire()
+        return entry.as_mapping() if entry else None
+
+    def record(self, entry: ProxyEntry, success: bool, response_time: float):
+        """Enregistre le résultat d'une requête (en mémoire, écrit au prochain lot)"""
+        entry.total_requests += 1
+        entry.pending["total_requests"] = entry.pending.get("total_requests", 0) + 1
+        if success:
+            entry.successful_requests += 1
+            entry.pending["successful_requests"] = entry.pending.get("successful_requests", 0) + 1
+            entry.last_success = datetime.utcnow()
+        else:
+            entry.pending["failed_requests"] = entry.pending.get("failed_requests", 0) + 1
+        entry.response_time = response_time
+        self.observe(entry, success, response_time)
+
+    def record_response(self, entry: ProxyEntry, status: int, response_time: float):
+        """Enregistre une réponse HTTP obtenue via le proxy, selon son statut
+
+        Un 429 vient du site cible : il n'est compté ni comme succès ni comme échec.
+        """
+        if status in PROXY_NEUTRAL_STATUSES:
+            return
+        self.record(entry, status not in PROXY_FAILURE_STATUSES, response_time)
+
+    async def update_proxy_status(self, proxy_url: str, success: bool, response_time: float):
+        """Met à jour les statistiques du proxy"""
+        entry = self._by_url.get(proxy_url)
+        if entry:
+            self.record(entry, success, response_time)
+
+    async def flush(self):
+        """Écrit les compteurs accumulés en un seul bulk_write"""
+        operations = []
+        flushed = []
+        for entry in self.proxies:
+            if not entry.pending and not entry.dirty:
+                continue
+            update = {
                 "$set": {
-                    "response_time": response_time,
-                    "success_rate": await self._calculate_success_rate(ip, port)
+                    "response_time": entry.response_time,
+                    "success_rate": entry.success_rate,
+                    "latency_ewma": entry.latency_ewma,
+                    "error_ewma": entry.error_ewma,
+                    "quarantined_until": (
+                        datetime.utcnow() + timedelta(seconds=entry.quarantined_until - time.monotonic())
+                        if entry.quarantined else None
+                    )
                 }
             }
-        )
-        
-    async def _calculate_success_rate(self, ip: str, port: int) -> float:
-        """Calcule le taux de succès d'un proxy"""
-        proxy = await self.db.proxy_pool.find_one({"ip": ip, "port": port})
-        if not proxy:
-            return 0.0
-            
-        total = proxy.get("total_requests", 0)
-        if total == 0:
-            return 0.0
-            
-        successful = proxy.get("successful_requests", 0)
-        return (successful / total) * 100 
\ No newline at end of file
+            if entry.pending:
+                update["$inc"] = entry.pending
+            if entry.last_used:
+                update["$set"]["last_used"] = entry.last_used
+            if entry.last_success:
+                update["$set"]["last_success"] = entry.last_success
+            entry.dirty = False
+            operations.append(UpdateOne({"_id": entry.id}, update))
+            flushed.append((entry, entry.pending))
+            entry.pending = {}
+        if operations:
+            try:
+                await self.db.proxy_pool.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture des statistiques des proxies: {str(e)}")
+                # Les écarts seront réécrits au prochain lot
+                for entry, pending in flushed:
+                    entry.dirty = True
+                    for key, value in pending.items():
+                        entry.pending[key] = entry.pending.get(key, 0) + value
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.PROXY_STATS_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "proxies": len(self.proxies),
+            "quarantined": sum(1 for entry in self.proxies if entry.quarantined),
+            "pending_updates": sum(1 for entry in self.proxies if entry.pending),
+            "by_proxy": {
+                entry.url: {
+                    "requests": entry.total_requests,
+                    "success_rate": round(entry.success_rate, 1),
+                    "response_time": entry.response_time,
+                    "latency_ewma": entry.latency_ewma,
+                    "error_ewma": round(entry.error_ewma, 3),
+                    "quarantined_for": max(0.0, round(entry.quarantined_until - time.monotonic(), 1)),
+                    "weight": round(entry.weight, 3)
+                }
+                for entry in self.proxies
+            }
+        }
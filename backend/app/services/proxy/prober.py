@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from app.core.config import settings
+from app.services.http.fetch_service import FetchService
+from app.services.proxy.manager import ProxyManager, ProxyEntry
+
+logger = logging.getLogger(__name__)
+
+# Période de réveil de la boucle : les proxies sortis de quarantaine sont revérifiés sans attendre
+PROBE_TICK = 5.0
+
+
+class ProxyProber:
+    """Sondes périodiques des proxies vers une cible maîtrisée (PROXY_PROBE_URL)
+
+    Chaque proxy est sondé toutes les PROXY_PROBE_INTERVAL secondes, en
+    parallèle (PROXY_PROBE_CONCURRENCY). Un proxy sorti de quarantaine ne
+    reçoit plus de trafic tant qu'une sonde ne l'a pas revalidé ; s'il échoue
+    encore, sa quarantaine double. Les résultats alimentent les scores EWMA
+    utilisés par ProxyManager.acquire.
+    """
+    _instance: Optional["ProxyProber"] = None
+
+    def __init__(self, manager: ProxyManager, fetcher: FetchService):
+        self.manager = manager
+        self.fetcher = fetcher
+        self.target = settings.PROXY_PROBE_URL
+        self.interval = settings.PROXY_PROBE_INTERVAL
+        self.semaphore = asyncio.Semaphore(settings.PROXY_PROBE_CONCURRENCY)
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+
+    @classmethod
+    def start_instance(cls) -> Optional["ProxyProber"]:
+        """Démarre le prober du processus si les proxies et la cible sont configurés"""
+        if not settings.USE_PROXY or not settings.PROXY_PROBE_URL:
+            return None
+        if cls._instance is None:
+            cls._instance = cls(ProxyManager.get_instance(), FetchService.get_instance())
+            cls._instance.start()
+        return cls._instance
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._instance:
+            await cls._instance.stop()
+            cls._instance = None
+
+    def start(self):
+        if self._task is None:
+            self.manager.probed = True
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Sondes des proxies démarrées vers {self.target} (toutes les {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.manager.probed = False
+
+    def _due(self, entry: ProxyEntry, now: float) -> bool:
+        if entry.quarantined:
+            return False
+        return entry.needs_recheck or now - entry.last_probe >= self.interval
+
+    async def _run(self):
+        while True:
+            try:
+                await self.manager.refresh()
+                now = time.monotonic()
+                due = [entry for entry in self.manager.proxies if self._due(entry, now)]
+                if due:
+                    await asyncio.gather(*(self.probe(entry) for entry in due))
+                    self.rounds += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors des sondes des proxies: {str(e)}")
+            await asyncio.sleep(min(PROBE_TICK, self.interval))
+
+    async def probe(self, entry: ProxyEntry) -> bool:
+        """Sonde un proxy, met à jour ses scores et retourne le résultat"""
+        async with self.semaphore:
+            entry.last_probe = time.monotonic()
+            started = time.monotonic()
+            try:
+                async with self.fetcher.stream(
+                    "GET",
+                    self.target,
+                    proxy=entry.url,
+                    timeout=settings.PROXY_PROBE_TIMEOUT,
+                    rate_limit=False,
+                    breaker=False
+                ) as response:
+                    await response.read(64 * 1024)
+                    success = 200 <= response.status < 400
+            except Exception as e:
+                logger.debug(f"Sonde du proxy {entry.url} en échec: {str(e)}")
+                success = False
+            self.manager.observe(entry, success, time.monotonic() - started)
+            return success
@@ -0,0 +1,194 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.database.indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """File d'exécution durable stockée dans MongoDB
+
+    Un job est « loué » atomiquement par un worker (find_one_and_update) pour
+    une durée de visibilité, prolongée par des heartbeats. Un bail expiré rend
+    le job de nouveau disponible ; après max_attempts il part en dead letter.
+    """
+    COLLECTION = "scraping_jobs"
+    DEAD_LETTER_COLLECTION = "scraping_jobs_dead"
+    _indexes_ready = False
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.lease_seconds = settings.QUEUE_LEASE_SECONDS
+        self.max_attempts = settings.QUEUE_MAX_ATTEMPTS
+        self.retry_delay = settings.QUEUE_RETRY_DELAY
+
+    @property
+    def collection(self):
+        return self.db[self.COLLECTION]
+
+    async def ensure_indexes(self):
+        if JobQueue._indexes_ready:
+            return
+        # Dont l'index unique partiel : un seul job actif (en attente ou loué) par tâche
+        await ensure_indexes(self.db, [self.COLLECTION])
+        JobQueue._indexes_ready = True
+
+    async def enqueue(self, task_id: str, delay: float = 0) -> Optional[str]:
+        """Ajoute une tâche à la file, retourne l'id du job (None si déjà en file)"""
+        now = datetime.utcnow()
+        try:
+            result = await self.collection.insert_one({
+                "task_id": task_id,
+                "status": "queued",
+                "active": True,
+                "attempts": 0,
+                "max_attempts": self.max_attempts,
+                "available_at": now + timedelta(seconds=delay),
+                "created_at": now,
+                "updated_at": now
+            })
+            logger.info(f"Tâche {task_id} ajoutée à la file (job {result.inserted_id})")
+            return str(result.inserted_id)
+        except DuplicateKeyError:
+            logger.info(f"Tâche {task_id} déjà présente dans la file")
+            return None
+
+    async def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Loue le prochain job disponible (en attente, ou dont le bail a expiré)"""
+        while True:
+            now = datetime.utcnow()
+            job = await self.collection.find_one_and_update(
+                {
+                    "$or": [
+                        {"status": "queued", "available_at": {"$lte": now}},
+                        {"status": "leased", "lease_expires_at": {"$lte": now}}
+                    ]
+                },
+                {
+                    "$set": {
+                        "status": "leased",
+                        "lease_owner": worker_id,
+                        "leased_at": now,
+                        "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("available_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                return None
+            if job["attempts"] > job.get("max_attempts", self.max_attempts):
+                # Bail expiré trop de fois : le worker précédent est probablement mort en cours de route
+                await self._dead_letter(job, job.get("last_error") or "Bail expiré trop de fois")
+                continue
+            return job
+
+    async def heartbeat(self, job: Dict[str, Any]) -> bool:
+        """Prolonge le bail, retourne False si le job a été repris par un autre worker"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": job["_id"], "status": "leased", "lease_owner": job["lease_owner"]},
+            {
+                "$set": {
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                }
+            }
+        )
+        return result.modified_count == 1
+
+    async def complete(self, job: Dict[str, Any]):
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+            {
+                "$set": {"status": "done", "finished_at": now, "updated_at": now},
+                "$unset": {"active": "", "lease_expires_at": ""}
+            }
+        )
+
+    async def release(self, job: Dict[str, Any]):
+        """Rend un job interrompu sans erreur (arrêt du worker) : disponible tout de suite,
+        la tentative n'est pas comptée"""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": "leased", "lease_owner": job["lease_owner"]},
+            {
+                "$set": {"status": "queued", "available_at": now, "updated_at": now},
+                "$inc": {"attempts": -1},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""}
+            }
+        )
+        logger.info(f"Job {job['_id']} rendu à la file")
+
+    async def fail(self, job: Dict[str, Any], error: str):
+        """Replanifie le job avec backoff exponentiel, ou le passe en dead letter"""
+        if job["attempts"] >= job.get("max_attempts", self.max_attempts):
+            await self._dead_letter(job, error)
+            return
+        now = datetime.utcnow()
+        delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+        await self.collection.update_one(
+            {"_id": job["_id"], "lease_owner": job["lease_owner"]},
+            {
+                "$set": {
+                    "status": "queued",
+                    "available_at": now + timedelta(seconds=delay),
+                    "last_error": error,
+                    "updated_at": now
+                },
+                "$unset": {"lease_owner": "", "lease_expires_at": ""}
+            }
+        )
+        logger.warning(f"Job {job['_id']} replanifié dans {delay}s (tentative {job['attempts']}): {error}")
+
+    async def _dead_letter(self, job: Dict[str, Any], error: str):
+        now = datetime.utcnow()
+        await self.db[self.DEAD_LETTER_COLLECTION].insert_one({
+            **{k: v for k, v in job.items() if k not in ("_id", "active")},
+            "job_id": job["_id"],
+            "last_error": error,
+            "dead_at": now
+        })
+        await self.collection.update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {"status": "dead", "last_error": error, "updated_at": now},
+                "$unset": {"active": "", "lease_owner": "", "lease_expires_at": ""}
+            }
+        )
+        # Plus aucun worker ne l'exécutera : la tâche ne doit pas rester « running »
+        await self.db.scraping_tasks.update_one(
+            {"_id": ObjectId(job["task_id"]), "status": {"$nin": ["completed", "failed"]}},
+            {"$set": {"status": "failed", "updated_at": now, "metadata.error": error}}
+        )
+        logger.error(f"Job {job['_id']} (tâche {job['task_id']}) placé en dead letter: {error}")
+
+    async def cancel(self, task_id: str) -> int:
+        """Retire les jobs en attente d'une tâche"""
+        result = await self.collection.update_many(
+            # active fait partie du filtre pour que l'index partiel task_id serve
+            {"task_id": task_id, "active": True, "status": "queued"},
+            {
+                "$set": {"status": "cancelled", "updated_at": datetime.utcnow()},
+                "$unset": {"active": ""}
+            }
+        )
+        return result.modified_count
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+    async def get_stats(self) -> Dict[str, int]:
+        stats = {}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            stats[row["_id"]] = row["count"]
+        return stats
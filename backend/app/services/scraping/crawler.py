@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from urllib.parse import urljoin, urlsplit
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core import metrics
+from app.models.scraping_task import CrawlConfig
+from app.services.scraping.frontier import CrawlFrontier, FrontierLink, normalize_url
+from app.services.scraping.robots import RobotsCache, RobotsUnavailable
+from app.services.scraping.strategies.static_strategy import StaticStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class Crawler:
+    """Exploration multi-pages : liste de départ, pages de liste, fiches détail
+
+    Les URLs découvertes passent par les règles de liens (sélecteur, allow,
+    deny, priorité) puis par la frontière MongoDB, qui déduplique et ordonne.
+    Plusieurs pages sont visitées en parallèle ; robots.txt et le délai entre
+    deux requêtes sur un même hôte sont respectés.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, strategy: StaticStrategy, robots: Optional[RobotsCache] = None):
+        self.db = db
+        self.strategy = strategy
+        self.robots = robots or RobotsCache.get_instance()
+        self._next_slot: Dict[str, float] = {}
+
+    async def ensure_indexes(self):
+        await CrawlFrontier.ensure_indexes(self.db)
+
+    async def is_resumable(self, task_id: str) -> bool:
+        return await CrawlFrontier.is_resumable(self.db, task_id)
+
+    async def forget(self, task_id: str):
+        """Supprime la frontière et l'état d'exploration d'une tâche"""
+        await CrawlFrontier.delete(self.db, task_id)
+
+    async def crawl(self, task_id: str, url: str, config: Dict[str, Any]) -> AsyncIterator[Tuple[int, str, List[Dict[str, Any]]]]:
+        """Produit (index, url, éléments) pour chaque page visitée, dans l'ordre de visite"""
+        crawl = CrawlConfig(**(config.get('crawl') or {}))
+        frontier = CrawlFrontier(self.db, task_id, crawl.max_urls)
+        await frontier.ensure_indexes(self.db)
+        await frontier.open(url)
+
+        rules = [
+            (rule, re.compile(rule.allow) if rule.allow else None, re.compile(rule.deny) if rule.deny else None)
+            for rule in crawl.link_rules
+        ]
+        seed_host = urlsplit(url).hostname
+        concurrency = max(1, crawl.concurrency or settings.CRAWL_CONCURRENCY)
+        pages: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        state = {"in_flight": 0, "visited": 0, "added": 0, "done": False}
+
+        async def worker():
+            while not state["done"]:
+                added = state["added"]
+                state["in_flight"] += 1
+                try:
+                    entry = await frontier.pop()
+                    if entry is not None:
+                        items = await self._visit(frontier, entry, config, crawl, rules, seed_host, state)
+                        if items is not None:
+                            await pages.put((entry["url"], items))
+                        state["visited"] += 1
+                        if state["visited"] % settings.CRAWL_STATE_SAVE_INTERVAL == 0:
+                            await frontier.save()
+                        continue
+                finally:
+                    state["in_flight"] -= 1
+                if state["in_flight"] == 0 and state["added"] == added:
+                    # Frontière vide, aucune page en cours ni lien ajouté depuis : exploration
+                    # terminée, sauf s'il reste des URLs remises à plus tard
+                    wait = await frontier.next_deferred()
+                    if wait is None:
+                        state["done"] = True
+                    else:
+                        await asyncio.sleep(min(max(wait, 0.1), 1.0))
+                else:
+                    await asyncio.sleep(0.1)
+
+        async def run_workers():
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            try:
+                await asyncio.gather(*workers)
+                await pages.put(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await pages.put(e)
+            finally:
+                for task in workers:
+                    task.cancel()
+
+        runner = asyncio.create_task(run_workers())
+        index = 0
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                yield index, page[0], page[1]
+                index += 1
+            await frontier.save("completed")
+            logger.info(f"Exploration de la tâche {task_id} terminée: {await frontier.get_stats()}")
+        except BaseException:
+            state["done"] = True
+            runner.cancel()
+            await frontier.save("interrupted")
+            raise
+
+    async def _visit(
+        self,
+        frontier: CrawlFrontier,
+        entry: Dict[str, Any],
+        config: Dict[str, Any],
+        crawl: CrawlConfig,
+        rules: List[Tuple[Any, Optional[re.Pattern], Optional[re.Pattern]]],
+        seed_host: Optional[str],
+        state: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Visite une page de la frontière, ajoute ses liens, retourne ses éléments
+
+        Une page en erreur est marquée comme telle sans interrompre l'exploration.
+        Tant que robots.txt est indisponible, la page est remise dans la file
+        (CRAWL_ROBOTS_MAX_ATTEMPTS essais) au lieu d'être bloquée.
+        """
+        url = entry["url"]
+        if crawl.respect_robots:
+            try:
+                allowed = await self.robots.can_fetch(url)
+            except RobotsUnavailable as e:
+                attempts = entry.get("robots_attempts", 0) + 1
+                if attempts >= settings.CRAWL_ROBOTS_MAX_ATTEMPTS:
+                    metrics.incr("crawl.failed")
+                    await frontier.mark(entry, "failed", error=str(e))
+                else:
+                    metrics.incr("crawl.robots_deferred")
+                    await frontier.defer(entry, e.retry_after, robots_attempts=attempts)
+                return None
+            if not allowed:
+                metrics.incr("crawl.robots_blocked")
+                await frontier.mark(entry, "blocked")
+                return None
+
+        delay = max(crawl.delay, settings.CRAWL_DEFAULT_DELAY)
+        if crawl.respect_robots:
+            delay = max(delay, await self.robots.crawl_delay(url))
+        await self._wait_turn(urlsplit(url).netloc, delay)
+
+        rule = rules[entry["rule"]][0] if entry.get("rule") is not None else None
+        page_config = config
+        if rule is not None and not rule.extract:
+            page_config = dict(config, selectors={})
+        elif rule is not None and rule.selectors:
+            page_config = dict(config, selectors=rule.selectors)
+        follow = [link_rule.selector for link_rule, _, _ in rules] if entry["depth"] < crawl.max_depth else None
+
+        try:
+            page = await self.strategy._extract_page(url, page_config, missing_ok=True, follow=follow)
+        except Exception as e:
+            metrics.incr("crawl.failed")
+            await frontier.mark(entry, "failed", error=str(e))
+            return None
+        if page is None:
+            await frontier.mark(entry, "missing")
+            return None
+
+        links: List[FrontierLink] = []
+        for rule_index, hrefs in enumerate(page["follow"]):
+            link_rule, allow, deny = rules[rule_index]
+            for href in hrefs:
+                target = urljoin(url, href.strip())
+                parts = urlsplit(target)
+                if parts.scheme not in ("http", "https"):
+                    continue
+                if crawl.same_host and parts.hostname != seed_host:
+                    continue
+                if (allow and not allow.search(target)) or (deny and deny.search(target)):
+                    continue
+                links.append((normalize_url(target), entry["depth"] + 1, link_rule.priority, rule_index))
+        if links:
+            added = await frontier.add(links)
+            state["added"] += added
+            metrics.incr("crawl.links_enqueued", added)
+
+        metrics.incr("crawl.pages")
+        await frontier.mark(entry, "done", items=len(page["items"]))
+        return page["items"]
+
+    async def _wait_turn(self, host: str, delay: float):
+        """Espace les requêtes vers un même hôte d'au moins delay secondes"""
+        if delay <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + delay
+        if slot > now:
+            metrics.observe("crawl.politeness_wait_seconds", slot - now)
+            await asyncio.sleep(slot - now)
@@ -0,0 +1,168 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+import soupsieve as sv
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_SPACE_RE = re.compile(r'\s+([,.!?])')
+# Sélecteurs dont on sait isoler le dernier composé sans ambiguïté (pas d'attributs ni de pseudo-classes)
+_SIMPLE_SELECTOR_RE = re.compile(r'^[\w\-.#\s>+~,*]+$')
+_COMBINATOR_RE = re.compile(r'[\s>+~]+')
+_COMPOUND_RE = re.compile(r'^(\*|[A-Za-z][\w-]*)?((?:[.#][\w-]+)*)$')
+
+# Pré-filtre : alternatives (balise ou None, classes en minuscules, classes exactes)
+# et indicateur « exact » quand le filtre suffit à décider (un seul composé balise/classes)
+Alternative = Tuple[Optional[str], FrozenSet[str], FrozenSet[str]]
+Guard = Tuple[Tuple[Alternative, ...], bool]
+
+
+def clean_text(text: str) -> Optional[str]:
+    """Nettoie le texte extrait"""
+    if not text:
+        return None
+    # Supprime les espaces multiples et les retours à la ligne,
+    # puis les espaces avant la ponctuation
+    return _PUNCTUATION_SPACE_RE.sub(r'\1', ' '.join(text.split()))
+
+
+def _build_guard(selector: str) -> Optional[Guard]:
+    """Condition nécessaire (balise, classes) déduite du composé le plus à droite
+
+    Retourne None si le sélecteur est trop complexe : l'élément est alors
+    toujours soumis au sélecteur compilé.
+    """
+    if not _SIMPLE_SELECTOR_RE.match(selector):
+        return None
+    alternatives = []
+    exact = '#' not in selector
+    for part in selector.split(','):
+        compounds = [c for c in _COMBINATOR_RE.split(part.strip()) if c]
+        if not compounds:
+            return None
+        match = _COMPOUND_RE.match(compounds[-1])
+        if not match:
+            return None
+        exact = exact and len(compounds) == 1
+        tag = match.group(1)
+        classes = frozenset(token[1:] for token in re.findall(r'\.[\w-]+', match.group(2)))
+        alternatives.append((
+            tag.lower() if tag and tag != '*' else None,
+            frozenset(c.lower() for c in classes),
+            classes
+        ))
+    return tuple(alternatives), exact
+
+
+def _check_guard(element: Tag, guard: Guard) -> Optional[bool]:
+    """False : l'élément ne peut pas correspondre, True : il correspond, None : à vérifier"""
+    alternatives, exact = guard
+    name = element.name
+    element_classes = None
+    candidate = False
+    for tag, lower_classes, classes in alternatives:
+        if tag is not None and tag != name:
+            continue
+        if lower_classes:
+            if element_classes is None:
+                element_classes = set(element.get('class', ()))
+            # En mode quirks, soupsieve compare les classes sans tenir compte de la casse
+            if not classes <= element_classes:
+                if lower_classes <= {c.lower() for c in element_classes}:
+                    candidate = True
+                continue
+        if exact:
+            return True
+        candidate = True
+    return None if candidate else False
+
+
+class CompiledExtractor:
+    """Sélecteurs d'une configuration compilés une fois, extraction en un seul parcours
+
+    Pour chaque conteneur, le sous-arbre est parcouru une seule fois et chaque
+    élément est testé contre tous les champs (après un pré-filtre balise/classes),
+    au lieu d'un container.select() par champ. Les sélecteurs simples (balise et
+    classes) sont décidés par le pré-filtre sans passer par soupsieve. Le résultat
+    est identique à l'extraction champ par champ : mêmes éléments, même ordre,
+    même nettoyage.
+    """
+
+    def __init__(self, selectors: Dict[str, str]):
+        self.container = sv.compile(selectors.get('item_container', 'body'))
+        self.fields: List[Tuple[str, Any, Optional[Guard], bool]] = []
+        for field, selector in selectors.items():
+            if field == 'item_container':
+                continue
+            try:
+                compiled = sv.compile(selector)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'extraction du champ {field}: {str(e)}")
+                compiled = None
+            # :scope désigne le conteneur : seul select() sur le conteneur l'interprète correctement
+            scoped = ':scope' in selector
+            self.fields.append((field, compiled, _build_guard(selector), scoped))
+        self._walked = [
+            (index, compiled, guard)
+            for index, (_, compiled, guard, scoped) in enumerate(self.fields)
+            if compiled is not None and not scoped
+        ]
+
+    def _collect(self, container: Tag) -> List[List[Tag]]:
+        matches: List[List[Tag]] = [[] for _ in self.fields]
+        walked = self._walked
+        if not walked:
+            return matches
+        for element in container.descendants:
+            if not isinstance(element, Tag):
+                continue
+            for index, compiled, guard in walked:
+                if guard is not None:
+                    verdict = _check_guard(element, guard)
+                    if verdict is False:
+                        continue
+                    if verdict is True:
+                        matches[index].append(element)
+                        continue
+                if compiled.match(element):
+                    matches[index].append(element)
+        return matches
+
+    def extract(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        containers = self.container.select(soup)
+        logger.info(f"Nombre de conteneurs trouvés: {len(containers)}")
+
+        data = []
+        for container in containers:
+            matches = self._collect(container)
+            item_data = {}
+            for index, (field, compiled, _, scoped) in enumerate(self.fields):
+                if compiled is None:
+                    item_data[field] = None
+                    continue
+                elements = compiled.select(container) if scoped else matches[index]
+                if elements:
+                    if len(elements) > 1:
+                        # Pour les champs qui peuvent avoir plusieurs valeurs
+                        item_data[field] = [clean_text(el.get_text()) for el in elements]
+                    else:
+                        item_data[field] = clean_text(elements[0].get_text())
+                else:
+                    item_data[field] = None
+
+            if any(item_data.values()):
+                data.append(item_data)
+        return data
+
+
+@lru_cache(maxsize=64)
+def _compiled_extractor(selector_items: Tuple[Tuple[str, str], ...]) -> CompiledExtractor:
+    return CompiledExtractor(dict(selector_items))
+
+
+def get_extractor(selectors: Dict[str, str]) -> CompiledExtractor:
+    """Extracteur compilé, mis en cache par processus pour une configuration donnée"""
+    return _compiled_extractor(tuple(selectors.items()))
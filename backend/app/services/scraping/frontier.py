@@ -0,0 +1,279 @@
+import hashlib
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.database.indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_UINT64 = 1 << 64
+
+# (URL normalisée, profondeur, priorité, index de la règle qui l'a découverte)
+FrontierLink = Tuple[str, int, int, Optional[int]]
+
+
+def normalize_url(url: str) -> str:
+    """Forme canonique utilisée pour la déduplication
+
+    Schéma et hôte en minuscules, sans fragment ni port par défaut, chemin
+    vide remplacé par « / ». La requête est conservée telle quelle.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def url_digest(url: str) -> Tuple[int, int]:
+    """Empreinte 128 bits d'une URL normalisée
+
+    Retourne deux entiers 64 bits signés (type long de MongoDB) : la clé de
+    la frontière et un second hachage utilisé par le filtre de Bloom.
+    """
+    digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big", signed=True), int.from_bytes(digest[8:], "big", signed=True)
+
+
+class BloomFilter:
+    """Ensemble probabiliste des URLs déjà vues, quelques bits par URL
+
+    Un test négatif est certain ; un test positif peut être un faux positif
+    (error_rate) et doit être confirmé par la frontière.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytes] = None, count: int = 0):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(64, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def _positions(self, digest: Tuple[int, int]):
+        # Double hachage (Kirsch-Mitzenmacher) à partir des deux moitiés de l'empreinte
+        first = digest[0] % _UINT64
+        second = (digest[1] % _UINT64) | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, digest: Tuple[int, int]):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: Tuple[int, int]) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": Binary(bytes(self.bits))
+        }
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "BloomFilter":
+        return cls(document["capacity"], document["error_rate"], bytes(document["bits"]), document.get("count", 0))
+
+
+class CrawlFrontier:
+    """Frontière d'exploration d'une tâche, stockée dans MongoDB
+
+    Les URLs à visiter sont des documents (task_id, url_key) uniques, triés par
+    priorité puis profondeur ; seul le filtre de Bloom des URLs vues reste en
+    mémoire. Le filtre et les compteurs sont sauvegardés dans crawl_state, ce
+    qui permet de reprendre une exploration interrompue.
+    """
+    COLLECTION = "crawl_frontier"
+    STATE_COLLECTION = "crawl_state"
+    _indexes_ready = False
+
+    def __init__(self, db: AsyncIOMotorDatabase, task_id: str, max_urls: int):
+        self.db = db
+        self.task_id = task_id
+        self.max_urls = max(1, min(max_urls, settings.CRAWL_MAX_URLS))
+        self.seen: Optional[BloomFilter] = None
+        self.enqueued = 0
+
+    @property
+    def collection(self):
+        return self.db[self.COLLECTION]
+
+    @property
+    def state_collection(self):
+        return self.db[self.STATE_COLLECTION]
+
+    @classmethod
+    async def ensure_indexes(cls, db: AsyncIOMotorDatabase):
+        if cls._indexes_ready:
+            return
+        await ensure_indexes(db, [cls.COLLECTION])
+        cls._indexes_ready = True
+
+    @classmethod
+    async def delete(cls, db: AsyncIOMotorDatabase, task_id: str):
+        await db[cls.COLLECTION].delete_many({"task_id": task_id})
+        await db[cls.STATE_COLLECTION].delete_one({"_id": task_id})
+
+    @classmethod
+    async def is_resumable(cls, db: AsyncIOMotorDatabase, task_id: str) -> bool:
+        state = await db[cls.STATE_COLLECTION].find_one({"_id": task_id}, {"status": 1})
+        return state is not None and state.get("status") != "completed"
+
+    async def open(self, seed_url: str) -> bool:
+        """Charge l'état d'une exploration interrompue, ou en démarre une nouvelle
+
+        Retourne True en cas de reprise.
+        """
+        state = await self.state_collection.find_one({"_id": self.task_id})
+        if state and state.get("status") != "completed":
+            self.enqueued = state.get("enqueued", 0)
+            if state.get("bloom"):
+                self.seen = BloomFilter.from_document(state["bloom"])
+            else:
+                await self._rebuild_seen()
+            # Les pages en cours lors de l'interruption sont de nouveau à visiter
+            await self.collection.update_many(
+                {"task_id": self.task_id, "status": "in_progress"},
+                {"$set": {"status": "queued"}}
+            )
+            logger.info(f"Reprise de l'exploration de la tâche {self.task_id}: {self.enqueued} URLs déjà découvertes")
+            return True
+
+        await self.delete(self.db, self.task_id)
+        self.seen = BloomFilter(self.max_urls, settings.CRAWL_BLOOM_ERROR_RATE)
+        self.enqueued = 0
+        await self.add([(normalize_url(seed_url), 0, 0, None)])
+        await self.save()
+        return False
+
+    async def _rebuild_seen(self):
+        """Reconstruit le filtre de Bloom à partir des clés de la frontière"""
+        self.seen = BloomFilter(self.max_urls, settings.CRAWL_BLOOM_ERROR_RATE)
+        cursor = self.collection.find({"task_id": self.task_id}, {"url_key": 1, "url_key2": 1, "_id": 0})
+        async for document in cursor:
+            self.seen.add((document["url_key"], document["url_key2"]))
+
+    async def add(self, links: List[FrontierLink]) -> int:
+        """Ajoute les URLs jamais vues, retourne le nombre d'URLs ajoutées"""
+        candidates: Dict[int, Tuple[Tuple[int, int], FrontierLink]] = {}
+        maybe_seen = []
+        for link in links:
+            digest = url_digest(link[0])
+            if digest[0] in candidates:
+                continue
+            candidates[digest[0]] = (digest, link)
+            if digest in self.seen:
+                maybe_seen.append(digest[0])
+
+        if maybe_seen:
+            # Le filtre ne donne qu'une présomption : la frontière tranche, en une requête
+            cursor = self.collection.find(
+                {"task_id": self.task_id, "url_key": {"$in": maybe_seen}},
+                {"url_key": 1, "_id": 0}
+            )
+            async for document in cursor:
+                candidates.pop(document["url_key"], None)
+
+        remaining = self.max_urls - self.enqueued
+        if not candidates or remaining <= 0:
+            return 0
+
+        now = datetime.utcnow()
+        documents = []
+        for digest, (url, depth, priority, rule) in list(candidates.values())[:remaining]:
+            documents.append({
+                "task_id": self.task_id,
+                "url_key": digest[0],
+                "url_key2": digest[1],
+                "url": url,
+                "depth": depth,
+                "priority": priority,
+                "rule": rule,
+                "status": "queued",
+                "created_at": now
+            })
+        try:
+            result = await self.collection.insert_many(documents, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Doublons déjà présents : ignorés, les autres documents sont insérés
+            inserted = e.details.get("nInserted", 0)
+        for document in documents:
+            self.seen.add((document["url_key"], document["url_key2"]))
+        self.enqueued += inserted
+        return inserted
+
+    async def pop(self) -> Optional[Dict[str, Any]]:
+        """Prend la prochaine URL à visiter (priorité décroissante, puis profondeur)
+
+        Les URLs remises à plus tard (defer) sont ignorées jusqu'à leur échéance.
+        """
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"task_id": self.task_id, "status": "queued", "not_before": {"$not": {"$gt": now}}},
+            {"$set": {"status": "in_progress", "started_at": now}},
+            sort=[("priority", -1), ("depth", 1), ("_id", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def defer(self, entry: Dict[str, Any], delay: float, **fields: Any):
+        """Remet une URL dans la file, à visiter dans delay secondes au plus tôt"""
+        update = {"status": "queued", "not_before": datetime.utcnow() + timedelta(seconds=delay), **fields}
+        await self.collection.update_one({"_id": entry["_id"]}, {"$set": update})
+
+    async def next_deferred(self) -> Optional[float]:
+        """Secondes avant l'échéance de la prochaine URL remise à plus tard, None s'il n'y en a pas"""
+        document = await self.collection.find_one(
+            {"task_id": self.task_id, "status": "queued", "not_before": {"$exists": True}},
+            {"not_before": 1},
+            sort=[("not_before", 1)]
+        )
+        if document is None:
+            return None
+        return max(0.0, (document["not_before"] - datetime.utcnow()).total_seconds())
+
+    async def mark(self, entry: Dict[str, Any], status: str, items: int = 0, error: Optional[str] = None):
+        update: Dict[str, Any] = {"status": status, "items": items, "finished_at": datetime.utcnow()}
+        if error:
+            update["error"] = error
+        await self.collection.update_one({"_id": entry["_id"]}, {"$set": update})
+
+    async def save(self, status: str = "running"):
+        await self.state_collection.update_one(
+            {"_id": self.task_id},
+            {
+                "$set": {
+                    "status": status,
+                    "enqueued": self.enqueued,
+                    "max_urls": self.max_urls,
+                    "bloom": self.seen.to_document(),
+                    "updated_at": datetime.utcnow()
+                }
+            },
+            upsert=True
+        )
+
+    async def get_stats(self) -> Dict[str, int]:
+        pipeline = [
+            {"$match": {"task_id": self.task_id}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]
+        stats = {"enqueued": self.enqueued}
+        async for row in self.collection.aggregate(pipeline):
+            stats[row["_id"]] = row["count"]
+        return stats
@@ -1,61 +1,169 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from urllib.parse import urlparse
+import base64
 import logging
+from pymongo import UpdateOne
+from pymongo.errors import CollectionInvalid
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from app.services.llm.ollama_client import OllamaClient
-from app.models.scraping_task import ScrapingTask, ScrapingConfig
+from app.services.llm.config_cache import ScrapingConfigCache
+from app.models.scraping_task import ScrapingTask, ScrapingTaskSummary, ScrapingConfig
 from app.models.scraping_result import ScrapingResult
 from app.services.scraping.strategies.static_strategy import StaticStrategy
+from app.services.scraping.crawler import Crawler
+from app.services.scraping.result_store import ResultStore
+from app.services.export.result_exporter import ResultExporter
+from app.services.queue.job_queue import JobQueue
+from app.core.metrics import collect_metrics, TaskMetrics
+from app.database.indexes import ensure_indexes
 
 logger = logging.getLogger(__name__)
 
+# Champs retournés par la vue résumée de la liste des tâches
+TASK_SUMMARY_PROJECTION = {
+    "url": 1, "host": 1, "description": 1, "status": 1,
+    "created_at": 1, "updated_at": 1, "results_id": 1, "template_id": 1,
+    "metadata.error": 1
+}
+
+
+def task_host(url: str) -> Optional[str]:
+    return (urlparse(url).hostname or "").lower() or None
+
+
+def task_filters(
+    status: Optional[str] = None,
+    host: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Filtre MongoDB des tâches (liste paginée, export groupé)"""
+    filters: Dict[str, Any] = {}
+    if status:
+        filters["status"] = status
+    if host:
+        filters["host"] = host.lower()
+    if created_after or created_before:
+        filters["created_at"] = {}
+        if created_after:
+            filters["created_at"]["$gte"] = created_after
+        if created_before:
+            filters["created_at"]["$lt"] = created_before
+    return filters
+
+
+def encode_task_cursor(created_at: datetime, task_id: ObjectId) -> str:
+    """Curseur opaque de pagination : position (created_at, _id) de la dernière tâche"""
+    raw = f"{created_at.isoformat()}|{task_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_task_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, task_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), ObjectId(task_id)
+    except Exception:
+        raise ValueError("Curseur de pagination invalide")
+
+
 class ScrapingManager:
+    _hosts_ready = False
+
     def __init__(self, db: AsyncIOMotorDatabase):
-        self.ollama_client = OllamaClient()
+        self.config_cache = ScrapingConfigCache.get_instance(db)
+        self.ollama_client = OllamaClient(config_cache=self.config_cache)
         self.db = db
         self.static_strategy = StaticStrategy()  # Initialise la stratégie statique
+        self.crawler = Crawler(db, self.static_strategy)
+        self.result_store = ResultStore(db)
+        self.result_exporter = ResultExporter(db)
+        self.job_queue = JobQueue(db)
         logger.info(f"ScrapingManager initialisé avec la base de données: {db.name}")
 
     @classmethod
     async def create(cls, db: AsyncIOMotorDatabase) -> 'ScrapingManager':
-        """Factory method pour créer une instance avec initialisation asynchrone"""
+        """Factory method pour créer une instance avec initialisation asynchrone
+
+        À appeler une fois par processus (démarrage de l'API ou du worker),
+        l'instance est ensuite partagée.
+        """
         instance = cls(db)
         await instance._ensure_collections()
         return instance
 
     async def _ensure_collections(self):
-        """S'assure que les collections nécessaires existent"""
+        """S'assure que les collections et index nécessaires existent (idempotent)"""
         collections = await self.db.list_collection_names()
         logger.info(f"Collections existantes: {collections}")
         
-        if "scraping_tasks" not in collections:
-            await self.db.create_collection("scraping_tasks")
-            logger.info("Collection scraping_tasks créée")
-            
-        if "scraping_results" not in collections:
-            await self.db.create_collection("scraping_results")
-            logger.info("Collection scraping_results créée")
+        for name in ("scraping_tasks", "scraping_results"):
+            if name not in collections:
+                try:
+                    await self.db.create_collection(name)
+                    logger.info(f"Collection {name} créée")
+                except CollectionInvalid:
+                    # Créée entre-temps par un autre processus
+                    pass
+        
+        # Index de toutes les collections des services (registre app.database.indexes)
+        report = await ensure_indexes(self.db)
+        logger.info(f"Index vérifiés: {report['checked']}, en conflit: {report['conflicts']}")
+        await self._backfill_task_hosts()
+
+    async def _backfill_task_hosts(self):
+        """Renseigne le champ host des tâches créées avant son introduction"""
+        if ScrapingManager._hosts_ready:
+            return
+        operations = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"host": task_host(doc.get("url", ""))}})
+            async for doc in self.db.scraping_tasks.find({"host": {"$exists": False}}, {"url": 1})
+        ]
+        if operations:
+            await self.db.scraping_tasks.bulk_write(operations, ordered=False)
+            logger.info(f"Champ host renseigné pour {len(operations)} tâches")
+        ScrapingManager._hosts_ready = True
+
+    async def invalidate_config_cache(self, host: Optional[str] = None) -> int:
+        """Invalide les configurations LLM en cache (toutes, ou celles d'un hôte)"""
+        return await self.config_cache.invalidate(host=host)
 
     async def create_task(self, request: Dict[str, Any]) -> str:
         try:
             logger.info(f"Création d'une nouvelle tâche: {request}")
             
+            # Parseur et mode d'analyse demandés : vérifiés avant l'appel au LLM
+            ScrapingConfig.model_validate(request.get("config") or {}, context={"check_available": True})
+            
             # Crée un nouvel ObjectId pour la tâche
             task_id = ObjectId()
             
             # Analyse de la requête par le LLM
-            config = await self.ollama_client.analyze_request(request)
+            with collect_metrics() as analysis_metrics:
+                config = await self.ollama_client.analyze_request(request)
+            
+            # Le parseur choisi par l'utilisateur s'applique aussi à l'exécution
+            requested_parser = (request.get("config") or {}).get("parser")
+            if requested_parser:
+                config["parser"] = requested_parser
+            # De même pour le mode exploration, que le LLM ne propose pas
+            requested_crawl = (request.get("config") or {}).get("crawl")
+            if requested_crawl:
+                config["crawl"] = requested_crawl
             
             # Création de la tâche avec l'ID
             task = ScrapingTask(
                 id=str(task_id),  # Convertit l'ObjectId en string
                 url=request["url"],
+                host=task_host(request["url"]),
                 description=request["description"],
                 status="pending",
                 created_at=datetime.utcnow(),
-                config=ScrapingConfig(**config),
-                template_id=None
+                config=ScrapingConfig.model_validate(config, context={"check_available": True}),
+                template_id=None,
+                metadata={"analysis_metrics": analysis_metrics.to_dict()}
             )
             
             # Convertit l'objet en dictionnaire
@@ -91,30 +199,95 @@ class ScrapingManager:
             logger.error(f"Erreur lors de la récupération de la tâche {task_id}: {str(e)}")
             raise
 
+    async def get_results_summary(self, task_id: str) -> Dict[str, Any]:
+        """Document résumé des résultats d'une tâche (statut, métadonnées), sans les éléments"""
+        # Récupère d'abord la tâche pour vérifier l'existence du results_id
+        task = await self.get_task(task_id)
+        if not task:
+            raise ValueError("Tâche non trouvée")
+        
+        if not task.results_id:
+            raise ValueError("Aucun résultat disponible pour cette tâche")
+        
+        result = await self.db.scraping_results.find_one({"_id": ObjectId(task.results_id)})
+        if not result:
+            raise ValueError("Résultats non trouvés")
+        return result
+
     async def get_results(self, task_id: str) -> Optional[ScrapingResult]:
         """Récupère les résultats d'une tâche"""
         try:
-            # Récupère d'abord la tâche pour vérifier l'existence du results_id
-            task = await self.get_task(task_id)
-            if not task:
-                raise ValueError("Tâche non trouvée")
-            
-            if not task.results_id:
-                raise ValueError("Aucun résultat disponible pour cette tâche")
-            
-            # Récupère les résultats
-            result = await self.db.scraping_results.find_one({"_id": ObjectId(task.results_id)})
-            if not result:
-                raise ValueError("Résultats non trouvés")
+            result = await self.get_results_summary(task_id)
             
+            # Les éléments sont stockés à part, un document par élément
+            result["data"] = await self.result_store.load_items(task_id, result)
             return ScrapingResult.from_mongo(result)
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des résultats: {str(e)}")
             raise
 
+    async def get_results_page(
+        self,
+        task_id: str,
+        limit: int,
+        after: int = -1,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Une page d'éléments après le curseur after (seq), avec le curseur de la page suivante"""
+        try:
+            summary = await self.get_results_summary(task_id)
+            items = []
+            next_cursor = None
+            # Un élément de plus que demandé indique s'il reste une page
+            async for seq, item in self.result_store.iter_documents(task_id, summary, after, limit + 1, fields):
+                if len(items) == limit:
+                    next_cursor = last_seq
+                    break
+                items.append(item)
+                last_seq = seq
+            summary.pop("data", None)
+            return {
+                "id": str(summary["_id"]),
+                "task_id": task_id,
+                "status": summary.get("status"),
+                "metadata": summary.get("metadata", {}),
+                "items": items,
+                "next_cursor": next_cursor
+            }
+        except Exception as e:
+            logger.error(f"Erreur lors de la récupération des résultats: {str(e)}")
+            raise
+
+    async def enqueue_task(self, task_id: str) -> Optional[str]:
+        """Place une tâche dans la file d'exécution traitée par les workers"""
+        task = await self.get_task(task_id)
+        if not task:
+            raise ValueError("Tâche non trouvée")
+        
+        job_id = await self.job_queue.enqueue(task_id)
+        if job_id:
+            await self.db.scraping_tasks.update_one(
+                {"_id": ObjectId(task_id)},
+                {"$set": {"metadata.job_id": job_id, "updated_at": datetime.utcnow()}}
+            )
+        return job_id
+
+    async def interrupt_task(self, task_id: str):
+        """Tâche interrompue sans erreur (arrêt d'un worker) : de nouveau en attente d'exécution"""
+        await self.db.scraping_tasks.update_one(
+            {"_id": ObjectId(task_id), "status": "running"},
+            {"$set": {"status": "pending", "updated_at": datetime.utcnow()}}
+        )
+
     async def execute_task(self, task_id: str):
         """Exécute une tâche de scraping"""
+        with collect_metrics() as execution_metrics:
+            await self._execute_task(task_id, execution_metrics)
+
+    async def _execute_task(self, task_id: str, execution_metrics: TaskMetrics):
+        """Corps de execute_task, les métriques collectées sont enregistrées dans la tâche"""
+        results_id = None
         try:
             # Met à jour le statut
             await self.db.scraping_tasks.update_one(
@@ -133,32 +306,84 @@ class ScrapingManager:
             scraping_config = task.config.dict()
             logger.info(f"Configuration de scraping: {scraping_config}")
             
-            # Exécute le scraping avec la stratégie appropriée
+            # Crée le document résumé ; les éléments sont écrits par lots dans
+            # scraping_items pendant l'extraction. Une exploration interrompue
+            # reprend dans le résumé et à la suite des éléments de l'exécution précédente
             start_time = datetime.utcnow()
-            data = await self.static_strategy.extract_data(
-                str(task.url),
-                scraping_config
+            crawling = bool((scraping_config.get('crawl') or {}).get('enabled'))
+            previous = None
+            if crawling and await self.crawler.is_resumable(task_id):
+                previous = await self.db.scraping_results.find_one(
+                    {"task_id": task_id, "status": {"$in": ["running", "failed"]}, "data": {"$exists": False}},
+                    sort=[("created_at", -1)]
+                )
+            if previous:
+                results_id = previous["_id"]
+                await self.db.scraping_results.update_one(
+                    {"_id": results_id},
+                    {"$set": {"status": "running", "updated_at": start_time}}
+                )
+                writer = self.result_store.writer(
+                    task_id,
+                    results_id,
+                    await self.result_store.next_seq(task_id),
+                    previous.get("metadata", {}).get("fields")
+                )
+            else:
+                # Les résultats d'une exécution précédente sont remplacés ; sans
+                # ses éléments, une exploration repart de zéro
+                await self.result_store.reset(task_id)
+                await self.result_exporter.invalidate(task_id)
+                if crawling:
+                    await self.crawler.forget(task_id)
+                results_id = await self.result_store.create_summary(
+                    task_id, {"url": str(task.url), "config_used": scraping_config}
+                )
+                writer = self.result_store.writer(task_id, results_id)
+            await self.db.scraping_tasks.update_one(
+                {"_id": ObjectId(task_id)},
+                {"$set": {"results_id": str(results_id)}}
             )
+            
+            # Exécute le scraping avec la stratégie appropriée : pages dans l'ordre,
+            # ou pages visitées par l'exploration
+            pages = (previous or {}).get("metadata", {}).get("pages", 0)
+            if crawling:
+                page_iterator = self.crawler.crawl(task_id, str(task.url), scraping_config)
+            else:
+                page_iterator = self.static_strategy.iter_pages(str(task.url), scraping_config)
+            async for _, page_url, items in page_iterator:
+                pages += 1
+                await writer.add(items)
+                await self.db.scraping_results.update_one(
+                    {"_id": results_id},
+                    {"$set": {"updated_at": datetime.utcnow()}, "$inc": {"metadata.pages": 1}}
+                )
+                logger.info(f"Tâche {task_id}: page {pages} ({page_url}) traitée, {len(items)} éléments")
+            await writer.flush()
+            # seq est contigu depuis 0 : c'est le nombre d'éléments stockés
+            total_items = writer.seq
             end_time = datetime.utcnow()
             processing_time = (end_time - start_time).total_seconds()
             
-            # Sauvegarde les résultats
-            result = {
-                "task_id": task_id,
-                "data": data,
-                "status": "completed",
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
-                "metadata": {
-                    "total_items": len(data),
-                    "extraction_date": datetime.utcnow().isoformat(),
-                    "processing_time": processing_time,
-                    "url": str(task.url),
-                    "config_used": scraping_config
+            # Finalise les résultats
+            await self.db.scraping_results.update_one(
+                {"_id": results_id},
+                {
+                    # Champ par champ : metadata.fields, tenu par le writer, est conservé
+                    "$set": {
+                        "status": "completed",
+                        "updated_at": datetime.utcnow(),
+                        "metadata.total_items": total_items,
+                        "metadata.pages": pages,
+                        "metadata.extraction_date": datetime.utcnow().isoformat(),
+                        "metadata.processing_time": processing_time,
+                        "metadata.url": str(task.url),
+                        "metadata.config_used": scraping_config,
+                        "metadata.metrics": execution_metrics.to_dict()
+                    }
                 }
-            }
-            
-            results_id = await self.db.scraping_results.insert_one(result)
+            )
             
             # Met à jour la tâche
             await self.db.scraping_tasks.update_one(
@@ -167,22 +392,32 @@ class ScrapingManager:
                     "$set": {
                         "status": "completed",
                         "updated_at": datetime.utcnow(),
-                        "results_id": str(results_id.inserted_id)
+                        "results_id": str(results_id),
+                        "metadata.execution_metrics": execution_metrics.to_dict()
                     }
                 }
             )
             
-            logger.info(f"Tâche {task_id} terminée avec succès. {len(data)} éléments extraits.")
+            logger.info(f"Tâche {task_id} terminée avec succès. {total_items} éléments extraits sur {pages} pages.")
+            
+            # Fichiers d'export préparés à l'avance (EXPORT_PREBUILD_FORMATS)
+            await self.result_exporter.prebuild(task_id)
             
         except Exception as e:
             logger.error(f"Erreur lors de l'exécution de la tâche {task_id}: {str(e)}")
+            if results_id is not None:
+                await self.db.scraping_results.update_one(
+                    {"_id": results_id},
+                    {"$set": {"status": "failed", "updated_at": datetime.utcnow()}}
+                )
             await self.db.scraping_tasks.update_one(
                 {"_id": ObjectId(task_id)},
                 {
                     "$set": {
                         "status": "failed",
                         "updated_at": datetime.utcnow(),
-                        "metadata.error": str(e)
+                        "metadata.error": str(e),
+                        "metadata.execution_metrics": execution_metrics.to_dict()
                     }
                 }
             )
@@ -190,29 +425,67 @@ class ScrapingManager:
 
     async def get_all_tasks(self) -> List[ScrapingTask]:
         """Récupère toutes les tâches"""
+        tasks, _, _ = await self.list_tasks()
+        return tasks
+
+    async def list_tasks(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        host: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        summary: bool = False
+    ) -> Tuple[List[Any], Optional[str], Optional[int]]:
+        """Tâches des plus récentes aux plus anciennes, filtrées et paginées
+
+        La pagination se fait par position (created_at, _id) et non par
+        décalage : chaque page est une lecture d'index, quelle que soit sa
+        profondeur. Retourne (tâches, curseur de la page suivante, total des
+        tâches filtrées) ; le total n'est calculé que pour une liste paginée.
+        summary omet config et metadata (ScrapingTaskSummary).
+        """
         try:
-            cursor = self.db.scraping_tasks.find()
+            filters = task_filters(status, host, created_after, created_before)
+
+            query = dict(filters)
+            if cursor:
+                created_at, task_id = decode_task_cursor(cursor)
+                position = {"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": task_id}}
+                ]}
+                query = {"$and": [filters, position]} if filters else position
+
+            documents = self.db.scraping_tasks.find(
+                query,
+                TASK_SUMMARY_PROJECTION if summary else None,
+                sort=[("created_at", -1), ("_id", -1)],
+                limit=limit + 1 if limit else 0
+            )
+            model = ScrapingTaskSummary if summary else ScrapingTask
             tasks = []
-            async for doc in cursor:
-                # Convertit l'ObjectId en string et l'inclut dans le document
-                doc['_id'] = str(doc['_id'])
-                # Crée un dictionnaire avec toutes les données nécessaires
-                task_dict = {
-                    'id': doc['_id'],  # Utilise 'id' au lieu de '_id'
-                    'url': doc['url'],
-                    'description': doc['description'],
-                    'status': doc['status'],
-                    'created_at': doc['created_at'],
-                    'updated_at': doc.get('updated_at'),
-                    'config': doc.get('config', {}),
-                    'results_id': doc.get('results_id'),
-                    'template_id': doc.get('template_id'),
-                    'metadata': doc.get('metadata', {})
-                }
-                tasks.append(ScrapingTask(**task_dict))
-            
+            next_cursor = None
+            async for doc in documents:
+                if limit and len(tasks) == limit:
+                    next_cursor = encode_task_cursor(last["created_at"], last["_id"])
+                    break
+                last = doc
+                if summary:
+                    doc["error"] = doc.pop("metadata", {}).get("error")
+                tasks.append(model(**{**doc, "_id": str(doc["_id"])}))
+
+            total = None
+            if limit:
+                counted = await self.db.scraping_tasks.aggregate([
+                    {"$match": filters},
+                    {"$count": "total"}
+                ]).to_list(1)
+                total = counted[0]["total"] if counted else 0
+
             logger.info(f"Nombre de tâches récupérées: {len(tasks)}")
-            return tasks
+            return tasks, next_cursor, total
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des tâches: {str(e)}")
             raise
@@ -225,13 +498,17 @@ class ScrapingManager:
             if not task:
                 raise ValueError("Tâche non trouvée")
 
-            # Supprime les résultats associés si ils existent
-            if task.results_id:
-                try:
-                    await self.db.scraping_results.delete_one({"_id": ObjectId(task.results_id)})
-                    logger.info(f"Résultats de la tâche {task_id} supprimés")
-                except Exception as e:
-                    logger.warning(f"Erreur lors de la suppression des résultats: {str(e)}")
+            # Supprime les résultats associés (résumés et éléments)
+            try:
+                await self.result_store.reset(task_id)
+                await self.result_exporter.invalidate(task_id)
+                logger.info(f"Résultats de la tâche {task_id} supprimés")
+            except Exception as e:
+                logger.warning(f"Erreur lors de la suppression des résultats: {str(e)}")
+
+            # Retire les exécutions encore en attente et l'état d'exploration
+            await self.job_queue.cancel(task_id)
+            await self.crawler.forget(task_id)
 
             # Supprime la tâche
             try:
@@ -274,8 +551,8 @@ class ScrapingManager:
             
             logger.info(f"Tâche {task_id} réinitialisée pour nouvelle tentative")
             
-            # Exécute la tâche
-            await self.execute_task(task_id)
+            # Replace la tâche dans la file d'exécution
+            await self.enqueue_task(task_id)
             
         except Exception as e:
             logger.error(f"Erreur lors de la relance de la tâche {task_id}: {str(e)}")
@@ -0,0 +1,89 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_TYPES = ("next_link", "url_template", "offset", "cursor")
+DEFAULT_NEXT_SELECTOR = "a[rel~=next], link[rel~=next]"
+
+
+def _with_query_params(url: str, params: Dict[str, Any]) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    query.extend((k, str(v)) for k, v in params.items())
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+class PaginationPlan:
+    """Décrit comment passer d'une page à la suivante à partir de navigation_rules
+
+    Règles reconnues (clé "type") :
+    - next_link : suit le lien désigné par next_selector (attribut href)
+    - url_template : "?page={n}" ou "/page/{n}/", n = start + index * step
+    - offset : paramètre param = start + index * step, step (nombre d'éléments
+      par page) obligatoire
+    - cursor : paramètre param = valeur lue via cursor_selector/cursor_attribute
+    La page d'index 0 est toujours l'URL de la tâche, telle quelle.
+    """
+
+    def __init__(self, url: str, config: Dict[str, Any]):
+        rules = config.get('navigation_rules') or {}
+        self.url = url
+        self.type = rules.get('type') or ('url_template' if rules.get('url_template') else 'next_link')
+        if self.type not in PAGINATION_TYPES:
+            raise ValueError(f"Type de pagination non supporté: {self.type}")
+        # max_pages vient de la configuration utilisateur : borné par la limite globale
+        self.max_pages = max(1, min(int(config.get('max_pages') or settings.PAGINATION_MAX_PAGES), settings.PAGINATION_MAX_PAGES))
+        self.next_selector = rules.get('next_selector') or DEFAULT_NEXT_SELECTOR
+        self.url_template = rules.get('url_template') or "?page={n}"
+        if self.type == 'url_template' and "{n}" not in self.url_template and "{page}" not in self.url_template:
+            raise ValueError(f"Modèle d'URL de pagination sans {{n}} ni {{page}}: {self.url_template}")
+        self.param = rules.get('param') or ('offset' if self.type == 'offset' else 'cursor')
+        self.start = int(rules.get('start', 0 if self.type == 'offset' else 1))
+        if self.type == 'offset' and not rules.get('step'):
+            # Un pas de 1 relirait presque entièrement la page précédente
+            raise ValueError("Pagination par offset: 'step' (nombre d'éléments par page) est obligatoire")
+        self.step = int(rules.get('step', 1))
+        if self.step < 1:
+            raise ValueError(f"Pas de pagination invalide: {self.step}")
+        self.cursor_selector = rules.get('cursor_selector')
+        self.cursor_attribute = rules.get('cursor_attribute') or 'data-cursor'
+
+    @property
+    def known_in_advance(self) -> bool:
+        """Les URLs peuvent être calculées sans lire les pages précédentes"""
+        return self.type in ("url_template", "offset")
+
+    def page_url(self, index: int) -> str:
+        if index == 0:
+            return self.url
+        value = self.start + index * self.step
+        if self.type == "offset":
+            return _with_query_params(self.url, {self.param: value})
+        # Pas de str.format : les autres accolades de l'URL ({id}, JSON...) restent telles quelles
+        target = self.url_template.replace("{n}", str(value)).replace("{page}", str(value))
+        if target.startswith("?") or target.startswith("&"):
+            return _with_query_params(self.url, dict(parse_qsl(target.lstrip("?&"), keep_blank_values=True)))
+        return urljoin(self.url, target)
+
+    def planned_urls(self) -> List[str]:
+        if not self.known_in_advance:
+            return [self.url]
+        return [self.page_url(index) for index in range(self.max_pages)]
+
+    def link_selectors(self) -> Dict[str, Tuple[str, str]]:
+        """Valeurs à lire sur chaque page pour trouver la suivante : nom -> (sélecteur, attribut)"""
+        if self.type == "next_link":
+            return {"next": (self.next_selector, "href")}
+        if self.type == "cursor" and self.cursor_selector:
+            return {"cursor": (self.cursor_selector, self.cursor_attribute)}
+        return {}
+
+    def next_url(self, current_url: str, links: Dict[str, Optional[str]]) -> Optional[str]:
+        if self.type == "next_link" and links.get("next"):
+            return urljoin(current_url, links["next"])
+        if self.type == "cursor" and links.get("cursor"):
+            return _with_query_params(self.url, {self.param: links["cursor"]})
+        return None
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from bs4 import BeautifulSoup
+from app.services.scraping.extraction import clean_text, get_extractor
+
+logger = logging.getLogger(__name__)
+
+# Ce module est importé par les processus du pool : il ne dépend ni de la
+# configuration ni de MongoDB, seulement des bibliothèques d'analyse HTML.
+# Les sélecteurs compilés (get_extractor) sont donc mis en cache par processus.
+
+STRUCTURE_TAGS = ['div', 'span', 'p', 'a', 'h1', 'h2', 'h3', 'section']
+
+
+LinkSelectors = Dict[str, Tuple[str, str]]
+PageLinks = Tuple[Dict[str, Optional[str]], List[List[str]]]
+
+
+def _extract_with_soup(
+    html: str,
+    selectors: Dict[str, str],
+    parser: str,
+    links: Optional[LinkSelectors],
+    follow: Optional[List[str]]
+) -> Tuple[List[Dict[str, Any]], PageLinks]:
+    soup = BeautifulSoup(html, parser)
+    found = {}
+    for name, (selector, attribute) in (links or {}).items():
+        element = soup.select_one(selector)
+        found[name] = element.get(attribute) if element is not None else None
+    hrefs = [
+        [element['href'] for element in soup.select(selector) if element.get('href')]
+        for selector in follow or []
+    ]
+    return get_extractor(selectors).extract(soup), (found, hrefs)
+
+
+def _extract_with_selectolax(
+    html: str,
+    selectors: Dict[str, str],
+    links: Optional[LinkSelectors],
+    follow: Optional[List[str]]
+) -> Tuple[List[Dict[str, Any]], PageLinks]:
+    from selectolax.parser import HTMLParser
+
+    tree = HTMLParser(html)
+    found = {}
+    for name, (selector, attribute) in (links or {}).items():
+        node = tree.css_first(selector)
+        found[name] = node.attributes.get(attribute) if node is not None else None
+    hrefs = [
+        [node.attributes['href'] for node in tree.css(selector) if node.attributes.get('href')]
+        for selector in follow or []
+    ]
+    containers = tree.css(selectors.get('item_container', 'body'))
+    logger.info(f"Nombre de conteneurs trouvés: {len(containers)}")
+
+    data = []
+    for container in containers:
+        item_data = {}
+        for field, selector in selectors.items():
+            if field != 'item_container':
+                try:
+                    elements = container.css(selector)
+                    if elements:
+                        if len(elements) > 1:
+                            item_data[field] = [clean_text(el.text(deep=True)) for el in elements]
+                        else:
+                            item_data[field] = clean_text(elements[0].text(deep=True))
+                    else:
+                        item_data[field] = None
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction du champ {field}: {str(e)}")
+                    item_data[field] = None
+
+        if any(item_data.values()):
+            data.append(item_data)
+    return data, (found, hrefs)
+
+
+def extract_items(
+    html: str,
+    selectors: Dict[str, str],
+    parser: str = "html.parser",
+    links: Optional[LinkSelectors] = None,
+    follow: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Analyse la page et extrait un élément par conteneur (exécuté dans le pool)
+
+    links associe un nom à (sélecteur, attribut) : la valeur du premier élément
+    correspondant est retournée, par exemple le href du lien « page suivante ».
+    follow est une liste de sélecteurs de liens : pour chacun, tous les href
+    trouvés sont retournés dans le même ordre (exploration multi-pages).
+    """
+    started = time.perf_counter()
+    if parser == "selectolax":
+        items, (found, hrefs) = _extract_with_selectolax(html, selectors, links, follow)
+    else:
+        items, (found, hrefs) = _extract_with_soup(html, selectors, parser, links, follow)
+    return {"items": items, "links": found, "follow": hrefs, "parse_time": time.perf_counter() - started}
+
+
+def collect_class_paths(html: str, parser: str = "html.parser") -> Dict[str, Any]:
+    """Collecte les chemins tag.classes des éléments qui pourraient contenir des données"""
+    started = time.perf_counter()
+    paths = set()
+    if parser == "selectolax":
+        from selectolax.parser import HTMLParser
+
+        for node in HTMLParser(html).css(", ".join(STRUCTURE_TAGS)):
+            classes = (node.attributes.get("class") or "").split()
+            if classes:
+                paths.add(f"{node.tag}.{'.'.join(classes)}")
+    else:
+        soup = BeautifulSoup(html, parser)
+        for tag in soup.find_all(STRUCTURE_TAGS):
+            classes = tag.get('class', [])
+            if classes:
+                paths.add(f"{tag.name}.{'.'.join(classes)}")
+    return {"class_paths": sorted(paths), "parse_time": time.perf_counter() - started}
+
+
+class ParsingPool:
+    """Exécute l'analyse HTML hors de la boucle asyncio
+
+    Les petites pages passent par un pool de threads (pas de coût de
+    sérialisation), les pages au-delà du seuil par un pool de processus pour
+    ne pas être limitées par le GIL.
+    """
+    _instance: Optional["ParsingPool"] = None
+
+    def __init__(self, processes: int, threads: int, process_threshold: int):
+        self.processes = processes
+        self.process_threshold = process_threshold
+        self.thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="html-parse")
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def get_instance(cls) -> "ParsingPool":
+        if cls._instance is None:
+            from app.core.config import settings
+
+            cls._instance = cls(
+                settings.PARSER_PROCESSES,
+                settings.PARSER_THREADS,
+                settings.PARSE_PROCESS_THRESHOLD
+            )
+        return cls._instance
+
+    @classmethod
+    def shutdown(cls):
+        if cls._instance:
+            cls._instance.close()
+            cls._instance = None
+
+    def _executor(self, size: int):
+        if self.processes <= 0 or size < self.process_threshold:
+            return self.thread_pool
+        if self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.process_pool
+
+    async def run(self, func: Callable[..., Dict[str, Any]], html: str, *args) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(len(html)), func, html, *args)
+
+    async def run_in_thread(self, func: Callable[..., Any], *args) -> Any:
+        """Exécute une fonction dans le pool de threads (objets non sérialisables)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, func, *args)
+
+    def close(self):
+        self.thread_pool.shutdown(wait=False)
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.database.indexes import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStore:
+    """Stockage des résultats : un document résumé et un document par élément
+
+    Le résumé (scraping_results) porte le statut et les métadonnées ; les
+    éléments sont dans scraping_items, un document par élément numéroté par
+    seq, indexé par (task_id, seq). Aucun document ne grossit avec le nombre
+    d'éléments, et la lecture peut se faire par tranches dans l'ordre.
+    Les anciens résultats (tableau data dans le résumé) restent lisibles,
+    voir app/scripts/migrate_results_to_items.py pour les convertir.
+    """
+    ITEMS_COLLECTION = "scraping_items"
+    _indexes_ready = False
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+
+    @property
+    def items(self):
+        return self.db[self.ITEMS_COLLECTION]
+
+    async def ensure_indexes(self):
+        if ResultStore._indexes_ready:
+            return
+        await ensure_indexes(self.db, ["scraping_results", self.ITEMS_COLLECTION])
+        ResultStore._indexes_ready = True
+
+    async def create_summary(self, task_id: str, metadata: Dict[str, Any]) -> ObjectId:
+        now = datetime.utcnow()
+        result = await self.db.scraping_results.insert_one({
+            "task_id": task_id,
+            "storage": "items",
+            "status": "running",
+            "created_at": now,
+            "updated_at": now,
+            "metadata": {**metadata, "total_items": 0, "pages": 0}
+        })
+        return result.inserted_id
+
+    async def reset(self, task_id: str):
+        """Supprime les éléments et résumés d'une tâche avant une nouvelle exécution"""
+        await self.items.delete_many({"task_id": task_id})
+        await self.db.scraping_results.delete_many({"task_id": task_id})
+
+    async def next_seq(self, task_id: str) -> int:
+        last = await self.items.find_one({"task_id": task_id}, {"seq": 1}, sort=[("seq", -1)])
+        return last["seq"] + 1 if last else 0
+
+    def writer(
+        self,
+        task_id: str,
+        results_id: ObjectId,
+        start_seq: int = 0,
+        known_fields: Optional[List[str]] = None
+    ) -> "ResultWriter":
+        """known_fields : metadata.fields déjà enregistrés, lors d'une reprise dans le même résumé"""
+        return ResultWriter(self, task_id, results_id, start_seq, settings.RESULTS_BATCH_SIZE, known_fields)
+
+    async def iter_documents(
+        self,
+        task_id: str,
+        summary: Optional[Dict[str, Any]] = None,
+        after_seq: int = -1,
+        limit: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """(seq, élément) d'une tâche dans l'ordre d'extraction, pour seq > after_seq
+
+        fields limite les champs de chaque élément (projection côté MongoDB).
+        """
+        if summary is not None and "data" in summary:
+            # Résultats non migrés : tableau data dans le résumé, seq = position
+            data = summary["data"][after_seq + 1:]
+            for offset, item in enumerate(data[:limit] if limit else data):
+                if fields:
+                    item = {key: item[key] for key in fields if key in item}
+                yield after_seq + 1 + offset, item
+            return
+        projection = {"_id": 0, "seq": 1}
+        if fields:
+            projection.update({f"data.{key}": 1 for key in fields})
+        else:
+            projection["data"] = 1
+        cursor = self.items.find(
+            {"task_id": task_id, "seq": {"$gt": after_seq}},
+            projection,
+            sort=[("seq", 1)],
+            limit=limit,
+            batch_size=settings.RESULTS_BATCH_SIZE
+        )
+        async for document in cursor:
+            yield document["seq"], document.get("data", {})
+
+    async def iter_items(
+        self,
+        task_id: str,
+        summary: Optional[Dict[str, Any]] = None,
+        after_seq: int = -1,
+        limit: int = 0,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Éléments d'une tâche dans l'ordre d'extraction (seq > after_seq)"""
+        async for _, item in self.iter_documents(task_id, summary, after_seq, limit, fields):
+            yield item
+
+    async def load_items(self, task_id: str, summary: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return [item async for item in self.iter_items(task_id, summary)]
+
+
+class ResultWriter:
+    """Écrit les éléments par lots insert_many pendant l'extraction
+
+    Le compteur metadata.total_items du résumé est incrémenté à chaque lot
+    écrit : il reflète toujours les éléments réellement stockés. Les clés
+    rencontrées sont ajoutées à metadata.fields (schéma et ordre des colonnes
+    des exports), dans leur ordre d'apparition.
+    """
+
+    def __init__(
+        self,
+        store: ResultStore,
+        task_id: str,
+        results_id: ObjectId,
+        start_seq: int,
+        batch_size: int,
+        known_fields: Optional[List[str]] = None
+    ):
+        self.store = store
+        self.task_id = task_id
+        self.results_id = results_id
+        self.seq = start_seq
+        self.batch_size = max(1, batch_size)
+        self.buffer: List[Dict[str, Any]] = []
+        self.written = 0
+        self.fields: Dict[str, None] = dict.fromkeys(known_fields or ())
+        self.new_fields: List[str] = []
+
+    async def add(self, items: List[Dict[str, Any]]):
+        for item in items:
+            self.buffer.append({"task_id": self.task_id, "seq": self.seq, "data": item})
+            for key in item:
+                if key not in self.fields:
+                    self.fields[key] = None
+                    self.new_fields.append(key)
+            self.seq += 1
+            if len(self.buffer) >= self.batch_size:
+                await self.flush()
+
+    async def flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        await self.store.items.insert_many(batch)
+        self.written += len(batch)
+        update = {
+            "$inc": {"metadata.total_items": len(batch)},
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+        if self.new_fields:
+            # $push garde l'ordre d'apparition ; self.fields (qui inclut les champs déjà
+            # enregistrés en cas de reprise) garantit qu'aucun champ n'est ajouté deux fois
+            update["$push"] = {"metadata.fields": {"$each": self.new_fields}}
+            self.new_fields = []
+        await self.store.db.scraping_results.update_one({"_id": self.results_id}, update)
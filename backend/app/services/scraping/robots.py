@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from app.core.config import settings
+from app.services.http.fetch_service import FetchService
+
+logger = logging.getLogger(__name__)
+
+# Hôte injoignable ou en erreur serveur : exploration suspendue, nouvel essai rapide
+_UNAVAILABLE_TTL = 60
+
+
+class RobotsUnavailable(Exception):
+    """robots.txt momentanément illisible (5xx, erreur réseau) : hôte suspendu, pas interdit"""
+
+    def __init__(self, origin: str, retry_after: float):
+        super().__init__(f"robots.txt indisponible pour {origin}")
+        self.origin = origin
+        self.retry_after = retry_after
+
+
+class RobotsCache:
+    """robots.txt analysés, mis en cache par origine (schéma + hôte)
+
+    Conforme à la RFC 9309 : toute réponse 4xx (401 et 403 compris) autorise
+    tout, 5xx ou erreur réseau interdisent tout jusqu'au prochain essai
+    (can_fetch lève alors RobotsUnavailable). Un seul téléchargement par
+    origine à la fois, le cache est borné (LRU).
+    """
+    _instance: Optional["RobotsCache"] = None
+
+    def __init__(self, fetcher: FetchService, ttl: int, max_hosts: int):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self.user_agent = settings.DEFAULT_HEADERS.get("User-Agent", "*")
+        # origine -> (règles, expiration, robots.txt lu ou réponse 4xx)
+        self._entries: "OrderedDict[str, Tuple[RobotFileParser, float, bool]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def get_instance(cls) -> "RobotsCache":
+        if cls._instance is None:
+            cls._instance = cls(FetchService.get_instance(), settings.ROBOTS_CACHE_TTL, settings.ROBOTS_CACHE_SIZE)
+        return cls._instance
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def _entry(self, url: str) -> Tuple[RobotFileParser, float, bool]:
+        origin = self._origin(url)
+        entry = self._entries.get(origin)
+        if entry and entry[1] > time.monotonic():
+            self._entries.move_to_end(origin)
+            return entry
+
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(origin)
+            if entry and entry[1] > time.monotonic():
+                return entry
+            parser, ttl, available = await self._fetch(origin)
+            entry = self._entries[origin] = (parser, time.monotonic() + ttl, available)
+            self._entries.move_to_end(origin)
+            while len(self._entries) > self.max_hosts:
+                evicted, _ = self._entries.popitem(last=False)
+                self._locks.pop(evicted, None)
+        return entry
+
+    async def get(self, url: str) -> RobotFileParser:
+        return (await self._entry(url))[0]
+
+    async def _fetch(self, origin: str) -> Tuple[RobotFileParser, float, bool]:
+        robots_url = f"{origin}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        try:
+            response = await self.fetcher.get(robots_url)
+        except Exception as e:
+            logger.warning(f"robots.txt inaccessible pour {origin}: {str(e)}")
+            parser.disallow_all = True
+            return parser, _UNAVAILABLE_TTL, False
+
+        if response.status == 200:
+            parser.parse(response.text.splitlines())
+            return parser, self.ttl, True
+        if 400 <= response.status < 500:
+            parser.allow_all = True
+            return parser, self.ttl, True
+        logger.warning(f"robots.txt en erreur pour {origin}: HTTP {response.status}")
+        parser.disallow_all = True
+        return parser, _UNAVAILABLE_TTL, False
+
+    async def can_fetch(self, url: str) -> bool:
+        """Vrai si robots.txt autorise l'URL
+
+        Lève RobotsUnavailable tant que robots.txt ne peut pas être lu : la
+        page doit être remise à plus tard, pas considérée comme interdite.
+        """
+        parser, expires, available = await self._entry(url)
+        if not available:
+            raise RobotsUnavailable(self._origin(url), max(0.0, expires - time.monotonic()))
+        return parser.can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, url: str) -> float:
+        """Délai demandé entre deux requêtes (Crawl-delay ou Request-rate), 0 sinon"""
+        parser = await self.get(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay:
+            return float(delay)
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return 0.0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hosts": len(self._entries)}
@@ -2,6 +2,7 @@ import httpx
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 import logging
+from app.services.scraping.pagination import PaginationPlan
 
 logger = logging.getLogger(__name__)
 
@@ -55,10 +56,5 @@ class StaticScrapingStrategy:
         """Gère la pagination si nécessaire"""
         if not config.get('pagination', False):
             return [url]
-            
-        urls = [url]
-        max_pages = config.get('max_pages', 1)
-        
-        # Ajouter la logique de pagination ici si nécessaire
         
-        return urls 
\ No newline at end of file
+        return PaginationPlan(url, config).planned_urls() 
\ No newline at end of file
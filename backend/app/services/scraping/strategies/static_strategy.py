@@ -1,68 +1,228 @@
-import aiohttp
-from bs4 import BeautifulSoup
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from urllib.parse import urlsplit
+import asyncio
 import logging
-import re
+import time
+from app.core.config import settings
+from app.core import metrics
+from app.services.http.fetch_service import FetchService, ResponseTooLarge, check_declared_size, sniff_charset
+from app.services.proxy.manager import ProxyManager
+from app.services.scraping.parsing import ParsingPool, extract_items
+from app.services.scraping.streaming import StreamingExtractor, streaming_unsupported
+from app.services.scraping.pagination import PaginationPlan
+from app.services.scraping.strategies.base import ScrapingStrategy
 
 logger = logging.getLogger(__name__)
 
-class StaticStrategy:
-    def _clean_text(self, text: str) -> str:
-        """Nettoie le texte extrait"""
-        if not text:
-            return None
-        # Supprime les espaces multiples et les retours à la ligne
-        cleaned = ' '.join(text.split())
-        # Supprime les espaces avant la ponctuation
-        cleaned = re.sub(r'\s+([,.!?])', r'\1', cleaned)
-        return cleaned
+class StaticStrategy(ScrapingStrategy):
+    def __init__(
+        self,
+        fetcher: Optional[FetchService] = None,
+        parsing_pool: Optional[ParsingPool] = None,
+        proxies: Optional[ProxyManager] = None
+    ):
+        self.fetcher = fetcher or FetchService.get_instance()
+        self.parsing_pool = parsing_pool or ParsingPool.get_instance()
+        self.proxies = proxies or (ProxyManager.get_instance() if settings.USE_PROXY else None)
+
+    @staticmethod
+    def _streaming(config: Dict[str, Any]) -> bool:
+        """Mode flux demandé et applicable à item_container, sinon analyse de la page entière"""
+        if not config.get('streaming'):
+            return False
+        reason = streaming_unsupported(config.get('selectors', {}).get('item_container', 'body'))
+        if reason:
+            logger.warning(f"Mode flux indisponible pour item_container ({reason}), analyse de la page entière")
+            return False
+        return True
 
     async def extract_data(self, url: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extrait les données d'une page web statique"""
+        if self._streaming(config):
+            data = []
+            async for batch in self.iter_items_streaming(url, config):
+                data.extend(batch)
+            return data
+        page = await self._extract_page(url, config)
+        return page["items"]
+
+    async def _extract_page(
+        self,
+        url: str,
+        config: Dict[str, Any],
+        links: Optional[Dict[str, Tuple[str, str]]] = None,
+        missing_ok: bool = False,
+        follow: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Télécharge et analyse une page, retourne ses éléments et les liens demandés
+
+        Avec missing_ok, une page 404 (au-delà de la dernière page) retourne None.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        raise Exception(f"Erreur HTTP {response.status}")
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    selectors = config.get('selectors', {})
-                    logger.info(f"Utilisation des sélecteurs: {selectors}")
-                    
-                    # Trouve tous les conteneurs
-                    containers = soup.select(selectors.get('item_container', 'body'))
-                    logger.info(f"Nombre de conteneurs trouvés: {len(containers)}")
-                    
-                    data = []
-                    for container in containers:
-                        item_data = {}
-                        for field, selector in selectors.items():
-                            if field != 'item_container':
-                                try:
-                                    elements = container.select(selector)
-                                    if elements:
-                                        if len(elements) > 1:
-                                            # Pour les champs qui peuvent avoir plusieurs valeurs
-                                            item_data[field] = [self._clean_text(el.get_text()) for el in elements]
-                                        else:
-                                            item_data[field] = self._clean_text(elements[0].get_text())
-                                    else:
-                                        item_data[field] = None
-                                except Exception as e:
-                                    logger.error(f"Erreur lors de l'extraction du champ {field}: {str(e)}")
-                                    item_data[field] = None
-                        
-                        if any(item_data.values()):
-                            data.append(item_data)
-                    
-                    logger.info(f"Données extraites: {data}")
-                    return data
-                    
+            response = await self.fetcher.get(url, proxies=self.proxies)
+            if response.status == 404 and missing_ok:
+                return None
+            if response.status != 200:
+                raise Exception(f"Erreur HTTP {response.status}")
+            
+            html = response.text
+            selectors = config.get('selectors', {})
+            parser = config.get('parser') or settings.DEFAULT_HTML_PARSER
+            logger.info(f"Utilisation des sélecteurs: {selectors} (parseur: {parser})")
+            
+            # L'analyse tourne dans le pool pour ne pas bloquer la boucle asyncio
+            result = await self.parsing_pool.run(extract_items, html, selectors, parser, links, follow)
+            metrics.observe("parse.seconds", result["parse_time"])
+            
+            logger.info(f"Données extraites de {url}: {len(result['items'])} éléments")
+            return result
+            
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des données: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def validate_url(self, url: str) -> bool:
+        """Valide l'URL avant le scraping"""
+        parts = urlsplit(url)
+        return parts.scheme in ("http", "https") and bool(parts.netloc)
+
+    async def handle_pagination(self, url: str, config: Dict[str, Any]) -> List[str]:
+        """URLs des pages connues à l'avance (gabarit d'URL ou offset), sinon [url]"""
+        if not config.get('pagination', False):
+            return [url]
+        return PaginationPlan(url, config).planned_urls()
+
+    async def iter_pages(self, url: str, config: Dict[str, Any]) -> AsyncIterator[Tuple[int, str, List[Dict[str, Any]]]]:
+        """Produit (index, url, éléments) pour chaque page, dans l'ordre des pages
+
+        Les pages dont l'URL est connue à l'avance sont téléchargées en parallèle
+        (PAGINATION_CONCURRENCY, en plus de la limite par hôte du FetchService) ;
+        les liens « suivant » et curseurs sont suivis séquentiellement. Une page
+        vide ou absente termine la pagination.
+        """
+        if not config.get('pagination', False):
+            yield 0, url, await self.extract_data(url, config)
+            return
+        
+        plan = PaginationPlan(url, config)
+        if self._streaming(config) and not plan.known_in_advance:
+            logger.warning("Pagination par lien ou curseur indisponible en mode flux, première page uniquement")
+            yield 0, url, await self.extract_data(url, config)
+            return
+        
+        if plan.known_in_advance:
+            async for page in self._iter_planned_pages(plan, config):
+                yield page
+            return
+        
+        seen = set()
+        page_url: Optional[str] = url
+        for index in range(plan.max_pages):
+            if page_url is None or page_url in seen:
+                break
+            seen.add(page_url)
+            page = await self._extract_page(page_url, config, plan.link_selectors(), missing_ok=index > 0)
+            if page is None or (index > 0 and not page["items"]):
+                break
+            metrics.incr("pagination.pages")
+            yield index, page_url, page["items"]
+            page_url = plan.next_url(page_url, page["links"])
+
+    async def _fetch_planned_page(self, plan: PaginationPlan, index: int, config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        page_url = plan.page_url(index)
+        if self._streaming(config):
+            items = []
+            async for batch in self.iter_items_streaming(page_url, config):
+                items.extend(batch)
+            return items
+        page = await self._extract_page(page_url, config, missing_ok=index > 0)
+        return page["items"] if page else None
+
+    async def _iter_planned_pages(self, plan: PaginationPlan, config: Dict[str, Any]) -> AsyncIterator[Tuple[int, str, List[Dict[str, Any]]]]:
+        concurrency = max(1, settings.PAGINATION_CONCURRENCY)
+        pending: Dict[int, asyncio.Task] = {}
+        next_to_launch = 0
+        try:
+            for index in range(plan.max_pages):
+                # Garde une fenêtre de pages en vol en avance sur la page attendue
+                while next_to_launch < plan.max_pages and len(pending) < concurrency:
+                    pending[next_to_launch] = asyncio.create_task(
+                        self._fetch_planned_page(plan, next_to_launch, config)
+                    )
+                    next_to_launch += 1
+                items = await pending.pop(index)
+                if items is None or (index > 0 and not items):
+                    break
+                metrics.incr("pagination.pages")
+                yield index, plan.page_url(index), items
+        finally:
+            for task in pending.values():
+                if task.done() and not task.cancelled():
+                    task.exception()  # Évite l'avertissement « exception never retrieved »
+                task.cancel()
+
+    async def iter_items_streaming(self, url: str, config: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Télécharge la page par morceaux et produit les éléments au fil de l'analyse
+
+        Le corps n'est jamais entièrement en mémoire : chaque morceau est fourni
+        au parseur incrémental lxml (dans le pool de threads) et les conteneurs
+        complets sont émis puis libérés.
+        """
+        selectors = config.get('selectors', {})
+        max_bytes = settings.MAX_RESPONSE_BYTES
+        proxy = await self.proxies.acquire() if self.proxies else None
+        started = time.monotonic()
+        try:
+            async with self.fetcher.stream("GET", url, proxy=proxy.url if proxy else None) as response:
+                if proxy:
+                    self.proxies.record_response(proxy, response.status, time.monotonic() - started)
+                    proxy = None
+                if response.status != 200:
+                    raise Exception(f"Erreur HTTP {response.status}")
+                check_declared_size(response.headers, max_bytes)
+                
+                extractor = None
+                received = 0
+                parse_time = 0.0
+                pending = b""
+                async for chunk in response.aiter_bytes(settings.STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    if max_bytes and received > max_bytes:
+                        raise ResponseTooLarge(f"Réponse trop volumineuse: plus de {max_bytes} octets")
+                    if extractor is None:
+                        # L'encodage est déterminé sur les premiers octets (BOM, en-tête, <meta>)
+                        pending += chunk
+                        if len(pending) < 4096:
+                            continue
+                        extractor = StreamingExtractor(selectors, sniff_charset(response.headers, pending))
+                        chunk, pending = pending, b""
+                    started = time.perf_counter()
+                    items = await self.parsing_pool.run_in_thread(extractor.feed, chunk)
+                    parse_time += time.perf_counter() - started
+                    if items:
+                        yield items
+                
+                if extractor is None:
+                    extractor = StreamingExtractor(selectors, sniff_charset(response.headers, pending))
+                    if pending:
+                        items = await self.parsing_pool.run_in_thread(extractor.feed, pending)
+                        if items:
+                            yield items
+                started = time.perf_counter()
+                items = await self.parsing_pool.run_in_thread(extractor.close)
+                parse_time += time.perf_counter() - started
+                if items:
+                    yield items
+                
+                metrics.observe("parse.seconds", parse_time)
+                metrics.incr("streaming.bytes", received)
+                logger.info(
+                    f"Analyse en flux de {url}: {received} octets, "
+                    f"{extractor.containers_found} conteneurs"
+                )
+        except Exception as e:
+            if proxy:
+                # Échec avant toute réponse : imputé au proxy
+                self.proxies.record(proxy, False, time.monotonic() - started)
+            logger.error(f"Erreur lors de l'extraction en flux des données: {str(e)}")
+            raise
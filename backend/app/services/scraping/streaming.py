@@ -0,0 +1,210 @@
+import codecs
+import logging
+from typing import Dict, Any, List, Optional
+from app.services.scraping.extraction import clean_text
+
+logger = logging.getLogger(__name__)
+
+# Encodages Python sans équivalent direct côté libxml2
+_LIBXML_ENCODINGS = {"utf-8-sig": "utf-8"}
+
+# Pseudo-classes qui dépendent des frères ou des enfants de l'élément
+_POSITIONAL_PREFIXES = ("nth-", "first-", "last-", "only-")
+_CHILD_PSEUDOS = ("empty",)
+
+
+def _unsupported_part(tree) -> Optional[str]:
+    """Première partie du sélecteur que l'arbre partiel ne permet pas d'évaluer"""
+    from cssselect.parser import CombinedSelector, Pseudo, Function, Relation
+
+    if isinstance(tree, CombinedSelector) and tree.combinator in ("+", "~"):
+        return f"combinateur « {tree.combinator} »"
+    if isinstance(tree, Relation):
+        return ":has()"
+    if isinstance(tree, (Pseudo, Function)):
+        name = (tree.ident if isinstance(tree, Pseudo) else tree.name).lower()
+        if name.startswith(_POSITIONAL_PREFIXES) or name in _CHILD_PSEUDOS:
+            return f":{name}"
+
+    children = [getattr(tree, attr, None) for attr in ("selector", "subselector")]
+    children.extend(getattr(tree, "selector_list", ()))
+    for child in children:
+        if child is not None:
+            part = _unsupported_part(child)
+            if part:
+                return part
+    return None
+
+
+def streaming_unsupported(css: str) -> Optional[str]:
+    """Raison pour laquelle item_container ne peut pas être reconnu en flux, None s'il le peut
+
+    Les frères précédents sont élagués et chaque conteneur terminé est retiré
+    de l'arbre : combinateurs de frères (+, ~) et pseudo-classes de position
+    (:nth-*, :first-*, :last-*, :only-*) donneraient un résultat faux sans
+    erreur. Les pseudo-classes portant sur les enfants (:has, :empty) ne
+    peuvent pas être évaluées à l'ouverture de la balise.
+    """
+    from cssselect import parse, SelectorError
+
+    try:
+        selectors = parse(css)
+    except SelectorError:
+        # Erreur signalée par l'extracteur lui-même
+        return None
+    for selector in selectors:
+        part = _unsupported_part(selector.parsed_tree)
+        if part:
+            return part
+    return None
+
+
+def _compound_xpath(translator, selector) -> str:
+    """Traduit un sélecteur (éventuellement combiné) en test XPath sur l'élément courant
+
+    Le composé le plus à droite porte sur l'élément lui-même, les composés
+    précédents deviennent des conditions sur ses ancêtres, déjà présents dans
+    l'arbre partiel au moment de l'événement « start ».
+    """
+    from cssselect.parser import CombinedSelector
+
+    if isinstance(selector, CombinedSelector):
+        right = _compound_xpath(translator, selector.subselector)
+        left = _compound_xpath(translator, selector.selector)
+        axis = {" ": "ancestor::*", ">": "parent::*"}[selector.combinator]
+        return f"{right}[{axis}[{left}]]"
+
+    expression = translator.xpath(selector)
+    element = expression.element or "*"
+    test = f"self::{element}"
+    if expression.condition:
+        test += f"[{expression.condition}]"
+    return test
+
+
+def css_to_element_test(css: str) -> str:
+    """XPath évalué sur un élément, vrai si l'élément correspond au sélecteur CSS"""
+    from cssselect import HTMLTranslator, parse
+
+    translator = HTMLTranslator()
+    tests = [_compound_xpath(translator, selector.parsed_tree) for selector in parse(css)]
+    return "boolean(" + " | ".join(tests) + ")"
+
+
+class StreamingExtractor:
+    """Extraction incrémentale : le HTML est fourni par morceaux à un parseur lxml
+
+    Chaque conteneur est reconnu à l'ouverture de sa balise, extrait dès sa
+    fermeture puis retiré de l'arbre. Le reste du document est élagué au fur et
+    à mesure, la mémoire reste donc proportionnelle à la profondeur du document
+    et non à sa taille. Limites : item_container ne peut utiliser que les
+    combinateurs de descendant et d'enfant, sans pseudo-classe de position ni
+    portant sur les enfants (voir streaming_unsupported, l'appelant revient
+    alors à l'analyse complète) ; les sélecteurs de champs sont relatifs au
+    conteneur.
+    """
+
+    def __init__(self, selectors: Dict[str, str], encoding: str):
+        from lxml import etree
+        from cssselect import HTMLTranslator
+
+        self._etree = etree
+        self._decoder = None
+        try:
+            self.parser = self._make_parser(_LIBXML_ENCODINGS.get(encoding, encoding))
+        except LookupError:
+            # Nom inconnu de libxml2 (euc_jp, mac-roman...) : décodage par Python, analyse en UTF-8
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            self.parser = self._make_parser("utf-8")
+        self.container_test = etree.XPath(css_to_element_test(selectors.get('item_container', 'body')))
+        translator = HTMLTranslator()
+        self.fields = []
+        for field, selector in selectors.items():
+            if field == 'item_container':
+                continue
+            try:
+                compiled = etree.XPath(translator.css_to_xpath(selector, prefix="descendant::"))
+            except Exception as e:
+                logger.error(f"Erreur lors de l'extraction du champ {field}: {str(e)}")
+                compiled = None
+            self.fields.append((field, compiled))
+        self._string_value = etree.XPath("string()")
+        self._open_containers: List[Any] = []
+        self.containers_found = 0
+
+    def _make_parser(self, encoding: str):
+        return self._etree.HTMLPullParser(
+            events=("start", "end"),
+            encoding=encoding,
+            recover=True,
+            huge_tree=True
+        )
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        if self._decoder is not None:
+            chunk = self._decoder.decode(chunk).encode("utf-8")
+        self.parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._decoder is not None:
+            self.parser.feed(self._decoder.decode(b"", final=True).encode("utf-8"))
+        try:
+            self.parser.close()
+        except self._etree.XMLSyntaxError:
+            pass
+        return self._drain()
+
+    def _extract(self, container) -> Optional[Dict[str, Any]]:
+        item_data = {}
+        for field, compiled in self.fields:
+            if compiled is None:
+                item_data[field] = None
+                continue
+            elements = compiled(container)
+            if elements:
+                if len(elements) > 1:
+                    # Pour les champs qui peuvent avoir plusieurs valeurs
+                    item_data[field] = [clean_text(self._string_value(el)) for el in elements]
+                else:
+                    item_data[field] = clean_text(self._string_value(elements[0]))
+            else:
+                item_data[field] = None
+        return item_data if any(item_data.values()) else None
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        items = []
+        for event, element in self.parser.read_events():
+            if not isinstance(element.tag, str):
+                continue  # Commentaires et instructions de traitement
+            if event == "start":
+                if self.container_test(element):
+                    self._open_containers.append(element)
+                continue
+
+            if self._open_containers and self._open_containers[-1] is element:
+                self._open_containers.pop()
+                self.containers_found += 1
+                item = self._extract(element)
+                if item:
+                    items.append(item)
+                if not self._open_containers:
+                    parent = element.getparent()
+                    if parent is not None:
+                        parent.remove(element)
+            elif not self._open_containers:
+                self._prune(element)
+        return items
+
+    @staticmethod
+    def _prune(element):
+        """Vide un élément fermé hors conteneur et retire ses frères précédents
+
+        Balise et attributs des ancêtres restent en place pour les sélecteurs
+        d'ancêtre ; les positions entre frères ne sont plus fiables.
+        """
+        del element[:]
+        element.text = None
+        parent = element.getparent()
+        while element.getprevious() is not None:
+            parent.remove(element.getprevious())
@@ -0,0 +1,282 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+from urllib.parse import urlparse
+import asyncio
+import logging
+import re
+import time
+from pymongo import UpdateOne
+from app.database.mongodb import get_database
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Forme reconnue d'un site_pattern ancré sur un hôte :
+# ^? schéma sous-domaines? hôte-littéral fin-d'hôte
+_SCHEME = re.compile(r"\^?http(?:s\??)?:(?:\\?/){2}")
+_HOST = re.compile(r"(?:[A-Za-z0-9-]+\\\.)+[A-Za-z0-9-]+")
+# Préfixes de sous-domaines admis : classes sans '/', ':' ni '@', le texte
+# entre le schéma et l'hôte littéral ne peut donc être qu'une suite de labels
+_SUBDOMAINS = tuple(
+    f"{opening}{label}\\.){quantifier}"
+    for opening in ("(", "(?:")
+    for label in ("www", "[\\w-]+", "[\\w\\-]+", "[a-z0-9-]+", "[a-z0-9\\-]+", "[a-zA-Z0-9-]+", "[a-zA-Z0-9\\-]+")
+    for quantifier in ("?", "*", "+")
+)
+# Fins d'hôte qui garantissent que l'hôte littéral est suivi de '/' ou de la fin de l'URL
+_HOST_ENDS = ("(/|$)", "(?:/|$)", "($|/)", "(?:$|/)", "(/.*)?$", "(?:/.*)?$")
+
+
+def _has_top_level_branch(pattern: str) -> bool:
+    """Vrai si le motif contient une alternative '|' hors de tout groupe"""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def pattern_host(pattern: str) -> Optional[str]:
+    """Hôte littéral sur lequel un site_pattern est ancré (sous-domaines éventuels compris)
+
+    Retourne None si le motif n'a pas une forme reconnue : il peut
+    alors correspondre à n'importe quel hôte. La reconnaissance est
+    volontairement stricte (les motifs « .*exemple.* » restent génériques) :
+    un motif classé sous un hôte ne doit jamais correspondre à une URL d'un
+    autre hôte.
+    """
+    if _has_top_level_branch(pattern):
+        return None
+    scheme = _SCHEME.match(pattern)
+    if not scheme:
+        return None
+    rest = pattern[scheme.end():]
+    for prefix in _SUBDOMAINS:
+        if rest.startswith(prefix):
+            rest = rest[len(prefix):]
+            break
+    host = _HOST.match(rest)
+    if not host:
+        return None
+    end = rest[host.end():].replace("\\/", "/")
+    if end == "$" or end.startswith(_HOST_ENDS) or (end[:1] == "/" and end[1:2] not in ("?", "*", "{")):
+        return host.group().replace("\\.", ".").lower()
+    return None
+
+
+class _Entry:
+    __slots__ = ("order", "regex", "template")
+
+    def __init__(self, order: int, regex: "re.Pattern", template: Dict[str, Any]):
+        self.order = order
+        self.regex = regex
+        self.template = template
+
+
+class TemplateIndex:
+    """Templates de scraping tenus en mémoire, classés par hôte, regex précompilées
+
+    Un template dont le site_pattern est ancré sur un hôte (https://www\\.site\\.com/...)
+    est rangé sous cet hôte : la recherche ne teste que les templates des
+    suffixes de l'hôte de l'URL, plus les motifs génériques. Le premier
+    template correspondant dans l'ordre de création est retenu, comme avec
+    un parcours complet de la collection.
+
+    L'index est rechargé quand la collection change : flux de modifications
+    MongoDB si disponible (replica set), sinon comparaison périodique
+    (TEMPLATE_INDEX_REFRESH_INTERVAL) du nombre de templates et de la
+    dernière date de mise à jour. Les compteurs d'utilisation sont accumulés
+    en mémoire puis écrits par lots toutes les TEMPLATE_USAGE_FLUSH_INTERVAL
+    secondes.
+    """
+    _instance: Optional["TemplateIndex"] = None
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self._by_host: Dict[str, List[_Entry]] = {}
+        self._generic: List[_Entry] = []
+        self._all: List[_Entry] = []
+        self._version: Optional[Tuple[int, Any]] = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._usage: Counter = Counter()
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def get_instance(cls) -> "TemplateIndex":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._instance:
+            await cls._instance.close()
+            cls._instance = None
+
+    def invalidate(self):
+        """Force le rechargement à la prochaine recherche (écriture faite par ce processus)"""
+        self._stale = True
+
+    async def _current_version(self) -> Tuple[int, Any]:
+        rows = await self.db.scraping_templates.aggregate([
+            {"$group": {"_id": None, "count": {"$sum": 1}, "updated_at": {"$max": "$updated_at"}}}
+        ]).to_list(1)
+        if not rows:
+            return 0, None
+        return rows[0]["count"], rows[0]["updated_at"]
+
+    async def load(self):
+        """Recharge tous les templates et recompile l'index"""
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if not self._stale:
+                return
+            # Marqué avant la lecture : un changement pendant le chargement provoquera un nouveau rechargement
+            self._stale = False
+            started = time.perf_counter()
+            try:
+                version = await self._current_version()
+                by_host: Dict[str, List[_Entry]] = {}
+                generic: List[_Entry] = []
+                entries: List[_Entry] = []
+                async for template in self.db.scraping_templates.find(sort=[("_id", 1)]):
+                    pattern = template.get("site_pattern") or ""
+                    try:
+                        regex = re.compile(pattern)
+                    except re.error as e:
+                        logger.warning(f"Template {template['_id']} ignoré, site_pattern invalide: {str(e)}")
+                        continue
+                    entry = _Entry(len(entries), regex, template)
+                    entries.append(entry)
+                    host = pattern_host(pattern)
+                    if host:
+                        by_host.setdefault(host, []).append(entry)
+                    else:
+                        generic.append(entry)
+            except Exception:
+                self._stale = True
+                raise
+            self._by_host, self._generic, self._all = by_host, generic, entries
+            self._version = version
+            self._loaded_at = time.monotonic()
+            logger.info(
+                f"Index des templates chargé en {time.perf_counter() - started:.3f}s: {len(entries)} templates, "
+                f"{len(by_host)} hôtes, {len(generic)} motifs génériques"
+            )
+        self._start_background()
+
+    def _start_background(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._flush_loop()),
+                asyncio.create_task(self._watch_loop())
+            ]
+
+    def _candidates(self, url: str) -> List[_Entry]:
+        host = urlparse(url).hostname
+        if not host:
+            # URL sans hôte : seul le parcours complet est sûr
+            return self._all
+        buckets = [self._generic]
+        labels = host.split(".")
+        for start in range(len(labels)):
+            bucket = self._by_host.get(".".join(labels[start:]))
+            if bucket:
+                buckets.append(bucket)
+        if len(buckets) == 1:
+            return self._generic
+        # Ordre de création conservé : le premier template correspondant est le même qu'avant
+        return sorted((entry for bucket in buckets for entry in bucket), key=lambda entry: entry.order)
+
+    async def match(self, url: str) -> Optional[Dict[str, Any]]:
+        """Premier template dont le site_pattern correspond à l'URL (re.match)"""
+        if self._stale:
+            await self.load()
+        for entry in self._candidates(url):
+            if entry.regex.match(url):
+                self._usage[entry.template["_id"]] += 1
+                return entry.template
+        return None
+
+    async def flush(self):
+        """Écrit les compteurs d'utilisation accumulés en un seul bulk_write"""
+        if not self._usage:
+            return
+        usage, self._usage = self._usage, Counter()
+        operations = [
+            UpdateOne({"_id": template_id}, {"$inc": {"usage_count": count}})
+            for template_id, count in usage.items()
+        ]
+        try:
+            await self.db.scraping_templates.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture des compteurs d'utilisation des templates: {str(e)}")
+            # Les compteurs seront réécrits au prochain lot
+            self._usage.update(usage)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.TEMPLATE_USAGE_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def _watch_loop(self):
+        """Flux de modifications si la base le permet, sinon comparaison périodique de version"""
+        if settings.TEMPLATE_CHANGE_STREAM:
+            # Les écritures de usage_count seules ne changent pas l'index
+            pipeline = [{"$match": {"$or": [
+                {"operationType": {"$ne": "update"}},
+                {"updateDescription.updatedFields.usage_count": {"$exists": False}}
+            ]}}]
+            try:
+                async with self.db.scraping_templates.watch(pipeline) as stream:
+                    logger.info("Index des templates: suivi par flux de modifications")
+                    # Changements survenus entre le chargement et l'ouverture du flux
+                    self._stale = True
+                    async for _ in stream:
+                        self._stale = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Serveur autonome (pas de replica set) ou flux interrompu
+                logger.info(f"Flux de modifications indisponible, suivi par comparaison de version: {str(e)}")
+                self._stale = True
+        while True:
+            await asyncio.sleep(settings.TEMPLATE_INDEX_REFRESH_INTERVAL)
+            try:
+                if await self._current_version() != self._version:
+                    self._stale = True
+            except Exception as e:
+                logger.warning(f"Impossible de vérifier la version des templates: {str(e)}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "templates": len(self._all),
+            "hosts": len(self._by_host),
+            "generic": len(self._generic),
+            "loaded_for": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "stale": self._stale,
+            "pending_usage": sum(self._usage.values())
+        }
@@ -1,13 +1,13 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-import re
 from app.models.template import ScrapingTemplate
 from app.database.mongodb import get_database
+from app.services.template.index import TemplateIndex
 from bson import ObjectId
 
 class TemplateManager:
-    def __init__(self):
-        self.db = get_database()
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
         
     async def create_template(self, template_data: Dict[str, Any]) -> str:
         """Crée un nouveau template de scraping"""
@@ -21,22 +21,19 @@ class TemplateManager:
         )
         
         result = await self.db.scraping_templates.insert_one(template.dict())
+        TemplateIndex.get_instance().invalidate()
         return str(result.inserted_id)
     
     async def find_matching_template(self, url: str) -> Optional[Dict[str, Any]]:
-        """Trouve un template compatible avec l'URL donnée"""
-        templates = await self.db.scraping_templates.find().to_list(None)
-        
-        for template in templates:
-            if re.match(template["site_pattern"], url):
-                # Incrémente le compteur d'utilisation
-                await self.db.scraping_templates.update_one(
-                    {"_id": template["_id"]},
-                    {"$inc": {"usage_count": 1}}
-                )
-                return template
-        
-        return None
+        """Trouve un template compatible avec l'URL donnée
+
+        Recherche dans l'index en mémoire (TemplateIndex) ; le compteur
+        d'utilisation est écrit par lots, en différé.
+        """
+        template = await TemplateIndex.get_instance().match(url)
+        if template is None:
+            return None
+        return {**template, "_id": str(template["_id"])}
     
     async def update_template(self, template_id: str, updates: Dict[str, Any]) -> bool:
         """Met à jour un template existant"""
@@ -45,11 +42,13 @@ class TemplateManager:
             {"_id": ObjectId(template_id)},
             {"$set": updates}
         )
+        TemplateIndex.get_instance().invalidate()
         return result.modified_count > 0
     
     async def get_templates(self, skip: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
         """Récupère la liste des templates avec pagination"""
-        return await self.db.scraping_templates.find() \
+        templates = await self.db.scraping_templates.find() \
             .skip(skip) \
             .limit(limit) \
-            .to_list(None) 
\ No newline at end of file
+            .to_list(None)
+        return [{**template, "_id": str(template["_id"])} for template in templates] 
\ No newline at end of file
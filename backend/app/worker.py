@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.database.mongodb import MongoDB
+from app.services.http.fetch_service import FetchService
+from app.services.proxy.manager import ProxyManager
+from app.services.proxy.prober import ProxyProber
+from app.services.scraping.parsing import ParsingPool
+from app.services.queue.job_queue import JobQueue
+from app.services.scraping.manager import ScrapingManager
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Exécute les jobs de la file avec N coroutines concurrentes par processus
+
+    À l'arrêt, les jobs en cours ont WORKER_SHUTDOWN_TIMEOUT secondes pour se
+    terminer ; au-delà ils sont interrompus et rendus à la file, leur tâche
+    repasse en attente.
+    """
+
+    def __init__(self, manager: ScrapingManager, queue: JobQueue, concurrency: int, worker_id: Optional[str] = None):
+        self.manager = manager
+        self.queue = queue
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = settings.QUEUE_POLL_INTERVAL
+        self.heartbeat_interval = settings.QUEUE_HEARTBEAT_INTERVAL
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        logger.info(f"Arrêt du worker {self.worker_id} demandé")
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"Worker {self.worker_id} démarré ({self.concurrency} slots)")
+        await self.queue.ensure_indexes()
+        slots = [asyncio.create_task(self._slot(index)) for index in range(self.concurrency)]
+        try:
+            await self._stopping.wait()
+            _, pending = await asyncio.wait(slots, timeout=settings.WORKER_SHUTDOWN_TIMEOUT)
+            if pending:
+                logger.warning(f"Worker {self.worker_id}: {len(pending)} jobs toujours en cours, interrompus")
+        finally:
+            for slot in slots:
+                slot.cancel()
+            await asyncio.gather(*slots, return_exceptions=True)
+        logger.info(f"Worker {self.worker_id} arrêté")
+
+    async def _slot(self, index: int):
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.lease(self.worker_id)
+            except Exception as e:
+                logger.error(f"Slot {index}: erreur lors de la location d'un job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Slot {index}: erreur lors du traitement du job {job['_id']}: {str(e)}")
+
+    async def _process(self, job: Dict[str, Any]):
+        task_id = job["task_id"]
+        logger.info(f"Job {job['_id']}: exécution de la tâche {task_id} (tentative {job['attempts']})")
+        lease_lost = asyncio.Event()
+        execution = asyncio.create_task(self.manager.execute_task(task_id))
+        heartbeat = asyncio.create_task(self._heartbeat(job, execution, lease_lost))
+        try:
+            await execution
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                # Arrêt du worker : job et tâche rendus à la file, sans compter de tentative
+                logger.warning(f"Job {job['_id']}: exécution interrompue par l'arrêt du worker, job rendu à la file")
+                await self.queue.release(job)
+                await self.manager.interrupt_task(task_id)
+                raise
+            # Le nouveau détenteur du bail est responsable du job et de la tâche
+            logger.warning(f"Job {job['_id']}: exécution interrompue (bail perdu)")
+        except Exception as e:
+            await self.queue.fail(job, str(e))
+        else:
+            await self.queue.complete(job)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job: Dict[str, Any], execution: asyncio.Task, lease_lost: asyncio.Event):
+        while not execution.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if not await self.queue.heartbeat(job):
+                    # Un autre worker a repris le job : on abandonne pour ne pas dupliquer le travail
+                    lease_lost.set()
+                    execution.cancel()
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat du job {job['_id']} en échec: {str(e)}")
+
+
+async def run_worker(concurrency: int):
+    started = time.perf_counter()
+    db = MongoDB.get_db()
+    await FetchService.get_instance().start()
+    ProxyProber.start_instance()
+    manager = await ScrapingManager.create(db)
+    worker = Worker(manager, JobQueue(db), concurrency)
+    logger.info(f"Worker initialisé en {time.perf_counter() - started:.3f}s")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass
+
+    try:
+        await worker.run()
+    finally:
+        await ProxyProber.shutdown()
+        await FetchService.shutdown()
+        ParsingPool.shutdown()
+        await ProxyManager.shutdown()
+        MongoDB.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Worker d'exécution des tâches de scraping")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Nombre de tâches exécutées simultanément par ce processus"
+    )
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.concurrency))
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from app.core.config import settings
+from app.services.export.artifact_cache import ExportArtifactCache
+from app.services.export.bulk_exporter import BulkExporter, _TarWriter, _ZipWriter
+from app.services.export.result_exporter import ResultExporter
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _write(writer, members):
+    data = b""
+    for name, parts, compress in members:
+        async for chunk in writer.add(name, sum(map(len, parts)), _chunks(*parts), compress):
+            data += chunk
+    async for chunk in writer.close():
+        data += chunk
+    return data
+
+
+MEMBERS = [
+    ("a.json", [b'[{"n": 1}', b"]"], True),
+    ("vide.csv", [], True),
+    ("b.parquet", [b"x" * 70000], False),
+]
+
+
+def test_tar_writer_produces_a_readable_archive():
+    data = asyncio.run(_write(_TarWriter(), MEMBERS))
+    assert len(data) % tarfile.RECORDSIZE == 0
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        assert archive.getnames() == ["a.json", "vide.csv", "b.parquet"]
+        assert archive.extractfile("a.json").read() == b'[{"n": 1}]'
+        assert archive.extractfile("vide.csv").read() == b""
+        assert archive.extractfile("b.parquet").read() == b"x" * 70000
+
+
+def test_zip_writer_produces_a_readable_archive():
+    data = asyncio.run(_write(_ZipWriter(), MEMBERS))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["a.json", "vide.csv", "b.parquet"]
+        assert archive.getinfo("a.json").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo("b.parquet").compress_type == zipfile.ZIP_STORED
+        assert archive.read("b.parquet") == b"x" * 70000
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_EXPORT_CONCURRENCY", 2)
+    db = AsyncMongoMockClient().db
+    task_ids = [str(ObjectId()) for _ in range(3)]
+
+    async def seed():
+        for index, task_id in enumerate(task_ids[:2]):
+            await db.scraping_tasks.insert_one({"_id": ObjectId(task_id), "created_at": index})
+            await db.scraping_results.insert_one({
+                "task_id": task_id, "storage": "items", "status": "completed" if index == 0 else "running",
+                "created_at": 1, "metadata": {"fields": ["n", "task_id"]}
+            })
+            await db.scraping_items.insert_many(
+                [{"task_id": task_id, "seq": n, "data": {"n": n, "task_id": "extrait"}} for n in range(3)]
+            )
+
+    asyncio.run(seed())
+    cache = ExportArtifactCache(str(tmp_path / "cache"), 10 ** 6)
+    return BulkExporter(db, ResultExporter(db, cache=cache)), task_ids
+
+
+async def _archive(bulk, task_ids, format, archive, layout):
+    output, content_type, extension = await bulk.export(task_ids, format, archive, layout)
+    return b"".join([chunk async for chunk in output]), content_type, extension
+
+
+def test_per_task_archive_with_manifest(exporter):
+    bulk, task_ids = exporter
+    data, content_type, extension = asyncio.run(_archive(bulk, task_ids, "ndjson", "zip", "per_task"))
+    assert (content_type, extension) == ("application/zip", "zip")
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.namelist() == [f"{task_ids[0]}.ndjson", f"{task_ids[1]}.ndjson", "manifest.json"]
+        rows = [json.loads(line) for line in archive.read(f"{task_ids[1]}.ndjson").splitlines()]
+        assert [row["n"] for row in rows] == [0, 1, 2]
+        manifest = json.loads(archive.read("manifest.json"))
+    assert [entry["task_id"] for entry in manifest["files"]] == task_ids[:2]
+    assert manifest["errors"] == [{"task_id": task_ids[2], "error": "Résultats non trouvés"}]
+
+
+def test_merged_archive_prefixes_rows_with_the_task_id(exporter):
+    bulk, task_ids = exporter
+    data, _, _ = asyncio.run(_archive(bulk, task_ids[:2], "csv", "tar", "merged"))
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        assert archive.getnames() == ["export.csv", "manifest.json"]
+        lines = archive.extractfile("export.csv").read().decode("utf-8").splitlines()
+    assert lines[0].split(",") == ["task_id", "n"]
+    assert [line.split(",")[0] for line in lines[1:]] == [task_ids[0]] * 3 + [task_ids[1]] * 3
+
+
+def test_invalid_parameters_are_rejected_before_streaming(exporter):
+    bulk, task_ids = exporter
+    for format, archive, layout in (("json", "rar", "per_task"), ("json", "zip", "melange"), ("pdf", "zip", "per_task")):
+        with pytest.raises(ValueError):
+            asyncio.run(bulk.export(task_ids, format, archive, layout))
+
+
+def test_find_task_ids_in_creation_order(exporter):
+    bulk, task_ids = exporter
+    assert asyncio.run(bulk.find_task_ids({}, 10)) == task_ids[:2]
+    assert asyncio.run(bulk.find_task_ids({}, 1)) == task_ids[:1]
@@ -0,0 +1,58 @@
+import asyncio
+from mongomock_motor import AsyncMongoMockClient
+from app.core.config import settings
+from app.services.llm.config_cache import ScrapingConfigCache
+
+PATHS = ["div.card", "div.card > h2.name", "ul.results-12"]
+CONFIG = {"selectors": {"item_container": "div.card"}}
+
+
+def _key(url="https://a.exemple.com/liste", paths=PATHS, description="Liste des fiches", model="mistral", version=1):
+    return ScrapingConfigCache.make_key(url, paths, description, model, version)
+
+
+def test_key_depends_on_host_model_and_prompt_version():
+    assert _key() == _key(url="https://A.exemple.com/autre-page")
+    assert _key() != _key(url="https://b.exemple.com/liste")
+    assert _key() != _key(model="llama3")
+    assert _key() != _key(version=2)
+
+
+def test_key_normalizes_generated_classes_and_description():
+    assert _key() == _key(paths=["ul.results-98", "div.card > h2.name", "div.card"])
+    assert _key() == _key(description="  liste   des FICHES ")
+
+
+def test_page_without_classes_is_not_cached():
+    assert _key(paths=[]) is None
+
+
+def test_invalidation_reaches_other_processes(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CONFIG_CACHE_SYNC_INTERVAL", 0)
+
+    async def scenario():
+        db = AsyncMongoMockClient().db
+        api = ScrapingConfigCache(db, ttl=3600, max_entries=10)
+        worker = ScrapingConfigCache(db, ttl=3600, max_entries=10)
+        key = _key()
+        await api.set(key, CONFIG, "https://a.exemple.com/liste")
+        assert await worker.get(key) == CONFIG  # Désormais dans le LRU du worker
+
+        assert await api.invalidate(host="a.exemple.com") == 1
+        assert await worker.get(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_lru_is_reused_between_synchronizations(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CONFIG_CACHE_SYNC_INTERVAL", 3600)
+
+    async def scenario():
+        db = AsyncMongoMockClient().db
+        cache = ScrapingConfigCache(db, ttl=3600, max_entries=10)
+        key = _key()
+        await cache.set(key, CONFIG, "https://a.exemple.com/liste")
+        await db.llm_config_cache.delete_many({})
+        assert await cache.get(key) == CONFIG
+
+    asyncio.run(scenario())
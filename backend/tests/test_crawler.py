@@ -0,0 +1,58 @@
+import asyncio
+from mongomock_motor import AsyncMongoMockClient
+from app.services.scraping.crawler import Crawler
+from app.services.scraping.robots import RobotsUnavailable
+
+SEED = "https://exemple.com/"
+CONFIG = {"selectors": {"item_container": "div"}, "crawl": {"enabled": True, "max_depth": 0}}
+
+
+class _Strategy:
+    def __init__(self):
+        self.visited = []
+
+    async def _extract_page(self, url, config, missing_ok=False, follow=None):
+        self.visited.append(url)
+        return {"items": [{"url": url}], "follow": [[] for _ in (follow or [])]}
+
+
+class _Robots:
+    """robots.txt indisponible pendant les `failures` premiers essais"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    async def can_fetch(self, url):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RobotsUnavailable("https://exemple.com", 0)
+        return True
+
+    async def crawl_delay(self, url):
+        return 0.0
+
+
+async def _crawl(robots):
+    db = AsyncMongoMockClient().db
+    strategy = _Strategy()
+    crawler = Crawler(db, strategy, robots)
+    pages = [page async for page in crawler.crawl("tache", SEED, CONFIG)]
+    statuses = {doc["url"]: doc["status"] async for doc in db.crawl_frontier.find({})}
+    return pages, statuses, strategy
+
+
+def test_unavailable_robots_defers_instead_of_blocking():
+    pages, statuses, strategy = asyncio.run(_crawl(_Robots(failures=2)))
+    assert [url for _, url, _ in pages] == [SEED]
+    assert statuses == {SEED: "done"}
+    assert strategy.visited == [SEED]
+
+
+def test_robots_unavailable_too_long_fails_the_page(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "CRAWL_ROBOTS_MAX_ATTEMPTS", 3)
+    pages, statuses, strategy = asyncio.run(_crawl(_Robots(failures=10)))
+    assert pages == []
+    assert statuses == {SEED: "failed"}
+    assert strategy.visited == []
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from app.api.routes import export
+from app.api.routes.export import _etag_matches, _parse_range
+from app.services.export.artifact_cache import ExportArtifactCache
+from app.services.export.result_exporter import ResultExporter
+
+TASK_ID = str(ObjectId())
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=90-", 100, (90, 99)),
+    ("bytes=90-500", 100, (90, 99)),
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=-500", 100, (0, 99)),
+    ("bytes=0-1,5-6", 100, None),
+    ("items=0-1", 100, None),
+    ("bytes=5", 100, None),
+])
+def test_parse_range(header, size, expected):
+    assert _parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=9-5", 100),
+    ("bytes=-0", 100),
+    ("bytes=-5", 0),
+    ("bytes=a-b", 100),
+])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(ValueError):
+        _parse_range(header, size)
+
+
+def test_etag_matches():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('W/"abc"', '"abc"')
+    assert _etag_matches('"x", "abc"', '"abc"')
+    assert _etag_matches(" * ", '"abc"')
+    assert not _etag_matches('"abcd"', '"abc"')
+
+
+@pytest.fixture
+def client(tmp_path):
+    db = AsyncMongoMockClient().db
+
+    async def seed():
+        await db.scraping_results.insert_one({
+            "task_id": TASK_ID, "storage": "items", "status": "completed",
+            "created_at": 1, "metadata": {"fields": ["n"]}
+        })
+        await db.scraping_items.insert_many([{"task_id": TASK_ID, "seq": n, "data": {"n": n}} for n in range(50)])
+
+    asyncio.run(seed())
+    app = FastAPI()
+    app.include_router(export.router)
+    app.state.result_exporter = ResultExporter(db, cache=ExportArtifactCache(str(tmp_path), 10 ** 6))
+    return TestClient(app)
+
+
+def test_first_download_is_streamed_then_served_from_the_cache(client):
+    first = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"})
+    assert first.status_code == 200
+    assert "etag" not in first.headers
+    body = first.content
+    assert [json.loads(line)["n"] for line in body.splitlines()] == list(range(50))
+
+    second = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"})
+    assert second.status_code == 200
+    assert second.content == body
+    assert second.headers["accept-ranges"] == "bytes"
+    assert second.headers["content-length"] == str(len(body))
+
+    cached = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"If-None-Match": second.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_range_and_if_range(client):
+    full = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"Range": "bytes=0-"})
+    body, etag = full.content, full.headers["etag"]
+
+    part = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"Range": "bytes=10-19"})
+    assert part.status_code == 206
+    assert part.content == body[10:20]
+    assert part.headers["content-range"] == f"bytes 10-19/{len(body)}"
+
+    same_version = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"Range": "bytes=-5", "If-Range": etag})
+    assert same_version.status_code == 206
+    assert same_version.content == body[-5:]
+
+    other_version = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"Range": "bytes=-5", "If-Range": '"ancien"'})
+    assert other_version.status_code == 200
+    assert other_version.content == body
+
+    outside = client.get(f"/export/{TASK_ID}", params={"format": "ndjson"}, headers={"Range": f"bytes={len(body)}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{len(body)}"
+
+
+def test_unknown_task_and_format(client):
+    assert client.get(f"/export/{ObjectId()}").status_code == 404
+    assert client.get(f"/export/{TASK_ID}", params={"format": "pdf"}).status_code == 400
+
+
+def test_exporter_missing_before_startup():
+    app = FastAPI()
+    app.include_router(export.router)
+    assert TestClient(app).get(f"/export/{TASK_ID}").status_code == 503
@@ -0,0 +1,198 @@
+import asyncio
+import csv
+import io
+import json
+import pytest
+from app.core.config import settings
+from app.services.export.base import flatten_value
+from app.services.export.manager import ExportManager
+
+ITEMS = [
+    {"titre": "Chaise", "prix": 12.5, "tags": ["bois", ["chêne", None]]},
+    {"titre": "Table, ronde", "stock": 3, "detail": {"l": 120}},
+    {"titre": None, "prix": 7, "stock": None},
+]
+
+
+def _source(items):
+    async def source():
+        for item in items:
+            yield item
+    return source
+
+
+async def _export(items, format, fields=None):
+    output, content_type, extension = await ExportManager().export_stream(_source(items), format, fields)
+    chunks = [chunk async for chunk in output]
+    return chunks, content_type, extension
+
+
+def export(items, format, fields=None):
+    chunks, _, _ = asyncio.run(_export(items, format, fields))
+    return chunks
+
+
+@pytest.fixture(autouse=True)
+def _small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_CHUNK_SIZE", 64)
+
+
+def test_flatten_value():
+    assert flatten_value(None) == ""
+    assert flatten_value(3) == 3
+    assert flatten_value(["a", ["b", None], ""]) == "a; b"
+    assert flatten_value({"é": 1}) == '{"é": 1}'
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        asyncio.run(_export(ITEMS, "pdf"))
+
+
+def test_json_is_streamed_in_chunks():
+    chunks = export(ITEMS * 5, "json")
+    assert len(chunks) > 1
+    assert json.loads(b"".join(chunks)) == ITEMS * 5
+
+
+def test_ndjson_one_object_per_line():
+    lines = b"".join(export(ITEMS, "ndjson")).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == ITEMS
+
+
+def test_csv_columns_are_the_union_of_keys_in_order():
+    chunks = export(ITEMS * 5, "csv")
+    assert len(chunks) > 1
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == ["titre", "prix", "tags", "stock", "detail"]
+    assert rows[1] == ["Chaise", "12.5", "bois; chêne", "", ""]
+    assert rows[2] == ["Table, ronde", "", "", "3", '{"l": 120}']
+    assert len(rows) == 16
+
+
+def test_csv_uses_the_known_fields():
+    rows = list(csv.reader(io.StringIO(b"".join(export(ITEMS, "csv", ["prix", "titre"])).decode("utf-8"))))
+    assert rows[0] == ["prix", "titre"]
+    assert rows[1] == ["12.5", "Chaise"]
+
+
+@pytest.mark.parametrize("format, expected", [
+    ("json", b"[]\n"),
+    ("ndjson", b""),
+    ("csv", b""),
+])
+def test_empty_input(format, expected):
+    assert b"".join(export([], format)) == expected
+
+
+def test_empty_input_with_known_fields_keeps_the_csv_header():
+    assert b"".join(export([], "csv", ["titre", "prix"])).decode("utf-8").splitlines() == ["titre,prix"]
+
+
+def _sheets(data):
+    """Valeurs des feuilles d'un classeur xlsx, lues dans le XML (chaînes en ligne ou partagées)"""
+    import zipfile
+    from lxml import etree
+
+    ns = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        shared = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            root = etree.fromstring(archive.read("xl/sharedStrings.xml"))
+            shared = ["".join(si.itertext()) for si in root.findall("m:si", ns)]
+        workbook = etree.fromstring(archive.read("xl/workbook.xml"))
+        names = [sheet.get("name") for sheet in workbook.find("m:sheets", ns)]
+        sheets = {}
+        for index, name in enumerate(names, start=1):
+            root = etree.fromstring(archive.read(f"xl/worksheets/sheet{index}.xml"))
+            rows = []
+            for row in root.iterfind(".//m:row", ns):
+                values = []
+                for cell in row.findall("m:c", ns):
+                    kind = cell.get("t")
+                    if kind == "s":
+                        values.append(shared[int(cell.find("m:v", ns).text)])
+                    elif kind == "inlineStr":
+                        values.append("".join(cell.find("m:is", ns).itertext()))
+                    else:
+                        values.append(float(cell.find("m:v", ns).text))
+                rows.append(values)
+            sheets[name] = rows
+    return sheets
+
+
+def test_excel_rows_and_cell_values():
+    chunks, content_type, extension = asyncio.run(_export(ITEMS, "excel", ["titre", "prix", "tags"]))
+    assert extension == "xlsx"
+    assert len(chunks) > 1
+    assert _sheets(b"".join(chunks)) == {"Données": [
+        ["titre", "prix", "tags"],
+        ["Chaise", 12.5, "bois; chêne"],
+        ["Table, ronde"],
+        [7.0],
+    ]}
+
+
+def test_excel_formulas_are_written_as_text():
+    sheets = _sheets(b"".join(export([{"a": "=1+1"}], "excel")))
+    assert sheets["Données"][1] == ["=1+1"]
+
+
+def test_excel_continues_on_a_new_sheet_past_the_row_limit(monkeypatch):
+    from app.services.export import excel_exporter
+
+    monkeypatch.setattr(excel_exporter, "MAX_ROWS", 3)
+    sheets = _sheets(b"".join(export([{"n": n} for n in range(5)], "excel")))
+    assert sheets == {
+        "Données": [["n"], [0.0], [1.0]],
+        "Données 2": [["n"], [2.0], [3.0]],
+        "Données 3": [["n"], [4.0]],
+    }
+
+
+def test_excel_empty_input():
+    assert _sheets(b"".join(export([], "excel"))) == {"Données": []}
+    assert _sheets(b"".join(export([], "excel", ["titre"]))) == {"Données": [["titre"]]}
+
+
+def test_parquet_column_types_from_the_first_pass(monkeypatch):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(settings, "PARQUET_ROW_GROUP_SIZE", 2)
+    items = [
+        {"n": 1, "x": 1, "ok": True, "mixte": 1, "tags": ["a"]},
+        {"n": 2, "x": 2.5, "ok": False, "mixte": "b", "tags": "seul"},
+        {"n": None, "x": None, "ok": None, "mixte": None, "tags": None},
+    ]
+    chunks = export(items, "parquet")
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.schema.field("n").type == pa.int64()
+    assert table.schema.field("x").type == pa.float64()
+    assert table.schema.field("ok").type == pa.bool_()
+    assert table.schema.field("mixte").type == pa.string()
+    assert table.schema.field("tags").type == pa.list_(pa.string())
+    assert table.to_pylist() == [
+        {"n": 1, "x": 1.0, "ok": True, "mixte": "1", "tags": ["a"]},
+        {"n": 2, "x": 2.5, "ok": False, "mixte": "b", "tags": ["seul"]},
+        {"n": None, "x": None, "ok": None, "mixte": None, "tags": None},
+    ]
+    assert pq.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups == 2
+
+
+def test_parquet_empty_input():
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(io.BytesIO(b"".join(export([], "parquet"))))
+    assert table.num_rows == 0
+
+
+@pytest.mark.parametrize("items", [ITEMS * 20, []])
+def test_compressed_ndjson(items):
+    import gzip
+    import zstandard
+
+    expected = b"".join(export(items, "ndjson"))
+    assert gzip.decompress(b"".join(export(items, "ndjson.gz"))) == expected
+    reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(b"".join(export(items, "ndjson.zst"))))
+    assert reader.read() == expected
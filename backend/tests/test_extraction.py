@@ -0,0 +1,72 @@
+import pytest
+from bs4 import BeautifulSoup
+from app.services.scraping.extraction import CompiledExtractor, clean_text, get_extractor
+
+HTML = """
+<html><body>
+  <div class="produit Promo" id="p1">
+    <h2 class="titre">Chaise <b>bois</b></h2>
+    <span class="prix">12 ,50 €</span>
+    <ul><li class="tag">a</li><li class="tag">b</li></ul>
+    <a href="/p1" data-x="1">voir</a>
+  </div>
+  <div class="produit" id="p2">
+    <h2 class="titre">Table</h2>
+    <p><span class="prix">40 €</span></p>
+  </div>
+  <div class="produit" id="vide"><p>rien</p></div>
+</body></html>
+"""
+
+
+def _reference(selectors):
+    """Extraction champ par champ avec container.select(), le comportement d'origine"""
+    soup = BeautifulSoup(HTML, "html.parser")
+    data = []
+    for container in soup.select(selectors["item_container"]):
+        item = {}
+        for field, selector in selectors.items():
+            if field == "item_container":
+                continue
+            elements = container.select(selector)
+            if not elements:
+                item[field] = None
+            elif len(elements) > 1:
+                item[field] = [clean_text(el.get_text()) for el in elements]
+            else:
+                item[field] = clean_text(elements[0].get_text())
+        if any(item.values()):
+            data.append(item)
+    return data
+
+
+@pytest.mark.parametrize("selectors", [
+    {"item_container": "div.produit", "titre": "h2.titre", "prix": ".prix", "tags": "li.tag"},
+    {"item_container": "div.produit", "titre": "h2 > b, h2", "lien": "a[href]", "prix": "p span"},
+    {"item_container": "div.produit", "promo": ".promo", "classe": "li.tag:nth-child(2)", "x": "#p1 a"},
+    {"item_container": "div", "titre": ":scope > h2", "tout": "*"},
+])
+def test_same_result_as_field_by_field_selection(selectors):
+    soup = BeautifulSoup(HTML, "html.parser")
+    assert CompiledExtractor(selectors).extract(soup) == _reference(selectors)
+
+
+def test_values_are_cleaned_and_lists_kept_for_multiple_matches():
+    soup = BeautifulSoup(HTML, "html.parser")
+    items = CompiledExtractor({"item_container": "div.produit", "titre": "h2", "prix": ".prix", "tags": ".tag"}).extract(soup)
+    assert items == [
+        {"titre": "Chaise bois", "prix": "12,50 €", "tags": ["a", "b"]},
+        {"titre": "Table", "prix": "40 €", "tags": None},
+    ]
+
+
+def test_invalid_field_selector_yields_none():
+    soup = BeautifulSoup(HTML, "html.parser")
+    items = CompiledExtractor({"item_container": "div.produit", "titre": "h2", "casse": "[["}).extract(soup)
+    assert [item["casse"] for item in items] == [None, None]
+
+
+def test_extractors_are_cached_per_configuration():
+    selectors = {"item_container": "div", "titre": "h2"}
+    assert get_extractor(selectors) is get_extractor(dict(selectors))
+    assert get_extractor(selectors) is not get_extractor({"item_container": "div", "titre": "h3"})
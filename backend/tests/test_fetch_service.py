@@ -0,0 +1,126 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from app.core.config import settings
+from app.services.http.fetch_service import FetchService, StreamedResponse
+from app.services.http.retry import CircuitBreaker, CircuitOpen
+
+URL = "https://exemple.com/page"
+HOST = "exemple.com"
+
+
+class _Backend:
+    name = "test"
+
+    def __init__(self, status: int = 200):
+        self.status = status
+        self.calls = 0
+
+    @asynccontextmanager
+    async def stream(self, method, url, headers, json_body, timeout):
+        self.calls += 1
+
+        async def chunks(size):
+            yield b"ok"
+
+        yield StreamedResponse(url=url, status=self.status, headers={}, _iter_chunks=chunks)
+
+
+class _BlockingLimiter:
+    def __init__(self):
+        self.waiting = asyncio.Event()
+
+    async def acquire(self, host):
+        self.waiting.set()
+        await asyncio.Event().wait()
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(settings, "HTTP_MAX_CONNECTIONS_PER_HOST", 1)
+    service = FetchService()
+    service.backend = _Backend()
+    service._started = True
+    return service
+
+
+def _half_open(fetcher):
+    """Disjoncteur ouvert après un échec, requête d'essai autorisée immédiatement"""
+    state = fetcher._host_state(URL)
+    state.breaker = CircuitBreaker(1, 0)
+    state.breaker.record_failure(HOST)
+    return state
+
+
+async def _get(fetcher):
+    async with fetcher.stream("GET", URL) as response:
+        return response.status
+
+
+def test_probe_cancelled_while_queued_is_released(fetcher):
+    async def scenario():
+        state = _half_open(fetcher)
+        await state.semaphore.acquire()  # Emplacement de l'hôte occupé
+        task = asyncio.create_task(_get(fetcher))
+        await asyncio.sleep(0)
+        assert state.breaker.probing
+        assert state.waiting == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not state.breaker.probing
+        assert state.waiting == 0
+        assert state.in_flight == 0
+
+        state.semaphore.release()
+        assert await _get(fetcher) == 200
+        assert state.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_probe_cancelled_during_rate_limit_is_released(fetcher):
+    async def scenario():
+        state = _half_open(fetcher)
+        fetcher.rate_limiter = _BlockingLimiter()
+        task = asyncio.create_task(_get(fetcher))
+        await fetcher.rate_limiter.waiting.wait()
+        assert state.breaker.probing
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not state.breaker.probing
+        assert state.waiting == 0
+        assert state.breaker.before_request(HOST) is True
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_request_rejected_while_probing(fetcher):
+    async def scenario():
+        state = _half_open(fetcher)
+        await state.semaphore.acquire()
+        probe = asyncio.create_task(_get(fetcher))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpen):
+            await _get(fetcher)
+        state.semaphore.release()
+        assert await probe == 200
+        assert fetcher.backend.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_probe_reopens_circuit(fetcher):
+    async def scenario():
+        state = _half_open(fetcher)
+        fetcher.backend = _Backend(status=503)
+        assert await _get(fetcher) == 503
+        assert not state.breaker.probing
+        assert state.breaker.opened_at is not None
+
+    asyncio.run(scenario())
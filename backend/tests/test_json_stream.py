@@ -0,0 +1,49 @@
+import json
+import pytest
+from app.services.llm.json_stream import JsonObjectScanner
+
+DOCUMENT = '{"selecteurs": {"titre": "h2.t"}, "note": "accolade } et \\" dans une chaîne {"}'
+
+
+def _scan(fragments):
+    scanner = JsonObjectScanner()
+    for index, fragment in enumerate(fragments):
+        if scanner.feed(fragment):
+            return scanner, index
+    return scanner, None
+
+
+def test_single_fragment():
+    scanner, index = _scan([DOCUMENT])
+    assert index == 0
+    assert json.loads(scanner.text) == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_object_split_across_fragments(size):
+    fragments = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    scanner, index = _scan(fragments)
+    assert index == len(fragments) - 1
+    assert scanner.text == DOCUMENT
+
+
+def test_leading_text_and_trailing_text_are_ignored():
+    scanner, index = _scan(["Voici la configuration :\n```json\n", DOCUMENT[:10], DOCUMENT[10:] + "\n```\nAutre {"])
+    assert index == 2
+    assert scanner.text == DOCUMENT
+    assert scanner.feed("}") is True
+    assert scanner.text == DOCUMENT
+
+
+def test_escaped_backslash_before_closing_quote():
+    document = '{"chemin": "C:\\\\", "suite": "}"}'
+    scanner, _ = _scan(list(document))
+    assert scanner.complete
+    assert json.loads(scanner.text) == {"chemin": "C:\\", "suite": "}"}
+
+
+def test_incomplete_object():
+    scanner, index = _scan(["pas d'objet", '{"a": {"b": 1}'])
+    assert index is None
+    assert scanner.started and not scanner.complete
+    assert scanner.text == '{"a": {"b": 1}'
@@ -0,0 +1,69 @@
+import pytest
+from app.core.config import settings
+from app.services.scraping.pagination import PaginationPlan
+
+URL = "https://exemple.com/liste?tri=prix"
+
+
+def _plan(rules, **config):
+    return PaginationPlan(URL, {"navigation_rules": rules, **config})
+
+
+def test_first_page_is_the_task_url():
+    assert _plan({"url_template": "/page/{n}/"}).page_url(0) == URL
+
+
+def test_query_template_replaces_the_page_parameter():
+    plan = _plan({"url_template": "?page={n}"}, max_pages=3)
+    assert plan.planned_urls() == [
+        URL,
+        "https://exemple.com/liste?tri=prix&page=2",
+        "https://exemple.com/liste?tri=prix&page=3",
+    ]
+
+
+def test_path_template_with_start_and_step():
+    plan = _plan({"url_template": "/liste/page/{page}/", "start": 0, "step": 10})
+    assert plan.page_url(2) == "https://exemple.com/liste/page/20/"
+
+
+def test_other_braces_in_the_template_are_kept():
+    plan = _plan({"url_template": "/api/{id}/page/{n}?f={\"a\":1}"})
+    assert plan.page_url(1) == "https://exemple.com/api/{id}/page/2?f={\"a\":1}"
+
+
+def test_template_without_placeholder_is_rejected():
+    with pytest.raises(ValueError):
+        _plan({"url_template": "/page/{0}/"})
+
+
+def test_offset_requires_a_step():
+    with pytest.raises(ValueError):
+        _plan({"type": "offset"})
+    plan = _plan({"type": "offset", "param": "debut", "step": 20})
+    assert plan.page_url(3) == "https://exemple.com/liste?tri=prix&debut=60"
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError):
+        _plan({"type": "infini"})
+
+
+def test_max_pages_is_capped_by_the_global_limit(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_MAX_PAGES", 5)
+    assert _plan({"url_template": "?page={n}"}, max_pages=1000).max_pages == 5
+    assert len(_plan({"url_template": "?page={n}"}, max_pages=1000).planned_urls()) == 5
+    assert _plan({"url_template": "?page={n}"}, max_pages=2).max_pages == 2
+    assert _plan({"url_template": "?page={n}"}).max_pages == 5
+
+
+def test_next_link_and_cursor_follow_the_page():
+    plan = _plan({})
+    assert not plan.known_in_advance
+    assert plan.planned_urls() == [URL]
+    assert plan.next_url(URL, {"next": "/liste?page=2"}) == "https://exemple.com/liste?page=2"
+    assert plan.next_url(URL, {"next": None}) is None
+
+    plan = _plan({"type": "cursor", "cursor_selector": "#suite"})
+    assert plan.link_selectors() == {"cursor": ("#suite", "data-cursor")}
+    assert plan.next_url(URL, {"cursor": "abc"}) == "https://exemple.com/liste?tri=prix&cursor=abc"
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.core.config import settings
+from app.services.proxy.manager import ProxyManager
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "PROXY_QUARANTINE_FAILURES", 2)
+    monkeypatch.setattr(settings, "PROXY_QUARANTINE_BASE", 60)
+    return AsyncMongoMockClient().db
+
+
+def _proxy(port, **fields):
+    return {"protocol": "http", "ip": "10.0.0.1", "port": port, "status": "active", **fields}
+
+
+async def _manager(db):
+    manager = ProxyManager(db)
+    await manager.refresh()
+    await manager.close()
+    return manager
+
+
+def test_target_429_is_not_scored(db):
+    async def scenario():
+        await db.proxy_pool.insert_one(_proxy(8080))
+        manager = await _manager(db)
+        entry = manager.proxies[0]
+        for _ in range(5):
+            manager.record_response(entry, 429, 0.2)
+        assert entry.total_requests == 0
+        assert entry.error_ewma == 0.0
+        assert not entry.quarantined
+
+        manager.record_response(entry, 407, 0.2)
+        manager.record_response(entry, 403, 0.2)
+        assert entry.quarantined
+        manager.record_response(entry, 200, 0.2)
+        assert entry.successful_requests == 1 and not entry.quarantined
+
+    asyncio.run(scenario())
+
+
+def test_stored_quarantine_is_restored_on_load(db):
+    async def scenario():
+        await db.proxy_pool.insert_one(_proxy(8080, quarantined_until=datetime.utcnow() + timedelta(seconds=60)))
+        manager = await _manager(db)
+        entry = manager.proxies[0]
+        assert entry.quarantined
+        assert entry.quarantined_until - time.monotonic() == pytest.approx(60, abs=2)
+        assert entry.needs_recheck
+
+        entry.quarantined_until = 0.0
+        manager._loaded_at = 0.0
+        await manager.refresh()
+        await manager.close()
+        assert manager.proxies[0] is entry and entry.quarantined
+
+    asyncio.run(scenario())
+
+
+def test_expired_quarantine_is_ignored(db):
+    async def scenario():
+        await db.proxy_pool.insert_one(_proxy(8080, quarantined_until=datetime.utcnow() - timedelta(seconds=5)))
+        manager = await _manager(db)
+        entry = manager.proxies[0]
+        assert not entry.quarantined
+        assert not entry.needs_recheck
+
+    asyncio.run(scenario())
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from app.services.http.rate_limiter import LocalBucketStore, RateLimit, RateLimiter, parse_overrides
+
+
+def test_parse_overrides_accepts_both_forms():
+    overrides = parse_overrides('{"Exemple.com": [10, 60], "api.site.fr": {"requests": 2, "period": 1}}')
+    assert overrides == {"exemple.com": RateLimit(10, 60.0), "api.site.fr": RateLimit(2, 1.0)}
+    assert parse_overrides("") == {}
+    assert parse_overrides('{"exemple.com": "beaucoup"}') == {}
+
+
+def test_most_specific_domain_wins():
+    limiter = RateLimiter(LocalBucketStore(), RateLimit(60, 60), {
+        "exemple.com": RateLimit(10, 60),
+        "api.exemple.com": RateLimit(1, 1),
+    })
+    assert limiter.limit_for("api.exemple.com") == RateLimit(1, 1)
+    assert limiter.limit_for("www.exemple.com") == RateLimit(10, 60)
+    assert limiter.limit_for("autre.org") == RateLimit(60, 60)
+
+
+def test_local_bucket_allows_a_burst_then_refills():
+    async def scenario():
+        store = LocalBucketStore()
+        limit = RateLimit(4, 0.4)
+        assert await store.acquire("h", limit, 3) == (3, 0.0)
+        granted, _ = await store.acquire("h", limit, 3)
+        assert granted == 1
+        granted, wait = await store.acquire("h", limit, 1)
+        assert granted == 0 and 0 < wait <= 0.1
+        await asyncio.sleep(0.2)
+        granted, _ = await store.acquire("h", limit, 4)
+        assert granted == 2
+
+    asyncio.run(scenario())
+
+
+def _timed_requests(limiter, host, count):
+    async def scenario():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire(host) for _ in range(count)))
+        return time.monotonic() - started
+
+    return asyncio.run(scenario())
+
+
+def test_requests_beyond_the_budget_wait():
+    limiter = RateLimiter(LocalBucketStore(), RateLimit(2, 0.2))
+    # 2 requêtes immédiates, puis un jeton toutes les 0,1 s
+    assert 0.15 <= _timed_requests(limiter, "exemple.com", 4) < 0.5
+    stats = limiter.get_stats()["hosts"]["exemple.com"]
+    assert stats["requests"] == 4 and stats["waits"] >= 2
+
+
+def test_hosts_have_separate_budgets():
+    limiter = RateLimiter(LocalBucketStore(), RateLimit(1, 10))
+    assert _timed_requests(limiter, "a.com", 1) < 0.05
+    assert _timed_requests(limiter, "B.com", 1) < 0.05
+
+
+def test_zero_requests_disables_the_limit():
+    limiter = RateLimiter(LocalBucketStore(), RateLimit(0, 1))
+    assert _timed_requests(limiter, "exemple.com", 50) < 0.05
+
+
+class _CountingStore(LocalBucketStore):
+    name = "compteur"
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.calls = []
+
+    async def acquire(self, host, limit, wanted):
+        self.calls.append(wanted)
+        if self.fail:
+            raise ConnectionError("magasin injoignable")
+        return await super().acquire(host, limit, wanted)
+
+
+def test_tokens_are_taken_from_the_store_in_batches():
+    store = _CountingStore()
+    limiter = RateLimiter(store, RateLimit(100, 60), batch_size=5)
+    _timed_requests(limiter, "exemple.com", 12)
+    assert store.calls == [5, 5, 5]
+
+
+def test_batch_never_exceeds_a_quarter_of_the_budget():
+    store = _CountingStore()
+    limiter = RateLimiter(store, RateLimit(8, 60), batch_size=5)
+    _timed_requests(limiter, "exemple.com", 1)
+    assert store.calls == [2]
+
+
+def test_store_failure_falls_back_to_local_buckets():
+    store = _CountingStore(fail=True)
+    limiter = RateLimiter(store, RateLimit(100, 60), batch_size=1)
+    assert _timed_requests(limiter, "exemple.com", 3) < 0.05
+    # Le magasin n'est plus interrogé pendant STORE_RETRY_DELAY
+    assert len(store.calls) == 1
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+from email.utils import formatdate
+import pytest
+from app.core.config import settings
+from app.services.http.response_cache import ResponseCache
+
+URL = "https://exemple.com/page"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEFAULT_HEADERS", {"Accept-Language": "fr"})
+    cache = ResponseCache(str(tmp_path), max_bytes=100, heuristic_ttl=3600)
+    asyncio.run(cache.load())
+    return cache
+
+
+def _store(cache, url=URL, body=b"corps", request_headers=None, **headers):
+    headers = {name.replace("_", "-"): value for name, value in headers.items()}
+    return asyncio.run(cache.store(url, 200, headers, body, request_headers))
+
+
+def test_max_age_minus_age_sets_freshness(cache):
+    entry = _store(cache, cache_control="max-age=60", age="20")
+    assert 35 < entry.expires_at - entry.stored_at <= 40
+    assert cache.is_fresh(entry)
+    assert cache.lookup(URL) is entry
+    assert asyncio.run(cache.read_body(entry)) == b"corps"
+
+
+def test_expires_is_relative_to_the_date_header(cache):
+    now = time.time()
+    entry = _store(cache, expires=formatdate(now + 3600, usegmt=True), date=formatdate(now - 3600, usegmt=True))
+    assert 7190 < entry.expires_at - entry.stored_at <= 7200
+
+
+def test_heuristic_freshness_from_last_modified(cache):
+    entry = _store(cache, last_modified=formatdate(time.time() - 1000, usegmt=True))
+    assert entry.expires_at - entry.stored_at == pytest.approx(100, abs=1)
+    entry = _store(cache, last_modified=formatdate(time.time() - 10 ** 6, usegmt=True))
+    assert entry.expires_at - entry.stored_at == pytest.approx(3600)
+
+
+def test_uncacheable_responses_are_not_stored(cache):
+    assert _store(cache, cache_control="no-store, max-age=60") is None
+    assert _store(cache, cache_control="max-age=60", vary="*") is None
+    # Ni fraîcheur ni validateur
+    assert _store(cache) is None
+    assert asyncio.run(cache.store(URL, 404, {"cache-control": "max-age=60"}, b"x")) is None
+    assert _store(cache, body=b"x" * 101, cache_control="max-age=60") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_no_cache_requires_revalidation(cache):
+    entry = _store(cache, cache_control="no-cache, max-age=60", etag='"v1"')
+    assert not cache.is_fresh(entry)
+    assert cache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+
+
+def test_refresh_after_304_extends_freshness(cache):
+    entry = _store(cache, etag='"v1"')
+    assert not cache.is_fresh(entry)
+    entry = asyncio.run(cache.refresh(entry, {"cache-control": "max-age=60", "etag": '"v2"'}))
+    assert cache.is_fresh(entry)
+    assert entry.etag == '"v2"'
+
+
+def test_vary_matches_request_and_default_headers(cache):
+    _store(cache, cache_control="max-age=60", vary="Accept-Encoding, Accept-Language",
+           request_headers={"Accept-Encoding": "gzip"})
+    assert cache.lookup(URL, {"accept-encoding": "gzip"}) is not None
+    assert cache.lookup(URL, {"Accept-Encoding": "br"}) is None
+    # Accept-Language vient des en-têtes par défaut du client
+    assert cache.lookup(URL, {"Accept-Encoding": "gzip", "Accept-Language": "en"}) is None
+
+
+def test_identical_bodies_are_stored_once(cache, tmp_path):
+    _store(cache, url=URL, cache_control="max-age=60")
+    _store(cache, url=URL + "?b", cache_control="max-age=60")
+    assert cache.get_stats() == {"entries": 2, "objects": 1, "total_bytes": 5, "max_bytes": 100}
+    asyncio.run(cache.invalidate(URL))
+    assert cache.get_stats()["objects"] == 1
+    asyncio.run(cache.invalidate(URL + "?b"))
+    assert cache.get_stats()["objects"] == 0
+    assert os.listdir(tmp_path / "entries") == []
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    first = _store(cache, url=URL + "?1", body=b"1" * 40, cache_control="max-age=60")
+    _store(cache, url=URL + "?2", body=b"2" * 40, cache_control="max-age=60")
+    asyncio.run(cache.read_body(first))
+    _store(cache, url=URL + "?3", body=b"3" * 40, cache_control="max-age=60")
+    assert cache.lookup(URL + "?1") is not None
+    assert cache.lookup(URL + "?2") is None
+    assert cache.lookup(URL + "?3") is not None
+    assert cache.total_bytes == 80
+
+
+def test_index_is_reloaded_from_disk(cache, tmp_path):
+    _store(cache, cache_control="max-age=60", etag='"v1"')
+    reloaded = ResponseCache(str(tmp_path), max_bytes=100, heuristic_ttl=3600)
+    asyncio.run(reloaded.load())
+    entry = reloaded.lookup(URL)
+    assert entry.etag == '"v1"'
+    assert asyncio.run(reloaded.read_body(entry)) == b"corps"
+
+
+def test_missing_body_drops_the_entry(cache, tmp_path):
+    entry = _store(cache, cache_control="max-age=60")
+    os.remove(cache._object_path(entry.digest))
+    assert asyncio.run(cache.read_body(entry)) is None
+    assert cache.lookup(URL) is None
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.core.config import settings
+from app.services.scraping.result_store import ResultStore
+
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    monkeypatch.setattr(settings, "RESULTS_BATCH_SIZE", 2)
+
+
+async def _write(store, task_id, batches, results_id=None, start_seq=0, known_fields=None):
+    results_id = results_id or await store.create_summary(task_id, {"url": "https://exemple.com"})
+    writer = store.writer(task_id, results_id, start_seq, known_fields)
+    for batch in batches:
+        await writer.add(batch)
+    await writer.flush()
+    return results_id, writer
+
+
+def test_items_are_stored_one_per_document_in_order():
+    async def scenario():
+        store = ResultStore(AsyncMongoMockClient().db)
+        results_id, writer = await _write(store, "t", [[{"n": 0}, {"n": 1}, {"n": 2}], [{"n": 3}, {"n": 4}]])
+        summary = await store.db.scraping_results.find_one({"_id": results_id})
+        assert summary["metadata"]["total_items"] == 5
+        assert writer.seq == 5
+        assert await store.items.count_documents({"task_id": "t"}) == 5
+        assert [item["n"] for item in await store.load_items("t", summary)] == [0, 1, 2, 3, 4]
+        assert await store.next_seq("t") == 5
+
+    asyncio.run(scenario())
+
+
+def test_fields_keep_their_first_appearance_order_without_duplicates():
+    async def scenario():
+        store = ResultStore(AsyncMongoMockClient().db)
+        batches = [[{"z": 1, "a": 1}], [{"a": 2, "m": 2}], [{"z": 3, "b": 3, "m": 3}]]
+        results_id, _ = await _write(store, "t", batches)
+        summary = await store.db.scraping_results.find_one({"_id": results_id})
+        assert summary["metadata"]["fields"] == ["z", "a", "m", "b"]
+
+        # Reprise dans le même résumé : les champs connus ne sont pas ajoutés de nouveau
+        await _write(store, "t", [[{"a": 4, "y": 4}]], results_id, 5, summary["metadata"]["fields"])
+        summary = await store.db.scraping_results.find_one({"_id": results_id})
+        assert summary["metadata"]["fields"] == ["z", "a", "m", "b", "y"]
+        assert summary["metadata"]["total_items"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_cursor_pagination_and_projection():
+    async def scenario():
+        store = ResultStore(AsyncMongoMockClient().db)
+        await _write(store, "t", [[{"n": n, "x": -n} for n in range(7)]])
+        pages, after = [], -1
+        while True:
+            page = [doc async for doc in store.iter_documents("t", after_seq=after, limit=3, fields=["n"])]
+            if not page:
+                break
+            pages.append([item for _, item in page])
+            after = page[-1][0]
+        assert pages == [[{"n": 0}, {"n": 1}, {"n": 2}], [{"n": 3}, {"n": 4}, {"n": 5}], [{"n": 6}]]
+
+    asyncio.run(scenario())
+
+
+def test_legacy_summary_with_a_data_array_is_still_readable():
+    async def scenario():
+        store = ResultStore(AsyncMongoMockClient().db)
+        summary = {"data": [{"n": 0, "x": 0}, {"n": 1}, {"n": 2}]}
+        documents = [doc async for doc in store.iter_documents("t", summary, after_seq=0, limit=1, fields=["x"])]
+        assert documents == [(1, {})]
+        assert [item async for item in store.iter_items("t", summary, after_seq=0)] == [{"n": 1}, {"n": 2}]
+
+    asyncio.run(scenario())
+
+
+def test_reset_removes_items_and_summaries():
+    async def scenario():
+        store = ResultStore(AsyncMongoMockClient().db)
+        await _write(store, "t", [[{"n": 0}]])
+        await _write(store, "autre", [[{"n": 0}]])
+        await store.reset("t")
+        assert await store.items.count_documents({}) == 1
+        assert await store.db.scraping_results.count_documents({"task_id": "t"}) == 0
+        assert await store.next_seq("t") == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,185 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.core import metrics
+from app.core.config import settings
+from app.services.http import retry
+from app.services.http.retry import (
+    CircuitBreaker, CircuitOpen, HTTPStatusError, RetryPolicy, parse_retry_after, with_retry
+)
+
+POLICY = RetryPolicy(name="test", max_retries=3, base_delay=0.01, max_delay=0.05, retry_statuses=(429, 503))
+
+
+class _Response:
+    def __init__(self, status, retry_after=None):
+        self.status = status
+        self.headers = {"retry-after": retry_after} if retry_after is not None else {}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Remplace asyncio.sleep par un enregistreur des attentes"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def _call(*outcomes):
+    """Appel factice qui retourne ou lève successivement les éléments de outcomes"""
+    remaining = list(outcomes)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        outcome = remaining.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return call, calls
+
+
+def test_parse_retry_after_seconds_and_date():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after(" 120 ") == 120.0
+    assert parse_retry_after("demain") is None
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(when) <= 60
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+def test_delay_uses_retry_after_as_minimum(monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_AFTER_MAX", 30)
+    assert 0 <= POLICY.delay(0) <= 0.01
+    assert POLICY.delay(5) <= 0.05
+    assert POLICY.delay(0, retry_after=7) == 7
+    assert POLICY.delay(0, retry_after=31) is None
+
+
+def test_retryable_status_is_retried_until_success(sleeps):
+    call, calls = _call(_Response(503), _Response(429, "2"), _Response(200))
+
+    async def scenario():
+        with metrics.collect_metrics() as collected:
+            response = await with_retry(call, POLICY, "GET test")
+        return response, collected
+
+    response, collected = asyncio.run(scenario())
+    assert response.status == 200
+    assert len(calls) == 3
+    assert sleeps[1] >= 2
+    assert collected.get("retry.test.attempts") == 2
+
+
+def test_last_response_is_returned_when_retries_are_exhausted(sleeps):
+    call, calls = _call(*[_Response(503)] * 4)
+    response = asyncio.run(with_retry(call, POLICY, "GET test"))
+    assert response.status == 503
+    assert len(calls) == 4
+    assert len(sleeps) == 3
+
+
+def test_retry_after_above_the_cap_stops_retrying(sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "RETRY_AFTER_MAX", 10)
+    call, calls = _call(_Response(429, "3600"), _Response(200))
+    assert asyncio.run(with_retry(call, POLICY, "GET test")).status == 429
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_errors_are_retried_then_raised(sleeps):
+    call, calls = _call(ConnectionError("reset"), HTTPStatusError(503, retry_after=1), ConnectionError("reset"), ConnectionError("fin"))
+    with pytest.raises(ConnectionError, match="fin"):
+        asyncio.run(with_retry(call, POLICY, "GET test"))
+    assert len(calls) == 4
+    assert sleeps[1] >= 1
+
+
+def test_non_retryable_errors_are_raised_immediately(sleeps):
+    for error in (HTTPStatusError(404), CircuitOpen("ouvert"), ValueError("bug")):
+        call, calls = _call(error)
+        with pytest.raises(type(error)):
+            asyncio.run(with_retry(call, POLICY, "GET test"))
+        assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_network_errors_not_retried_when_disabled(sleeps):
+    policy = RetryPolicy(name="test", max_retries=3, base_delay=0, max_delay=0, retry_errors=False)
+    call, calls = _call(ConnectionError("reset"))
+    with pytest.raises(ConnectionError):
+        asyncio.run(with_retry(call, policy, "POST test"))
+    assert len(calls) == 1
+
+
+def _opened_breaker(monkeypatch, now):
+    clock = [now]
+    monkeypatch.setattr(retry.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    for _ in range(2):
+        assert breaker.before_request("h") is False
+        breaker.record_failure("h")
+    return breaker, clock
+
+
+def test_circuit_opens_after_consecutive_failures(monkeypatch):
+    breaker, clock = _opened_breaker(monkeypatch, 100.0)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_request("h")
+    assert breaker.rejected == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure("h")
+    breaker.record_success()
+    breaker.record_failure("h")
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_probe_through(monkeypatch):
+    breaker, clock = _opened_breaker(monkeypatch, 100.0)
+    clock[0] += 10
+    assert breaker.state == "half_open"
+    assert breaker.before_request("h") is True
+    with pytest.raises(CircuitOpen):
+        breaker.before_request("h")
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_request("h") is False
+
+
+def test_failed_probe_reopens_for_a_full_timeout(monkeypatch):
+    breaker, clock = _opened_breaker(monkeypatch, 100.0)
+    clock[0] += 10
+    assert breaker.before_request("h") is True
+    breaker.record_failure("h")
+    assert breaker.state == "open"
+    clock[0] += 9
+    with pytest.raises(CircuitOpen):
+        breaker.before_request("h")
+    clock[0] += 1
+    assert breaker.before_request("h") is True
+
+
+def test_released_probe_lets_the_next_request_probe(monkeypatch):
+    breaker, clock = _opened_breaker(monkeypatch, 100.0)
+    clock[0] += 10
+    assert breaker.before_request("h") is True
+    breaker.release_probe()
+    assert breaker.before_request("h") is True
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure("h")
+        assert breaker.before_request("h") is False
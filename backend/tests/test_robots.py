@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from app.services.http.fetch_service import FetchResponse
+from app.services.scraping.robots import RobotsCache, RobotsUnavailable
+
+URL = "https://exemple.com/fiches/1"
+ROBOTS = b"User-agent: *\nDisallow: /prive/\nCrawl-delay: 2\n"
+
+
+class _Fetcher:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def get(self, url):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        status, body = response
+        return FetchResponse(url=url, status=status, headers={}, content=body)
+
+
+def _cache(*responses, ttl=3600):
+    return RobotsCache(_Fetcher(*responses), ttl, max_hosts=2)
+
+
+def test_rules_are_applied_and_cached():
+    async def scenario():
+        robots = _cache((200, ROBOTS))
+        assert await robots.can_fetch(URL)
+        assert not await robots.can_fetch("https://exemple.com/prive/page")
+        assert await robots.crawl_delay(URL) == 2.0
+        assert robots.fetcher.calls == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status", [401, 403, 404, 410, 429])
+def test_any_4xx_allows_everything(status):
+    async def scenario():
+        robots = _cache((status, b""))
+        assert await robots.can_fetch("https://exemple.com/prive/page")
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("response", [(500, b""), (503, b""), ConnectionError("refusé")])
+def test_server_error_or_network_error_means_unavailable(response):
+    async def scenario():
+        robots = _cache(response, (200, ROBOTS))
+        with pytest.raises(RobotsUnavailable) as error:
+            await robots.can_fetch(URL)
+        assert 0 < error.value.retry_after <= 60
+        # Toujours indisponible tant que l'entrée n'a pas expiré
+        with pytest.raises(RobotsUnavailable):
+            await robots.can_fetch(URL)
+        assert robots.fetcher.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_cache_is_bounded_per_origin():
+    async def scenario():
+        robots = _cache((404, b""), (404, b""), (404, b""))
+        for host in ("a", "b", "c"):
+            await robots.can_fetch(f"https://{host}.exemple.com/")
+        assert robots.get_stats() == {"hosts": 2}
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+import pytest
+from bs4 import BeautifulSoup
+from app.services.scraping.extraction import CompiledExtractor
+from app.services.scraping.streaming import StreamingExtractor, streaming_unsupported
+
+SELECTORS = {"item_container": "ul.liste > li.item", "nom": "span.nom", "tags": "em"}
+
+
+def _page(count):
+    items = "".join(
+        f'<li class="item"><span class="nom">Élément {i}</span><em>a</em><em>b{i}</em></li>'
+        for i in range(count)
+    )
+    return f'<html><body><div class="pub"><span class="nom">hors liste</span></div><ul class="liste">{items}</ul></body></html>'
+
+
+def _stream(html, chunk_size, selectors=SELECTORS, encoding="utf-8"):
+    extractor = StreamingExtractor(selectors, encoding)
+    data = html.encode(encoding)
+    items = []
+    for start in range(0, len(data), chunk_size):
+        items.extend(extractor.feed(data[start:start + chunk_size]))
+    items.extend(extractor.close())
+    return items, extractor
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 10 ** 6])
+def test_same_items_as_full_parsing_whatever_the_chunk_size(chunk_size):
+    html = _page(20)
+    expected = CompiledExtractor(SELECTORS).extract(BeautifulSoup(html, "html.parser"))
+    items, extractor = _stream(html, chunk_size)
+    assert items == expected
+    assert extractor.containers_found == 20
+
+
+def test_items_are_emitted_as_soon_as_their_container_closes():
+    extractor = StreamingExtractor(SELECTORS, "utf-8")
+    html = _page(3).encode("utf-8")
+    cut = html.index(b"</li>") + len(b"</li>")
+    assert extractor.feed(html[:cut]) == [{"nom": "Élément 0", "tags": ["a", "b0"]}]
+    assert len(extractor.feed(html[cut:]) + extractor.close()) == 2
+
+
+class _KeepParent(StreamingExtractor):
+    """Garde une référence à la liste pour inspecter l'arbre partiel"""
+
+    def _extract(self, container):
+        self.liste = container.getparent()
+        return super()._extract(container)
+
+
+def test_finished_containers_and_outer_content_are_dropped():
+    extractor = _KeepParent(SELECTORS, "utf-8")
+    html = _page(200).encode("utf-8")
+    items = extractor.feed(html[:html.rindex(b"</ul>")])
+    assert len(items) == 200
+    assert len(extractor.liste) == 0
+    pub, liste = extractor.liste.getparent()
+    assert liste is extractor.liste
+    assert len(pub) == 0
+
+
+@pytest.mark.parametrize("encoding", ["iso8859-1", "cp1252", "euc_jp", "mac-roman", "utf-16-le"])
+def test_encodings_unknown_to_libxml2_are_decoded_by_python(encoding):
+    items, _ = _stream(_page(2), 5, encoding=encoding)
+    assert [item["nom"] for item in items] == ["Élément 0", "Élément 1"]
+
+
+@pytest.mark.parametrize("css, reason", [
+    ("ul > li.item", None),
+    ("div.liste li", None),
+    ("h2 + div", "combinateur « + »"),
+    ("h2 ~ div", "combinateur « ~ »"),
+    ("li:nth-child(2)", ":nth-child"),
+    ("li:first-child", ":first-child"),
+    ("div:has(span)", ":has()"),
+    ("div:empty", ":empty"),
+    ("ul li:not(:last-child)", ":last-child"),
+    ("[[", None),
+])
+def test_streaming_unsupported(css, reason):
+    assert streaming_unsupported(css) == reason
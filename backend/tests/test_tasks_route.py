@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from app.api.routes import scraping
+from app.core.config import settings
+from app.services.scraping.manager import ScrapingManager
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "TASKS_PAGE_SIZE", 2)
+    db = AsyncMongoMockClient().db
+    start = datetime(2024, 1, 1)
+    asyncio.run(db.scraping_tasks.insert_many([
+        {
+            "_id": ObjectId(), "url": f"https://example.com/{n}", "host": "example.com",
+            "description": f"tâche {n}", "status": "completed", "created_at": start + timedelta(minutes=n),
+            "config": {"selectors": {"title": "h1"}}, "metadata": {"error": "boom" if n == 0 else None, "items": n}
+        }
+        for n in range(5)
+    ]))
+    manager = ScrapingManager.__new__(ScrapingManager)
+    manager.db = db
+    app = FastAPI()
+    app.include_router(scraping.router)
+    app.state.scraping_manager = manager
+    return TestClient(app)
+
+
+def test_list_without_paging_parameters_returns_every_task(client):
+    response = client.get("/tasks")
+    assert response.status_code == 200
+    tasks = response.json()
+    assert [task["description"] for task in tasks] == [f"tâche {n}" for n in (4, 3, 2, 1, 0)]
+    assert tasks[0]["config"]["selectors"] == {"title": "h1"}
+    assert "x-next-cursor" not in response.headers
+    assert "x-total-count" not in response.headers
+
+
+def test_limit_pages_the_list(client):
+    first = client.get("/tasks", params={"limit": 3})
+    assert len(first.json()) == 3
+    assert first.headers["x-total-count"] == "5"
+    second = client.get("/tasks", params={"limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [task["description"] for task in second.json()] == ["tâche 1", "tâche 0"]
+    assert "x-next-cursor" not in second.headers
+
+
+def test_cursor_alone_uses_the_default_page_size(client):
+    first = client.get("/tasks", params={"limit": 1})
+    second = client.get("/tasks", params={"cursor": first.headers["x-next-cursor"]})
+    assert [task["description"] for task in second.json()] == ["tâche 3", "tâche 2"]
+
+
+def test_summary_view_is_validated_by_the_response_model(client):
+    response = client.get("/tasks", params={"view": "summary", "limit": 5})
+    tasks = response.json()
+    assert response.headers["x-total-count"] == "5"
+    assert set(tasks[0]) == {
+        "_id", "url", "host", "description", "status", "created_at",
+        "updated_at", "results_id", "template_id", "error"
+    }
+    assert tasks[-1]["error"] == "boom"
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/tasks", params={"cursor": "invalide"}).status_code == 400
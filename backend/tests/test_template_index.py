@@ -0,0 +1,28 @@
+import pytest
+from app.services.template.index import pattern_host
+
+
+@pytest.mark.parametrize("pattern, host", [
+    (r"^https?://(www\.)?x\.com/", "x.com"),
+    (r"^https://www\.x\.com/annuaire/.*", "www.x.com"),
+    (r"^https?:\/\/x\.com\/", "x.com"),
+    (r"https?://([\w-]+\.)*x\.com(/|$)", "x.com"),
+    (r"^http://(?:www\.)?X\.com(?:/.*)?$", "x.com"),
+    (r"^https://x\.com$", "x.com"),
+])
+def test_pattern_host_anchored(pattern, host):
+    assert pattern_host(pattern) == host
+
+
+@pytest.mark.parametrize("pattern", [
+    r"^https?://x\.com/?",           # '/' facultatif : x.com.evil.net correspond aussi
+    r"^https?://x\.com:8080/",       # port
+    r"^https?://x\.com/|^https?://y\.com/",  # alternative hors groupe
+    r"(?i)^https?://x\.com/",        # drapeau en tête, schéma non reconnu
+    r"^https?://x\.com",             # hôte non terminé
+    r"^https?://x\.com/*",
+    r"^https?://.*x\.com/",
+    r".*x\.com.*",
+])
+def test_pattern_host_generic(pattern):
+    assert pattern_host(pattern) is None
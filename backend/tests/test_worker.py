@@ -0,0 +1,151 @@
+import asyncio
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+import pytest
+from app.core.config import settings
+from app.services.queue.job_queue import JobQueue
+from app.worker import Worker
+
+
+class _Manager:
+    """Exécution factice : bloque jusqu'à `release`, ou lève `error`"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.interrupted = []
+
+    async def execute_task(self, task_id):
+        self.started.set()
+        await self.release.wait()
+        if self.error:
+            raise self.error
+
+    async def interrupt_task(self, task_id):
+        self.interrupted.append(task_id)
+
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    monkeypatch.setattr(JobQueue, "_indexes_ready", True)
+    monkeypatch.setattr(settings, "QUEUE_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "QUEUE_HEARTBEAT_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "QUEUE_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "QUEUE_RETRY_DELAY", 0)
+
+
+async def _start(manager, task_id="tache"):
+    db = AsyncMongoMockClient().db
+    queue = JobQueue(db)
+    await queue.enqueue(task_id)
+    worker = Worker(manager, queue, 1, worker_id="w1")
+    run = asyncio.create_task(worker.run())
+    await asyncio.wait_for(manager.started.wait(), 1)
+    return db, worker, run
+
+
+def test_finished_job_is_completed():
+    async def scenario():
+        manager = _Manager()
+        db, worker, run = await _start(manager)
+        manager.release.set()
+        worker.stop()
+        await asyncio.wait_for(run, 1)
+        job = await db.scraping_jobs.find_one({})
+        assert job["status"] == "done"
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_timeout_releases_the_job(monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_SHUTDOWN_TIMEOUT", 0.05)
+
+    async def scenario():
+        manager = _Manager()
+        db, worker, run = await _start(manager)
+        worker.stop()
+        await asyncio.wait_for(run, 1)
+        job = await db.scraping_jobs.find_one({})
+        assert job["status"] == "queued"
+        assert job["attempts"] == 0
+        assert "lease_owner" not in job
+        assert manager.interrupted == ["tache"]
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_waits_for_jobs_within_the_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_SHUTDOWN_TIMEOUT", 1)
+
+    async def scenario():
+        manager = _Manager()
+        db, worker, run = await _start(manager)
+        worker.stop()
+        await asyncio.sleep(0.05)
+        manager.release.set()
+        await asyncio.wait_for(run, 1)
+        job = await db.scraping_jobs.find_one({})
+        assert job["status"] == "done"
+        assert manager.interrupted == []
+
+    asyncio.run(scenario())
+
+
+def test_lost_lease_leaves_the_job_to_its_new_owner():
+    async def scenario():
+        manager = _Manager()
+        db, worker, run = await _start(manager)
+        await db.scraping_jobs.update_one({}, {"$set": {"lease_owner": "w2"}})
+        await asyncio.sleep(0.1)
+        job = await db.scraping_jobs.find_one({})
+        assert job["status"] == "leased"
+        assert job["lease_owner"] == "w2"
+        assert manager.interrupted == []
+        worker.stop()
+        await asyncio.wait_for(run, 1)
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_is_retried_then_dead_lettered():
+    async def scenario():
+        task_id = str(ObjectId())
+        manager = _Manager(error=RuntimeError("boom"))
+        manager.release.set()
+        db, worker, run = await _start(manager, task_id)
+        await db.scraping_tasks.insert_one({"_id": ObjectId(task_id), "status": "running"})
+        for _ in range(100):
+            if await db.scraping_jobs_dead.count_documents({}):
+                break
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await asyncio.wait_for(run, 1)
+        job = await db.scraping_jobs.find_one({})
+        dead = await db.scraping_jobs_dead.find_one({})
+        task = await db.scraping_tasks.find_one({})
+        assert job["status"] == "dead"
+        assert dead["attempts"] == 2
+        assert dead["last_error"] == "boom"
+        assert task["status"] == "failed"
+        assert task["metadata"]["error"] == "boom"
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_past_max_attempts_is_dead_lettered():
+    async def scenario():
+        db = AsyncMongoMockClient().db
+        queue = JobQueue(db)
+        task_id = str(ObjectId())
+        await db.scraping_tasks.insert_one({"_id": ObjectId(task_id), "status": "running"})
+        await queue.enqueue(task_id)
+        for _ in range(2):
+            job = await queue.lease("w1")
+            await db.scraping_jobs.update_one({"_id": job["_id"]}, {"$set": {"lease_expires_at": job["leased_at"]}})
+        assert await queue.lease("w1") is None
+        task = await db.scraping_tasks.find_one({})
+        assert (await db.scraping_jobs.find_one({}))["status"] == "dead"
+        assert task["status"] == "failed"
+
+    asyncio.run(scenario())
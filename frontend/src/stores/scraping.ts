@@ -2,11 +2,16 @@ import { defineStore } from 'pinia'
 import { api } from '@/services/api'
 import type { Task, TaskCreate, MongoDBId } from '@/types'
 
+// Tâches chargées par page (curseur X-Next-Cursor), sans config ni metadata
+const TASKS_PAGE_SIZE = 50
+
 interface State {
   tasks: Task[]
   currentTask: Task | null
   loading: boolean
   error: string | null
+  nextCursor: string | null
+  totalTasks: number | null
 }
 
 const getTaskId = (task: Task): string => {
@@ -30,17 +35,29 @@ export const useScrapingStore = defineStore('scraping', {
     tasks: [],
     currentTask: null,
     loading: false,
-    error: null
+    error: null,
+    nextCursor: null,
+    totalTasks: null
   }),
 
   actions: {
+    async fetchTaskPage(cursor: string | null) {
+      const response = await api.get('/tasks', {
+        params: { limit: TASKS_PAGE_SIZE, view: 'summary', ...(cursor ? { cursor } : {}) }
+      })
+      console.log('Tasks reçues du backend:', response.data)
+      this.nextCursor = response.headers['x-next-cursor'] || null
+      const total = response.headers['x-total-count']
+      this.totalTasks = total !== undefined ? Number(total) : null
+      return response.data
+    },
+
     async fetchTasks() {
       this.loading = true
       try {
-        const response = await api.get('/tasks')
-        console.log('Tasks reçues du backend:', response.data)
+        const tasks = await this.fetchTaskPage(null)
         
-        this.tasks = response.data.map((task: any) => {
+        this.tasks = tasks.map((task: any) => {
           // Assure-toi que l'ID est présent dans _id pour la compatibilité
           const taskWithId = {
             ...task,
@@ -59,6 +76,20 @@ export const useScrapingStore = defineStore('scraping', {
       }
     },
 
+    async fetchMoreTasks() {
+      if (!this.nextCursor) return
+      try {
+        const tasks = await this.fetchTaskPage(this.nextCursor)
+        this.tasks.push(...tasks.map((task: any) => ({
+          ...task,
+          _id: task._id || task.id || { $oid: task.$oid }
+        })))
+      } catch (error) {
+        this.error = 'Erreur lors du chargement des tâches'
+        console.error('Error fetching tasks:', error)
+      }
+    },
+
     async createTask(task: TaskCreate) {
       this.loading = true
       try {
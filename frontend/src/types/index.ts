@@ -25,10 +25,12 @@ export interface Task {
   status: 'pending' | 'running' | 'completed' | 'failed'
   created_at: string
   updated_at?: string
-  config: any
+  config?: any
   results_id?: string
   template_id?: string
-  metadata: Record<string, any>
+  metadata?: Record<string, any>
+  // Liste des tâches (view=summary) : message d'erreur sans metadata
+  error?: string
 }
 
 // Métadonnées des résultats